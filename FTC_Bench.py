@@ -0,0 +1,2378 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for FTC_Switcher.py against local stand-in servers.
+
+Nothing here talks to a real scoring system or OBS: a fake scorekeeper serves
+/api/v2/stream/ and a fake obs-websocket v5 server answers requests, both on 127.0.0.1.
+
+    python FTC_Bench.py latency [--switches 30]
+    python FTC_Bench.py scenes
+    python FTC_Bench.py routing [--obs 3] [--slow-ms 300]
+    python FTC_Bench.py matchlog [--matches 1000 10000]
+    python FTC_Bench.py commit [--delay-ms 1500]
+    python FTC_Bench.py schedule
+    python FTC_Bench.py burst [--bursts 10] [--obs-ms 150] [--status-ms 1000]
+    python FTC_Bench.py preview [--matches 24]
+    python FTC_Bench.py export [--rows 2000] [--switches 20]
+    python FTC_Bench.py multievent [--events 8] [--matches 20]
+    python FTC_Bench.py clock [--matches 30]
+    python FTC_Bench.py chaos
+    python FTC_Bench.py crash [--matches 40] [--seed 1]
+    python FTC_Bench.py metrics [--switches 50]
+    python FTC_Bench.py logging [--lines 200] [--console-ms 2]
+    python FTC_Bench.py startup [--runs 5]
+    python FTC_Bench.py importtime
+    python FTC_Bench.py status [--matches 20] [--switches 30]
+    python FTC_Bench.py decode [--matches 120] [--recording day.jsonl]
+    python FTC_Bench.py eventday [--matches 120] [--fields 2] [--speed 1000] [--out day.jsonl]
+    python FTC_Bench.py replay recording.jsonl [--speed 1]
+
+A recording is what FTC_Switcher.py writes with "Record Stream To" set.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import http.server
+import io
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import urllib.request
+
+import websockets
+
+import FTC_Switcher as switcher
+
+
+# ==================================================
+#               Stand-in Servers
+# ==================================================
+
+class FakeScorekeeper:
+    """
+    Serves /api/v2/stream/, answers "ping" with "pong" and pushes whatever messages the benchmark
+    hands it. Can be killed and restarted on the same port, or made to hang, for the chaos checks.
+    """
+
+    def __init__(self):
+        self.clients = set()
+        self.hung = set()  # connections that get no answers any more
+        self.server = None
+        self.port = None
+        self.connections = 0
+        self.pongs = 0
+        self.connected = asyncio.Event()
+
+    async def start(self):
+        self.server = await websockets.serve(self._handler, "127.0.0.1", self.port or 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def _handler(self, ws):
+        self.clients.add(ws)
+        self.connections += 1
+        self.connected.set()
+        try:
+            async for message in ws:
+                if message == "ping" and ws not in self.hung:
+                    self.pongs += 1
+                    await ws.send("pong")
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(ws)
+
+    async def push(self, updateType, **payload):
+        await self.push_raw(json.dumps({"updateType": updateType, "updateTime": int(time.time() * 1000),
+                                        "payload": payload}))
+
+    async def push_raw(self, message):
+        for ws in list(self.clients - self.hung):
+            await ws.send(message)
+
+    def hang(self):
+        """
+        Current connections stay open but go silent, like a network path that stopped passing packets.
+        """
+        self.hung.update(self.clients)
+
+    async def kill(self):
+        """
+        Drops every connection without a close handshake and stops listening, like a crashed server.
+        """
+        for ws in list(self.clients):
+            ws.transport.abort()
+        self.server.close(close_connections=False)
+        await self.server.wait_closed()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class FakeScoringAPI:
+    """
+    The scoring system's HTTP API: the match list /api/v1/events/<code>/matches/ (with ETag and
+    Last-Modified, answering 304 to conditional requests) and match details
+    /api/v1/events/<code>/matches/<number>/, with an optional artificial delay.
+    Runs a ThreadingHTTPServer in a background thread.
+    """
+
+    def __init__(self):
+        self.delay = 0.0
+        self.results = {}  # number -> match details JSON
+        self.schedule = []  # match list entries
+        self.hits = []  # (request path, response status), in arrival order
+        api = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if api.delay:
+                    time.sleep(api.delay)
+                status, body, headers = api.respond(self.path, self.headers)
+                api.hits.append((self.path, status))
+                data = json.dumps(body).encode("utf-8") if status != 304 else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(http.server.ThreadingHTTPServer):
+            def handle_error(self, request, client_address):
+                if not isinstance(sys.exc_info()[1], ConnectionError):  # a killed client is expected
+                    super().handle_error(request, client_address)
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+
+    def respond(self, path, request_headers):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if len(parts) == 5 and parts[4] == "matches":
+            body = {"matches": self.schedule}
+            etag = '"%x"' % (hash(json.dumps(body, sort_keys=True)) & 0xffffffff)
+            headers = {"ETag": etag, "Last-Modified": "Sat, 01 Mar 2025 08:00:00 GMT"}
+            if request_headers.get("If-None-Match") == etag:
+                return 304, None, headers
+            return 200, body, headers
+        if len(parts) == 6 and parts[4] == "matches":
+            number = int(parts[5])
+            if number in self.results:
+                return 200, self.results[number], {}
+        return 404, {"error": "not found"}, {}
+
+    def count(self, kind, status=None):
+        """
+        Number of "list" or "detail" requests, optionally only those answered with `status`.
+        """
+        depth = 5 if kind == "list" else 6
+        return sum(1 for path, code in self.hits
+                   if len([p for p in path.split("?")[0].split("/") if p]) == depth
+                   and (status is None or code == status))
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def match_details(number, field=None):
+    return {"matchBrief": {"matchName": f"Q{number}", "matchNumber": number, "field": field or 1 + (number + 1) % 2,
+                           "red": {"team1": 1000 + number, "team2": 2000 + number},
+                           "blue": {"team1": 3000 + number, "team2": 4000 + number}},
+            "redScore": 10 * number, "blueScore": 5 * number}
+
+
+class FakeOBS:
+    """
+    Just enough of obs-websocket v5 for the switcher: Hello/Identify, single requests, request
+    batches and scene-change events. Every request is recorded with the time it executed.
+    SerialFrame batches run one request per simulated 60 fps frame.
+    """
+
+    output_duration = 0  # ms the stream has already been live when the stand-in starts
+
+    def __init__(self):
+        self.clients = set()
+        self.server = None
+        self.port = None
+        self.frame_interval = 1 / 60.0
+        self.response_delay = 0.0  # seconds, to simulate a slow or overloaded OBS
+        self.request_delays = {}  # requestType -> seconds; answered later without holding up other requests
+        self.program_scene = ""
+        self.preview_scene = ""
+        self.stream_started = time.perf_counter() - self.output_duration / 1000.0  # None while not streaming
+        self.requests = []  # (perf_counter, requestType, requestData)
+        self.request_event = asyncio.Event()
+        self.hung = set()
+        self.connections = 0
+
+    async def start(self):
+        self.server = await websockets.serve(self._handler, "127.0.0.1", self.port or 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def _execute(self, request_type, data):
+        self.requests.append((time.perf_counter(), request_type, data))
+        self.request_event.set()
+        if request_type == "GetCurrentProgramScene":
+            return True, {"currentProgramSceneName": self.program_scene, "sceneName": self.program_scene}
+        if request_type == "GetCurrentPreviewScene":
+            return True, {"currentPreviewSceneName": self.preview_scene, "sceneName": self.preview_scene}
+        if request_type == "SetCurrentProgramScene":
+            self.program_scene = data.get("sceneName", "")
+            return True, {}
+        if request_type == "SetCurrentPreviewScene":
+            self.preview_scene = data.get("sceneName", "")
+            return True, {}
+        if request_type == "GetStreamStatus":
+            if self.stream_started is None:
+                return True, {"outputActive": False, "outputDuration": 0}
+            return True, {"outputActive": True, "outputDuration": int((time.perf_counter() - self.stream_started) * 1000)}
+        if request_type == "GetVersion":
+            return True, {"obsVersion": "30.0.0", "obsWebSocketVersion": "5.0.0", "rpcVersion": 1}
+        return False, {}
+
+    async def _broadcast_scene_events(self, program_before, preview_before):
+        if self.program_scene != program_before:
+            await self.broadcast("CurrentProgramSceneChanged", sceneName=self.program_scene)
+        if self.preview_scene != preview_before:
+            await self.broadcast("CurrentPreviewSceneChanged", sceneName=self.preview_scene)
+
+    async def broadcast(self, event_type, **event_data):
+        message = json.dumps({"op": 5, "d": {"eventType": event_type, "eventIntent": 4, "eventData": event_data}})
+        for ws in list(self.clients - self.hung):
+            await ws.send(message)
+
+    async def start_stream(self):
+        await self.broadcast("StreamStateChanged", outputActive=False, outputState="OBS_WEBSOCKET_OUTPUT_STARTING")
+        self.stream_started = time.perf_counter()
+        await self.broadcast("StreamStateChanged", outputActive=True, outputState="OBS_WEBSOCKET_OUTPUT_STARTED")
+
+    async def stop_stream(self):
+        await self.broadcast("StreamStateChanged", outputActive=True, outputState="OBS_WEBSOCKET_OUTPUT_STOPPING")
+        self.stream_started = None
+        await self.broadcast("StreamStateChanged", outputActive=False, outputState="OBS_WEBSOCKET_OUTPUT_STOPPED")
+
+    async def operator_switch(self, program_scene=None, preview_scene=None):
+        """
+        Simulates the operator changing scenes in OBS by hand.
+        """
+        program_before, preview_before = self.program_scene, self.preview_scene
+        if program_scene is not None:
+            self.program_scene = program_scene
+        if preview_scene is not None:
+            self.preview_scene = preview_scene
+        await self._broadcast_scene_events(program_before, preview_before)
+
+    async def _handler(self, ws):
+        await ws.send(json.dumps({"op": 0, "d": {"obsWebSocketVersion": "5.0.0", "rpcVersion": 1}}))
+        await ws.recv()
+        await ws.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+        self.clients.add(ws)
+        self.connections += 1
+        try:
+            async for message in ws:
+                if ws in self.hung:
+                    continue
+                data = json.loads(message)
+                if self.response_delay:
+                    await asyncio.sleep(self.response_delay)
+                if data.get("op") == 6 and data["d"]["requestType"] in self.request_delays:
+                    asyncio.create_task(self._answer_later(ws, data["d"]))
+                elif data.get("op") == 6:
+                    d = data["d"]
+                    program_before, preview_before = self.program_scene, self.preview_scene
+                    ok, response_data = self._execute(d["requestType"], d.get("requestData", {}))
+                    status = {"result": ok, "code": 100 if ok else 204}
+                    await ws.send(json.dumps({"op": 7, "d": {
+                        "requestType": d["requestType"], "requestId": d["requestId"],
+                        "requestStatus": status, "responseData": response_data}}))
+                    await self._broadcast_scene_events(program_before, preview_before)
+                elif data.get("op") == 8:
+                    await self._execute_batch(ws, data["d"])
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(ws)
+
+    async def _answer_later(self, ws, d):
+        await asyncio.sleep(self.request_delays[d["requestType"]])
+        ok, response_data = self._execute(d["requestType"], d.get("requestData", {}))
+        try:
+            await ws.send(json.dumps({"op": 7, "d": {
+                "requestType": d["requestType"], "requestId": d["requestId"],
+                "requestStatus": {"result": ok, "code": 100 if ok else 204}, "responseData": response_data}}))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _execute_batch(self, ws, d):
+        program_before, preview_before = self.program_scene, self.preview_scene
+        results = []
+        for i, request in enumerate(d.get("requests", [])):
+            if d.get("executionType") == 1 and i:
+                await asyncio.sleep(self.frame_interval)
+            ok, response_data = self._execute(request["requestType"], request.get("requestData", {}))
+            results.append({"requestType": request["requestType"],
+                            "requestStatus": {"result": ok, "code": 100 if ok else 204},
+                            "responseData": response_data})
+            if not ok and d.get("haltOnFailure"):
+                break
+        await ws.send(json.dumps({"op": 9, "d": {"requestId": d["requestId"], "results": results}}))
+        await self._broadcast_scene_events(program_before, preview_before)
+
+    def count(self, request_type, after=0.0):
+        return sum(1 for stamp, name, _ in self.requests if name == request_type and stamp >= after)
+
+    async def wait_for(self, request_type, after):
+        """
+        Waits until a request of this type arrives after the given perf_counter value.
+        """
+        while True:
+            for stamp, name, _ in self.requests:
+                if name == request_type and stamp >= after:
+                    return stamp
+            self.request_event.clear()
+            await self.request_event.wait()
+
+    def hang(self):
+        """
+        Current connections stay open but OBS stops answering on them.
+        """
+        self.hung.update(self.clients)
+
+    async def kill(self):
+        """
+        Drops every connection without a close handshake and stops listening, like OBS crashing.
+        """
+        for ws in list(self.clients):
+            ws.transport.abort()
+        self.server.close(close_connections=False)
+        await self.server.wait_closed()
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+# ==================================================
+#               Harness
+# ==================================================
+
+def configure_switcher(obs_ports, ftc_port, engine, batch_execution="realtime", api_port=None, fields=2):
+    """
+    One OBS uses the classic FIELD1..4 settings ("Field 1" .. "Field <fields>"); several OBS get a
+    routing file with two fields each (fields 1-2 on obs1, 3-4 on obs2, ...).
+    """
+    switcher.shutdown_event.clear()
+    switcher.ENGINE = engine
+    switcher.OBS_BATCH_EXECUTION = batch_execution
+    switcher.OBS_SERVERNAME = "127.0.0.1"
+    switcher.OBS_WEBSOCKET_PORT = obs_ports[0]
+    switcher.OBS_WEBSOCKET_PASSWORD = ""
+    switcher.OBS_SCENENAME_FIELD1 = "Field 1"
+    switcher.OBS_SCENENAME_FIELD2 = "Field 2"
+    switcher.OBS_SCENENAME_FIELD3 = "Field 3" if fields >= 3 else ""
+    switcher.OBS_SCENENAME_FIELD4 = "Field 4" if fields >= 4 else ""
+    switcher.FTCSERVER_NAME = f"127.0.0.1:{ftc_port}"
+    switcher.FTCSERVER_EVENTCODE = "bench"
+    switcher.FETCH_BACKOFF = 0.05
+    switcher.connection_health = switcher.ConnectionHealth()
+    if api_port is not None:
+        # The stream and the HTTP API share FTCSERVER_NAME on a real scoring system; here they are
+        # separate servers, so point the match-detail URL at the HTTP stand-in.
+        switcher.match_details_url = lambda session, number: \
+            f"http://127.0.0.1:{api_port}/api/v1/events/{session.event_code}/matches/{number}/"
+        switcher.match_list_url = lambda session: \
+            f"http://127.0.0.1:{api_port}/api/v1/events/{session.event_code}/matches/"
+    switcher.ROUTING_CONFIG_FILE = ""
+    switcher.EVENTS_FILE = ""
+    if len(obs_ports) > 1:
+        routing = {"obs": {}, "fields": {}}
+        for i, port in enumerate(obs_ports):
+            routing["obs"][f"obs{i + 1}"] = {"host": "127.0.0.1", "port": port}
+            for field in (2 * i + 1, 2 * i + 2):
+                routing["fields"][str(field)] = {"obs": f"obs{i + 1}", "scene": f"Field {field}"}
+        with open("routing.json", "w") as f:
+            json.dump(routing, f)
+        switcher.ROUTING_CONFIG_FILE = os.path.abspath("routing.json")
+
+
+@contextlib.contextmanager
+def in_temp_dir():
+    """
+    Runs the switcher in a scratch directory so its CSV/TXT/match log never mix between runs.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def uncaught_thread_errors():
+    """
+    Collects the exceptions that escape a thread, which Python would print as a traceback.
+    The switcher's own hook (for obs-websocket-py's receive thread) passes anything else on to this one.
+    """
+    errors = []
+    previous_hook = threading.excepthook
+    threading.excepthook = lambda args: errors.append(f"{args.exc_type.__name__} in {args.thread.name}")
+    try:
+        yield errors
+    finally:
+        threading.excepthook = previous_hook
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, samples_ms):
+    return (f"{name:<10} n={len(samples_ms):<4} mean={statistics.mean(samples_ms):7.2f} ms  "
+            f"p50={percentile(samples_ms, 50):7.2f}  p95={percentile(samples_ms, 95):7.2f}  "
+            f"p99={percentile(samples_ms, 99):7.2f}  max={max(samples_ms):7.2f}")
+
+
+@contextlib.asynccontextmanager
+async def running_switcher(engine, batch_execution="realtime", obs_count=1, api=None, fields=2):
+    """
+    Starts the stand-in servers, points the switcher at them and runs main() in a thread.
+    Yields (scorekeeper, [obs, ...]).
+    """
+    ftc = FakeScorekeeper()
+    obs_list = [FakeOBS() for _ in range(obs_count)]
+    await ftc.start()
+    for obs in obs_list:
+        await obs.start()
+    configure_switcher([obs.port for obs in obs_list], ftc.port, engine, batch_execution,
+                       api.port if api is not None else None, fields)
+
+    engine_thread = threading.Thread(target=switcher.main, daemon=True)
+    engine_thread.start()
+    try:
+        await asyncio.wait_for(ftc.connected.wait(), 30)
+        yield ftc, obs_list
+    finally:
+        switcher.shutdown_event.set()
+        await asyncio.to_thread(engine_thread.join, 5)
+        await ftc.stop()
+        for obs in obs_list:
+            await obs.stop()
+
+
+async def run_latency(engine, batch_execution, switches, gap):
+    """
+    Pushes SHOW_MATCH for alternating fields and measures the time until the fake OBS executes
+    SetCurrentProgramScene (program) and until the next preview is staged as well (switch).
+    """
+    program_samples = []
+    switch_samples = []
+    async with running_switcher(engine, batch_execution) as (ftc, (obs,)):
+        for i in range(switches):
+            field = 1 + i % 2
+            sent = time.perf_counter()
+            await ftc.push("SHOW_MATCH", shortName=f"Q{i + 1}", number=i + 1, field=field)
+            program = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+            preview = await asyncio.wait_for(obs.wait_for("SetCurrentPreviewScene", sent), 10)
+            program_samples.append((program - sent) * 1000.0)
+            switch_samples.append((max(program, preview) - sent) * 1000.0)
+            await asyncio.sleep(random.uniform(0, gap))
+    return program_samples, switch_samples
+
+
+async def run_scene_cache(engine):
+    """
+    Checks that the scene cache follows OBS events and that "Already on FIELD" needs no OBS request.
+    Returns a list of (check, passed).
+    """
+    checks = []
+    async with running_switcher(engine) as (ftc, (obs,)):
+        await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+        await asyncio.wait_for(obs.wait_for("SetCurrentPreviewScene", 0), 10)
+
+        mark = time.perf_counter()
+        await ftc.push("SHOW_PREVIEW", shortName="Q1", number=1, field=1)
+        await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+        await asyncio.sleep(0.5)
+        checks.append(("repeat SHOW_MATCH sends no OBS requests", len([r for r in obs.requests if r[0] >= mark]) == 0))
+
+        await obs.operator_switch(program_scene="Field 2")
+        await asyncio.sleep(0.2)
+        mark = time.perf_counter()
+        await ftc.push("SHOW_MATCH", shortName="Q2", number=2, field=2)
+        await asyncio.sleep(0.5)
+        checks.append(("operator switch is picked up from OBS events", obs.count("SetCurrentProgramScene", mark) == 0))
+
+        await ftc.push("SHOW_MATCH", shortName="Q3", number=3, field=1)
+        await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", mark), 10)
+        checks.append(("field change still switches", obs.program_scene == "Field 1"))
+        checks.append(("no GetCurrentProgramScene after startup sync", obs.count("GetCurrentProgramScene") == 1))
+
+        await ftc.push_raw('{"updateType": "SHOW_MATCH", "payload": "x"}')
+        await ftc.push_raw('{"updateType": "SHOW_MATCH", "payload": {"shortName": null, "field": 1}}')
+        await ftc.push("SHOW_MATCH", shortName="Q4", number=4, field=2)
+        checks.append(("malformed frames do not stop the session",
+                       await until(lambda: obs.program_scene == "Field 2", 5)))
+    return checks
+
+
+async def run_routing(engine, obs_count, slow_delay):
+    """
+    Fields are spread over several OBS and the first OBS answers slowly. Each SHOW_MATCH for a slow
+    field is immediately followed by one for a field on another OBS, whose latency is measured.
+    Returns (list of (check, passed), latencies in ms).
+    """
+    samples = []
+    async with running_switcher(engine, obs_count=obs_count) as (ftc, obs_list):
+        # Measure from the first switch on: every OBS connected and synced before obs1 slows down.
+        connected = await until(lambda: switcher.event_sessions
+                                and len(switcher.event_sessions[0].targets) == obs_count
+                                and all(target.connected for target in switcher.event_sessions[0].targets.values()), 10)
+        obs_list[0].response_delay = slow_delay
+        fast_fields = list(range(3, 2 * obs_count + 1))
+        for i, fast_field in enumerate(fast_fields * 3):
+            await ftc.push("SHOW_MATCH", shortName=f"Q{i + 1}", number=i + 1, field=1 + i % 2)
+            sent = time.perf_counter()
+            await ftc.push("SHOW_MATCH", shortName=f"Q{i + 1}", number=i + 1, field=fast_field)
+            fast_obs = obs_list[(fast_field - 1) // 2]
+            arrived = await asyncio.wait_for(fast_obs.wait_for("SetCurrentProgramScene", sent), 10)
+            samples.append((arrived - sent) * 1000.0)
+            await asyncio.sleep(slow_delay * 2.5)
+    checks = [("every OBS connected before measuring", bool(connected)),
+              (f"a slow OBS only delays its own fields (p99 {percentile(samples, 99):.1f} ms on the others, "
+               f"obs1 takes {slow_delay * 1000:.0f} ms)", percentile(samples, 99) < slow_delay * 1000.0 / 4)]
+    return checks, samples
+
+
+def legacy_record_match_commit(event_code, shortName, res):
+    """
+    MATCH_COMMIT bookkeeping as it was before the match log: re-read and rewrite the whole CSV,
+    then re-read it again to rewrite the TXT. Kept here as the baseline.
+    """
+    csv_file = f"{event_code}_YouTube_Description.csv"
+    rows = []
+    with open(csv_file, 'r', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row.get("MatchName") == shortName:
+                row["RedFinal"] = res.get("redScore", "")
+                row["BlueFinal"] = res.get("blueScore", "")
+            rows.append(row)
+    with open(csv_file, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=switcher.CSV_FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(csv_file, 'r', newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    with open(f"{event_code}_YouTube_Description.txt", 'w') as txtfile:
+        for row in rows:
+            txtfile.write(switcher.format_description_entry(row))
+
+
+def synthetic_row(i):
+    return {"TimeStamp": time.strftime("%H:%M:%S", time.gmtime(i * 420)), "MatchName": f"Q{i}",
+            "Red1": str(1000 + i), "Red2": str(2000 + i), "Blue1": str(3000 + i), "Blue2": str(4000 + i),
+            "RedFinal": "", "BlueFinal": ""}
+
+
+def bench_match_log(args):
+    print("per-operation cost with N matches already logged")
+    for matches in args.matches:
+        with in_temp_dir():
+            legacy = f"legacy{matches}"
+            with open(f"{legacy}_YouTube_Description.csv", 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=switcher.CSV_FIELDNAMES)
+                writer.writeheader()
+                writer.writerows(synthetic_row(i) for i in range(1, matches + 1))
+            began = time.perf_counter()
+            for i in range(args.ops):
+                legacy_record_match_commit(legacy, f"Q{matches - i}", {"redScore": 10, "blueScore": i})
+            legacy_ms = (time.perf_counter() - began) * 1000.0 / args.ops
+
+            log = switcher.MatchLog(f"store{matches}")
+            for i in range(1, matches + 1):
+                log._append({"op": "start", "row": synthetic_row(i)})
+            began = time.perf_counter()
+            for i in range(args.ops):
+                log._append({"op": "update", "name": f"Q{matches - i}",
+                             "values": {"RedFinal": "10", "BlueFinal": str(i)}})
+            journal_ms = (time.perf_counter() - began) * 1000.0 / args.ops
+            began = time.perf_counter()
+            for i in range(args.ops):
+                log.update(f"Q{matches - i}", {"RedFinal": 20, "BlueFinal": i})
+            update_ms = (time.perf_counter() - began) * 1000.0 / args.ops
+            began = time.perf_counter()
+            log.export()
+            export_ms = (time.perf_counter() - began) * 1000.0
+            began = time.perf_counter()
+            for i in range(args.ops):
+                log.update(f"Q{matches - i}", {"RedFinal": 20, "BlueFinal": i})
+            unchanged_ms = (time.perf_counter() - began) * 1000.0 / args.ops
+            began = time.perf_counter()
+            for i in range(args.ops):
+                log.start(synthetic_row(matches + i + 1))
+            start_ms = (time.perf_counter() - began) * 1000.0 / args.ops
+            log.close()
+            began = time.perf_counter()
+            switcher.MatchLog(f"store{matches}").close()
+            reload_ms = (time.perf_counter() - began) * 1000.0
+        print(f"N={matches:<6} legacy commit {legacy_ms:8.2f} ms | journal update {journal_ms:6.3f} ms  "
+              f"commit {update_ms:6.3f} ms  unchanged commit {unchanged_ms:6.3f} ms  "
+              f"start {start_ms:6.3f} ms  reload {reload_ms:7.1f} ms | background export {export_ms:7.1f} ms")
+
+
+async def run_commit_fetch(engine, delay, switches):
+    """
+    MATCH_COMMIT whose match-detail fetch takes `delay` seconds, sent three times (re-commits),
+    followed by SHOW_MATCH switches. Returns (switch latencies, HTTP hits, whether the row got filled).
+    """
+    api = FakeScoringAPI()
+    api.delay = delay
+    api.results[1] = match_details(1)
+    api.start()
+    samples = []
+    try:
+        async with running_switcher(engine, api=api) as (ftc, (obs,)):
+            await ftc.push("MATCH_START", shortName="Q1", number=1, field=1)
+            for _ in range(3):
+                await ftc.push("MATCH_COMMIT", shortName="Q1", number=1, field=1)
+            for i in range(switches):
+                sent = time.perf_counter()
+                await ftc.push("SHOW_MATCH", shortName=f"Q{i + 2}", number=i + 2, field=2 - i % 2)
+                arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+                samples.append((arrived - sent) * 1000.0)
+                await asyncio.sleep(0.05)
+            await asyncio.sleep(2 * delay + 0.5)
+            rows = list(switcher.get_match_log().rows)
+    finally:
+        api.stop()
+    filled = bool(rows) and rows[0]["RedFinal"] == "10"
+    return samples, api.count("detail"), filled
+
+
+async def run_schedule(engine):
+    """
+    Checks the schedule cache against the HTTP stand-in. Returns a list of (check, passed).
+    """
+    checks = []
+    api = FakeScoringAPI()
+    for number in range(1, 5):
+        api.results[number] = match_details(number)
+        api.schedule.append({"matchBrief": match_details(number)["matchBrief"]})
+    api.start()
+    switcher.SCHEDULE_REFRESH = 0.2
+    try:
+        async with running_switcher(engine, api=api) as (ftc, (obs,)):
+            await asyncio.sleep(0.5)
+            log = switcher.get_match_log()
+            await ftc.push("MATCH_START", shortName="Q1", number=1, field=1)
+            await asyncio.sleep(0.2)
+            checks.append(("MATCH_START row has teams immediately", log.rows[-1]["Red1"] == "1001"))
+
+            await ftc.push("MATCH_COMMIT", shortName="Q1", number=1, field=1)
+            await asyncio.sleep(0.5)
+            checks.append(("MATCH_COMMIT fills in the scores", log.rows[-1]["RedFinal"] == "10"))
+
+            await ftc.push("MATCH_START", shortName="Q5", number=5, field=2)
+            await asyncio.sleep(0.2)
+            started_empty = log.rows[-1]["Red1"] == ""
+            api.schedule.append({"matchBrief": match_details(5)["matchBrief"]})
+            await asyncio.sleep(0.6)
+            checks.append(("schedule refresh fills rows started before it knew the match",
+                           started_empty and log.rows[-1]["Red1"] == "1005"))
+            checks.append(("one bulk list fetch, unchanged refreshes are 304s",
+                           api.count("list", 200) == 2 and api.count("list", 304) >= 2))
+            checks.append(("one detail fetch per commit", api.count("detail") == 1))
+    finally:
+        switcher.SCHEDULE_REFRESH = 30
+        api.stop()
+    return checks
+
+
+def scene_requests(obs, after):
+    return obs.count("SetCurrentProgramScene", after) + obs.count("SetCurrentPreviewScene", after)
+
+
+async def run_preview(engine, matches):
+    """
+    Three fields and a schedule that is not round-robin. Before every SHOW_MATCH, checks whether its
+    scene is already on program or staged in preview, for the lookahead and for the fixed rotation.
+    Returns (list of (check, passed), {measurement: value}).
+    """
+    checks = []
+    rng = random.Random(7)
+    fields = [1]
+    while len(fields) < matches:
+        fields.append(rng.choice([f for f in (1, 2, 3) if f != fields[-1]] + [fields[-1]]))
+    api = FakeScoringAPI()
+    for number, field in enumerate(fields, 1):
+        api.schedule.append({"matchBrief": match_details(number, field)["matchBrief"]})
+    api.start()
+    ready = 0
+    extra_requests = 0
+    try:
+        async with running_switcher(engine, api=api, fields=3) as (ftc, (obs,)):
+            await until(lambda: running_schedule() is not None and running_schedule().next_field, 5)
+            for number, field in enumerate(fields, 1):
+                scene = f"Field {field}"
+                ready += number > 1 and scene in (obs.program_scene, obs.preview_scene)
+                mark = time.perf_counter()
+                await ftc.push("SHOW_PREVIEW", shortName=f"Q{number}", number=number, field=field)
+                await ftc.push("SHOW_MATCH", shortName=f"Q{number}", number=number, field=field)
+                expected = f"Field {fields[number]}" if number < len(fields) else None
+                await until(lambda: obs.program_scene == scene and expected in (None, scene, obs.preview_scene), 5)
+                await asyncio.sleep(0.05)
+                extra_requests += max(0, scene_requests(obs, mark) - 2)
+            await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+            await until(lambda: obs.program_scene == "Field 1", 5)
+            await asyncio.sleep(0.05)
+            mark = time.perf_counter()
+            await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+            await asyncio.sleep(0.3)
+            repeat_requests = scene_requests(obs, mark)
+    finally:
+        api.stop()
+    rotation = sum(1 for current, following in zip(fields, fields[1:])
+                   if following in (current, current % 3 + 1))
+    results = {"lookahead": ready, "rotation": rotation, "switches": len(fields) - 1}
+    checks.append((f"next match already on program or preview ({ready}/{len(fields) - 1}, "
+                   f"fixed rotation {rotation})", ready == len(fields) - 1))
+    checks.append(("at most program + preview per match", extra_requests == 0))
+    checks.append(("staged preview is not sent again", repeat_requests == 0))
+    return checks, results
+
+
+class ExportReader(threading.Thread):
+    """
+    Reads the export files over and over, like an OBS text source or an upload script would, and
+    counts reads that found a file cut short.
+    """
+
+    def __init__(self, event_code):
+        super().__init__(daemon=True)
+        self.paths = {name: exporter.path(event_code) for name, exporter in switcher.EXPORTERS.items()}
+        self.reads = 0
+        self.torn = 0
+        self.stopped = False
+
+    def complete(self, name, text):
+        if name == "json":
+            json.loads(text)
+            return True
+        ending = {"txt": "-\n", "csv": "\r\n", "md": "|\n"}[name]
+        return text.endswith(ending)
+
+    def run(self):
+        while not self.stopped:
+            for name, path in self.paths.items():
+                try:
+                    with open(path, 'r', encoding='utf-8', newline='') as f:
+                        text = f.read()
+                except FileNotFoundError:
+                    continue
+                self.reads += 1
+                try:
+                    self.torn += not self.complete(name, text)
+                except ValueError:
+                    self.torn += 1
+            time.sleep(0.005)
+
+
+async def run_export(engine, rows, switches):
+    """
+    A match log of `rows` matches exported in all four formats while switches go on. Measures
+    SHOW_MATCH -> SetCurrentProgramScene with no exports running, then with a MATCH_START (and so
+    a full re-export) next to every switch. Returns (list of (check, passed), {measurement: value}).
+    """
+    with in_temp_dir():
+        checks = []
+        results = {}
+        with open("bench_matchlog.jsonl", "w") as f:
+            for i in range(1, rows + 1):
+                f.write(json.dumps({"op": "start", "row": dict(synthetic_row(i), RedFinal="10", BlueFinal="5")}) + "\n")
+        switcher.EXPORT_FORMATS = "txt,csv,json,md"
+        switcher.EXPORT_DEBOUNCE = 0.05
+        switcher.METRICS_PORT = free_port()  # turns span recording on
+        reader = ExportReader("bench")
+        try:
+            async with running_switcher(engine) as (ftc, (obs,)):
+                await until(lambda: os.path.isfile("bench_matches.json"), 10)
+                reader.start()
+                for phase in ("idle", "export"):
+                    samples = []
+                    for i in range(switches):
+                        number = rows + i + 1 + (switches if phase == "export" else 0)
+                        field = 1 + i % 2
+                        if phase == "export":
+                            await ftc.push("MATCH_START", shortName=f"Q{number}", number=number, field=field)
+                            await asyncio.sleep(0.06)  # the debounce expires and the export is running
+                        sent = time.perf_counter()
+                        await ftc.push("SHOW_MATCH", shortName=f"Q{number}", number=number, field=field)
+                        arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+                        samples.append((arrived - sent) * 1000.0)
+                        await asyncio.sleep(0.05)
+                    results[phase] = samples
+                results["export_span"] = span_stats(switcher.latency_metrics, "export")
+                await asyncio.sleep(0.2)
+                exports_before = span_stats(switcher.latency_metrics, "export")["count"]
+                for i in range(10):
+                    number = rows + 2 * switches + i + 1
+                    await ftc.push("MATCH_START", shortName=f"Q{number}", number=number, field=1)
+                await asyncio.sleep(0.5)
+                results["burst_exports"] = span_stats(switcher.latency_metrics, "export")["count"] - exports_before
+        finally:
+            reader.stopped = True
+            switcher.EXPORT_FORMATS = "txt,csv"
+            switcher.EXPORT_DEBOUNCE = 0.5
+            switcher.METRICS_PORT = 0
+        reader.join(5)
+        with open("bench_matches.json") as f:
+            exported = len(json.load(f)["matches"])
+        results.update(reads=reader.reads, torn=reader.torn)
+        checks.append((f"readers never see a partial file ({reader.reads} reads)", reader.torn == 0 and reader.reads > 0))
+        checks.append((f"10 match starts in a burst -> {results['burst_exports']} export(s)",
+                       1 <= results["burst_exports"] <= 2))
+        checks.append(("files hold every row after shutdown", exported == rows + switches + 10))
+        checks.append(("all four formats written", all(os.path.isfile(path) for path in reader.paths.values())))
+        checks.append(("switch p99 during exports stays within 20 ms of idle",
+                       percentile(results["export"], 99) < percentile(results["idle"], 99) + 20))
+        return checks, results
+
+
+async def run_multievent(engine, events, matches):
+    """
+    `events` event sessions in one switcher process, each with its own stand-in scorekeeper and OBS
+    and all sharing one scoring API. Every event plays `matches` matches at the same time as the
+    others. Returns (list of (check, passed), {measurement: value}).
+    """
+    checks = []
+    results = {}
+    ftcs = [FakeScorekeeper() for _ in range(events)]
+    obss = [FakeOBS() for _ in range(events)]
+    for server in ftcs + obss:
+        await server.start()
+    api = FakeScoringAPI()
+    for number in range(1, matches + 1):
+        api.results[number] = match_details(number)
+    api.start()
+    configure_switcher([obss[0].port], ftcs[0].port, engine, api_port=api.port)
+    entries = [{"name": f"div{i + 1}", "FTCSERVER_NAME": f"127.0.0.1:{ftc.port}", "FTCSERVER_EVENTCODE": f"div{i + 1}",
+                "OBS_WEBSOCKET_PORT": obs.port, "OBS_SCENENAME_FIELD1": f"Div{i + 1} Field 1",
+                "OBS_SCENENAME_FIELD2": f"Div{i + 1} Field 2"}
+               for i, (ftc, obs) in enumerate(zip(ftcs, obss))]
+    with open("events.json", "w") as f:
+        json.dump({"events": entries}, f)
+    switcher.EVENTS_FILE = os.path.abspath("events.json")
+    switcher.METRICS_PORT = free_port()
+    samples = []
+
+    async def play(i, number):
+        ftc, obs = ftcs[i], obss[i]
+        field = 1 + (number + i) % 2
+        await ftc.push("SHOW_PREVIEW", shortName=f"Q{number}", number=number, field=field)
+        sent = time.perf_counter()
+        await ftc.push("SHOW_MATCH", shortName=f"Q{number}", number=number, field=field)
+        await ftc.push("MATCH_START", shortName=f"Q{number}", number=number, field=field)
+        arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+        samples.append((arrived - sent) * 1000.0)
+        await ftc.push("MATCH_COMMIT", shortName=f"Q{number}", number=number, field=field)
+
+    engine_thread = threading.Thread(target=switcher.main, daemon=True)
+    began = time.perf_counter()
+    engine_thread.start()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(ftc.connected.wait() for ftc in ftcs)), 30)
+        results["startup_ms"] = (time.perf_counter() - began) * 1000.0
+        results["threads"] = threading.active_count()
+        began = time.perf_counter()
+        for number in range(1, matches + 1):
+            await asyncio.gather(*(play(i, number) for i in range(events)))
+            await asyncio.sleep(0.02)
+        results["seconds"] = time.perf_counter() - began
+
+        def scored():
+            return all(len(switcher.get_match_log(f"div{i + 1}").rows) == matches
+                       and not switcher.get_match_log(f"div{i + 1}").names_without_scores() for i in range(events))
+
+        complete = await until(scored, 30)
+        url = f"http://127.0.0.1:{switcher.METRICS_PORT}/metrics"
+        text = (await asyncio.to_thread(lambda: urllib.request.urlopen(url, timeout=5).read())).decode()
+    finally:
+        switcher.shutdown_event.set()
+        await asyncio.to_thread(engine_thread.join, 10)
+        switcher.EVENTS_FILE = ""
+        switcher.METRICS_PORT = 0
+        api.stop()
+        for server in ftcs + obss:
+            await server.stop()
+    results["samples"] = samples
+    own_scenes = all(data.get("sceneName", "").startswith(f"Div{i + 1} ")
+                     for i, obs in enumerate(obss) for _, name, data in obs.requests if name.startswith("SetCurrent"))
+    switched = sum(1 for line in text.splitlines()
+                   if line.startswith("ftc_switcher_session_events_total") and 'kind="switches"' in line
+                   and int(line.split()[-1]) == 2 * matches)  # SHOW_PREVIEW and SHOW_MATCH
+    checks.append((f"{events} sessions switch only their own OBS", own_scenes and len(samples) == events * matches))
+    checks.append(("every event's match log complete, scores fetched through the shared pool",
+                   complete and api.count("detail") == events * matches))
+    checks.append(("metrics count each session's switches", switched == events))
+    checks.append(("sessions stop together on shutdown", not engine_thread.is_alive()))
+    return checks, results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_metrics(engine, switches):
+    """
+    Runs switches and a commit with metrics on, then scrapes the endpoint.
+    Returns (list of (check, passed), summary line, bench-side switch latencies in ms).
+    """
+    checks = []
+    samples = []
+    api = FakeScoringAPI()
+    api.results[1] = match_details(1)
+    api.start()
+    switcher.METRICS_PORT = free_port()
+    try:
+        async with running_switcher(engine, api=api) as (ftc, (obs,)):
+            await ftc.push("MATCH_START", shortName="Q1", number=1, field=1)
+            await ftc.push("MATCH_COMMIT", shortName="Q1", number=1, field=1)
+            for i in range(switches):
+                sent = time.perf_counter()
+                await ftc.push("SHOW_MATCH", shortName=f"Q{i + 2}", number=i + 2, field=2 - i % 2)
+                arrived = await asyncio.wait_for(obs.wait_for("SetCurrentPreviewScene", sent), 10)
+                samples.append((arrived - sent) * 1000.0)
+                await asyncio.sleep(0.02)
+            await asyncio.sleep(0.3)
+            url = f"http://127.0.0.1:{switcher.METRICS_PORT}/metrics"
+            text = (await asyncio.to_thread(lambda: urllib.request.urlopen(url, timeout=5).read())).decode()
+            summary = switcher.latency_metrics.summary_line()
+    finally:
+        switcher.METRICS_PORT = 0
+        api.stop()
+    counts = {line.split('"')[1]: int(line.split()[-1]) for line in text.splitlines()
+              if line.startswith("ftc_switcher_span_seconds_count")}
+    checks.append(("endpoint serves every pipeline span",
+                   all(span in counts for span in ("ftc_queue", "parse", "dispatch", "obs_queue", "obs_request",
+                                                   "switch_total", "commit_fetch", "matchlog_start",
+                                                   "matchlog_commit"))))
+    checks.append(("one switch_total sample per switch", counts.get("switch_total") == switches))
+    checks.append(("recording stops with the switcher", not switcher.metrics_enabled))
+    return checks, summary, samples
+
+
+def running_schedule():
+    """
+    The match schedule of the (single) event session the switcher is running.
+    """
+    return switcher.event_sessions[0].schedule if switcher.event_sessions else None
+
+
+async def until(predicate, timeout):
+    """
+    Polls predicate() until it is true or `timeout` seconds pass. Returns its last value.
+    """
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    return predicate()
+
+
+async def run_burst(engine, bursts, obs_delay, status_delay):
+    """
+    Scorekeeper bursts against an OBS that takes `obs_delay` per request, then a MATCH_START whose
+    GetStreamStatus takes `status_delay` right before a SHOW_MATCH.
+    Returns (list of (check, passed), {measurement: value}).
+    """
+    checks = []
+    results = {}
+    switcher.METRICS_SUMMARY_INTERVAL = 3600  # record counters, no summary lines
+    try:
+        async with running_switcher(engine) as (ftc, (obs,)):
+            obs.response_delay = obs_delay
+            mark = time.perf_counter()
+            for i in range(bursts):
+                field = 1 + i % 2
+                await ftc.push("SHOW_PREVIEW", shortName=f"Q{i + 1}", number=i + 1, field=field)
+                await ftc.push("SHOW_MATCH", shortName=f"Q{i + 1}", number=i + 1, field=field)
+            last_scene = f"Field {1 + (bursts - 1) % 2}"
+            settled = await until(lambda: obs.program_scene == last_scene
+                                  and obs.count("SetCurrentProgramScene", mark) > 0, 30)
+            results["burst_ms"] = (time.perf_counter() - mark) * 1000.0
+            await asyncio.sleep(3 * obs_delay + 0.2)
+            results["burst_switches"] = obs.count("SetCurrentProgramScene", mark)
+            checks.append(("burst ends on the last field", settled and obs.program_scene == last_scene))
+            checks.append((f"superseded switches collapsed ({results['burst_switches']} OBS switches "
+                           f"for {2 * bursts} frames)", results["burst_switches"] <= 3))
+
+            obs.response_delay = 0.0
+            obs.request_delays["GetStreamStatus"] = status_delay
+            await ftc.push("SHOW_MATCH", shortName="Q100", number=100, field=1)
+            await until(lambda: obs.program_scene == "Field 1", 10)
+            sent = time.perf_counter()
+            await ftc.push("MATCH_START", shortName="Q101", number=101, field=2)
+            await ftc.push("SHOW_MATCH", shortName="Q101", number=101, field=2)
+            arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+            results["switch_after_start_ms"] = (arrived - sent) * 1000.0
+            checks.append(("slow MATCH_START lookup does not hold up the next switch",
+                           results["switch_after_start_ms"] < status_delay * 1000.0 / 4))
+            logged = await until(lambda: any(row["MatchName"] == "Q101" for row in switcher.get_match_log().rows),
+                                 status_delay + 5)
+            checks.append(("MATCH_START row still logged", logged))
+            counters = dict(switcher.latency_metrics.counters)
+            results["coalesced"] = counters.get("switch_coalesced", 0)
+            checks.append(("coalesced switches are counted", results["coalesced"] > 0))
+    finally:
+        switcher.METRICS_SUMMARY_INTERVAL = 0
+    return checks, results
+
+
+async def run_clock(engine, matches):
+    """
+    MATCH_START chapter times against the true stream time of a stand-in OBS that answers every
+    request 200 ms late, then across a stream restart and a restart missed while OBS was away.
+    Returns (list of (check, passed), chapter time errors in ms).
+    """
+    checks = []
+    errors = []
+    stamped = {}  # shortName -> outputDuration the row was stamped with
+    record_match_start = switcher.record_match_start
+
+    def capture(session, shortName, outputDuration):
+        stamped[shortName] = outputDuration
+        record_match_start(session, shortName, outputDuration)
+
+    switcher.record_match_start = capture
+    try:
+        async with running_switcher(engine) as (ftc, (obs,)):
+            async def start_match(number):
+                sent = time.perf_counter()
+                truth = (sent - obs.stream_started) * 1000.0 if obs.stream_started is not None else 0.0
+                await ftc.push("MATCH_START", shortName=f"Q{number}", number=number, field=1)
+                await until(lambda: f"Q{number}" in stamped, 10)
+                return stamped.get(f"Q{number}", float("inf")) - truth
+
+            await until(lambda: obs.count("GetStreamStatus") > 0, 10)  # synced once when OBS connected
+            await asyncio.sleep(0.1)
+            obs.response_delay = 0.2
+            mark = time.perf_counter()
+            for number in range(1, matches + 1):
+                errors.append(await start_match(number))
+                await asyncio.sleep(0.01)
+            checks.append(("no OBS request per MATCH_START", obs.count("GetStreamStatus", mark) == 0))
+            checks.append(("chapter times within 100 ms of the stream time", max(map(abs, errors)) < 100))
+            obs.response_delay = 0.0
+
+            await obs.stop_stream()
+            await asyncio.sleep(0.1)
+            await start_match(matches + 1)
+            checks.append(("MATCH_START while the stream is stopped is 00:00:00", stamped[f"Q{matches + 1}"] == 0))
+            await obs.start_stream()
+            await asyncio.sleep(0.5)
+            checks.append(("a restarted stream is timed from its own start", abs(await start_match(matches + 2)) < 100))
+
+            await obs.kill()
+            obs.stream_started = time.perf_counter() - 5.0  # restarted by the operator while the connection was down
+            mark = time.perf_counter()
+            await obs.start()
+            resynced = await until(lambda: obs.count("GetStreamStatus", mark) > 0, 10)
+            await asyncio.sleep(0.1)
+            checks.append(("a restart missed while disconnected is picked up on reconnect",
+                           resynced and abs(await start_match(matches + 3)) < 100))
+    finally:
+        switcher.record_match_start = record_match_start
+    return checks, errors
+
+
+async def run_status(engine, matches, switches):
+    """
+    Plays matches with the status board sampling and checks its snapshot against the stand-ins,
+    that a sample needs none of the engine's locks and that an OBS outage shows up. Then times
+    switches with the board stopped, and with it sampling every 20 ms under a 60 Hz reader.
+    Returns (list of (check, passed), {measurement: value}).
+    """
+    checks = []
+    results = {}
+    board = switcher.status_board
+    switcher.STATUS_REFRESH = 0.02
+    switcher.HEARTBEAT_INTERVAL = 0.2
+    switcher.HEARTBEAT_TIMEOUT = 0.6
+    board.start()  # before the switcher starts, so latency recording is turned on
+    try:
+        async with running_switcher(engine) as (ftc, (obs,)):
+            def latest_session():
+                snapshot = board.latest
+                return snapshot["sessions"][0] if snapshot and snapshot["sessions"] else None
+
+            shown = {}
+            for number in range(1, matches + 1):
+                field = str(1 + number % 2)
+                mark = time.perf_counter()
+                await ftc.push("SHOW_MATCH", shortName=f"Q{number}", number=number, field=int(field))
+                await ftc.push("MATCH_START", shortName=f"Q{number}", number=number, field=int(field))
+                await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", mark), 10)
+                shown[field] = f"Q{number}"
+            await until(lambda: (latest_session() or {}).get("frames") == 2 * matches
+                        and latest_session()["unwritten_starts"] == 0, 5)
+            await asyncio.sleep(0.1)
+            session = latest_session()
+            target = session["targets"][0]
+            checks.append(("current match is the last MATCH_START",
+                           (session["current"] or {}).get("name") == f"Q{matches}"))
+            checks.append(("last match shown on every field", session["fields"] == shown))
+            checks.append(("OBS program and preview as the stand-in has them",
+                           (target["program"], target["preview"]) == (obs.program_scene, obs.preview_scene)))
+            checks.append(("queues drained, no bookkeeping left", session["recv_queue"] == session["bookkeeping_queue"]
+                           == session["unwritten_starts"] == session["pending_commits"] == 0))
+            checks.append(("one switch latency sample per switch", (board.latest["latency"] or {}).get("n") == matches))
+
+            live = switcher.event_sessions[0]
+            locks = [switcher.latency_metrics.lock, switcher.connection_health.lock, live.state.condition,
+                     live.recv_queue.mutex] + [h.lock for h in list(switcher.latency_metrics.histograms.values())]
+            for lock in locks:
+                lock.acquire()
+            try:
+                sampled = await asyncio.wait_for(asyncio.to_thread(board.sample), 2)
+            except asyncio.TimeoutError:
+                sampled = None
+            finally:
+                for lock in locks:
+                    lock.release()
+            checks.append((f"a sample takes none of the engine's locks ({len(locks)} held)", sampled is not None))
+            results["sample_us"] = timeit.timeit(board.sample, number=2000) / 2000 * 1e6
+            results["format_us"] = timeit.timeit(lambda: switcher.format_status(board.latest), number=2000) / 2000 * 1e6
+
+            await obs.kill()
+            checks.append(("OBS outage shown", await until(lambda: not latest_session()["targets"]
+                                                           or not latest_session()["targets"][0]["connected"], 5)))
+            await obs.start()
+            checks.append(("OBS recovery shown", await until(lambda: latest_session()["targets"][0]["connected"]
+                                                             and sum(board.latest["outages"].values()) >= 1, 10)))
+            await until(lambda: obs.program_scene != "", 5)
+
+            async def time_switches(first):
+                samples = []
+                for number in range(first, first + switches):
+                    sent = time.perf_counter()
+                    await ftc.push("SHOW_MATCH", shortName=f"Q{number}", number=number, field=1 + number % 2)
+                    arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 10)
+                    samples.append((arrived - sent) * 1000.0)
+                    await asyncio.sleep(0.01)
+                return samples
+
+            board.stop()
+            results["off"] = await time_switches(matches + 1)  # fields keep alternating
+            board.start()
+            reading = threading.Event()
+            redraws = []
+
+            def redraw():
+                while not reading.wait(1 / 60.0):
+                    redraws.append(switcher.format_status(board.latest))
+
+            reader = threading.Thread(target=redraw, daemon=True)
+            reader.start()
+            results["on"] = await time_switches(matches + 1 + switches)
+            reading.set()
+            reader.join()
+            results["redraws"] = len(redraws)
+    finally:
+        board.stop()
+        switcher.STATUS_REFRESH = 0.5
+        switcher.HEARTBEAT_INTERVAL = 2
+        switcher.HEARTBEAT_TIMEOUT = 5
+    return checks, results
+
+
+async def run_reconnect_without_api(engine):
+    """
+    The scorekeeper stream reconnects while the scoring HTTP API accepts connections but never
+    answers, so the schedule has not loaded. The resync must not hold up the next switch.
+    Returns (list of (check, passed), ms from SHOW_MATCH to the switch).
+    """
+    checks = []
+    api = FakeScoringAPI()  # listening but not serving: every request hangs until its read timeout
+    try:
+        async with running_switcher(engine, api=api) as (ftc, (obs,)):
+            await ftc.kill()
+            ftc.connected.clear()
+            await ftc.start()
+            checks.append(("FTC stream reconnects", await until(ftc.connected.is_set, 10)))
+            await asyncio.sleep(0.2)
+            sent = time.perf_counter()
+            await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=2)
+            arrived = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", sent), 15)
+            switch_ms = (arrived - sent) * 1000.0
+            checks.append((f"switch right after the reconnect does not wait for the scoring API "
+                           f"({switch_ms:.0f} ms)", switch_ms < 500))
+    finally:
+        api.server.server_close()
+    return checks, switch_ms
+
+
+async def run_chaos(engine, outage):
+    """
+    Kills and hangs the stand-in scorekeeper and OBS under a running switcher and checks that it
+    reconnects and catches up. Returns (list of (check, passed), connection_health summary).
+    """
+    checks = []
+    api = FakeScoringAPI()
+    for number in range(1, 4):
+        api.results[number] = match_details(number)
+        api.schedule.append({"matchBrief": match_details(number)["matchBrief"]})
+    api.start()
+    switcher.HEARTBEAT_INTERVAL = 0.2
+    switcher.HEARTBEAT_TIMEOUT = 0.6
+    try:
+        async with running_switcher(engine, api=api) as (ftc, (obs,)):
+            await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+            await ftc.push("MATCH_START", shortName="Q1", number=1, field=1)
+            await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", 0), 10)
+            await asyncio.sleep(0.3)
+            log = switcher.get_match_log()
+
+            # Scorekeeper crashes; Q1 is committed while it is down, so the MATCH_COMMIT is lost.
+            await ftc.kill()
+            await asyncio.sleep(outage)
+            ftc.connected.clear()
+            await ftc.start()
+            checks.append(("FTC stream reconnects after the scorekeeper restarts",
+                           await until(ftc.connected.is_set, 10)))
+            mark = time.perf_counter()
+            await ftc.push("SHOW_MATCH", shortName="Q2", number=2, field=2)
+            await until(lambda: obs.count("SetCurrentProgramScene", mark) > 0, 5)
+            checks.append(("switching works after the FTC reconnect", obs.program_scene == "Field 2"))
+            checks.append(("scores of a commit missed during the outage are fetched",
+                           await until(lambda: log.rows[0]["RedFinal"] == "10", 5)))
+
+            # Scorekeeper stops talking without closing the connection.
+            connections = ftc.connections
+            ftc.hang()
+            checks.append(("silent FTC stream is detected and reconnected",
+                           await until(lambda: ftc.connections > connections, 5)))
+
+            # OBS crashes, a SHOW_MATCH arrives while it is away, OBS comes back on its default scene.
+            await obs.kill()
+            await asyncio.sleep(outage / 2)
+            await ftc.push("SHOW_MATCH", shortName="Q3", number=3, field=1)
+            await asyncio.sleep(outage / 2)
+            obs.program_scene = "Starting Soon"
+            await obs.start()
+            checks.append(("switch requested while OBS was down is made once it is back",
+                           await until(lambda: obs.program_scene == "Field 1", 10)))
+
+            # OBS stops answering without closing the connection.
+            connections = obs.connections
+            obs.hang()
+            checks.append(("unresponsive OBS is detected and reconnected",
+                           await until(lambda: obs.connections > connections, 5)))
+            mark = time.perf_counter()
+            await asyncio.sleep(0.3)
+            await ftc.push("SHOW_MATCH", shortName="Q4", number=4, field=2)
+            checks.append(("switching works after the OBS reconnect",
+                           await until(lambda: obs.program_scene == "Field 2", 5)))
+            recovery = switcher.connection_health.summary()
+    finally:
+        switcher.HEARTBEAT_INTERVAL = 2
+        switcher.HEARTBEAT_TIMEOUT = 5
+        api.stop()
+    return checks, recovery
+
+
+async def run_warm_restart(engine):
+    """
+    A MATCH_COMMIT that overtakes its MATCH_START, one whose MATCH_START never comes, a restart
+    from a state file left by a crash between a MATCH_START and its match log row, and two restarts
+    in a row after writes torn in both journals. Returns (list of (check, passed), state load ms).
+    """
+    with in_temp_dir():
+        checks = []
+        api = FakeScoringAPI()
+        for number in range(1, 8):
+            api.results[number] = match_details(number)
+            api.schedule.append({"matchBrief": match_details(number)["matchBrief"]})
+        api.start()
+        try:
+            async with running_switcher(engine, api=api) as (ftc, (obs,)):
+                session = switcher.event_sessions[0]
+                await ftc.push("MATCH_COMMIT", shortName="Q1", number=1, field=1)
+                held = await until(lambda: (session.state.commits.get("Q1") or {}).get("values"), 5)
+                await ftc.push("MATCH_START", shortName="Q1", number=1, field=1)
+                log = switcher.get_match_log()
+                checks.append(("a result that arrives before its MATCH_START is held, then applied",
+                               bool(held) and await until(lambda: log.rows and log.rows[0]["RedFinal"] == "10", 5)))
+                checks.append(("the applied commit leaves the saved state",
+                               await until(lambda: not session.state.commits, 5)))
+                await ftc.push("MATCH_COMMIT", shortName="Q6", number=6, field=2)  # its MATCH_START was missed
+                await until(lambda: (session.state.commits.get("Q6") or {}).get("values"), 5)
+                await ftc.push("MATCH_START", shortName="Q7", number=7, field=1)
+                checks.append(("a held result is dropped once another match starts",
+                               await until(lambda: log.count("Q7") and not session.state.commits, 5)
+                               and not log.count("Q6")))
+
+            # What a crash right after Q2's MATCH_START leaves behind: the start is only in the state.
+            started = time.time() - 30
+            with open("bench_state.jsonl", "a") as f:
+                current = {"name": "Q2", "number": 2, "field": "2", "at": started}
+                f.write(json.dumps({"key": "current", "value": current}) + "\n")
+                f.write(json.dumps({"key": "starts", "name": "Q2", "value": {"at": started, "rows": 0}}) + "\n")
+                f.write(json.dumps({"key": "commits", "name": "Q2", "value": {"number": 2, "values": None}}) + "\n")
+                f.write('{"key": "fields", "name": "2", "val')  # torn by the crash
+            FakeOBS.output_duration = 3600 * 1000
+            async with running_switcher(engine, api=api) as (ftc, (obs,)):
+                session = switcher.event_sessions[0]
+                log = switcher.get_match_log()
+                checks.append(("state with a torn last line is restored",
+                               session.state.restored and session.state.current["name"] == "Q2"))
+                replayed = await until(lambda: log.count("Q2") == 1 and log.rows[-1]["RedFinal"] == "20", 5)
+                checks.append(("MATCH_START that never reached the match log is replayed, and its commit fetched",
+                               replayed))
+                checks.append(("replayed row is stamped with the stream time it arrived at",
+                               replayed and log.rows[-1]["TimeStamp"] in ("00:59:29", "00:59:30", "00:59:31")))
+                checks.append(("nothing is left pending", await until(lambda: not session.state.starts
+                                                                       and not session.state.commits, 5)))
+                load_ms = session.state.load_ms
+
+            # Torn appends in both journals; the first records after the restart must survive the next one.
+            for path, fragment in (("bench_state.jsonl", '{"key": "offset", "val'),
+                                   ("bench_matchlog.jsonl", '{"op": "start", "row": {"Match')):
+                with open(path, "a") as f:
+                    f.write(fragment)
+            async with running_switcher(engine, api=api) as (ftc, (obs,)):
+                session = switcher.event_sessions[0]
+                await ftc.push("MATCH_COMMIT", shortName="Q5", number=5, field=2)  # held: Q5 has no row
+                await ftc.push("MATCH_START", shortName="Q4", number=4, field=1)
+                await until(lambda: (session.state.commits.get("Q5") or {}).get("values")
+                            and switcher.get_match_log().count("Q4"), 5)
+                await asyncio.sleep(3 * switcher.STATE_FSYNC_INTERVAL)
+            async with running_switcher(engine, api=api) as (ftc, (obs,)):
+                session = switcher.event_sessions[0]
+                checks.append(("records appended after a torn write survive a second restart",
+                               switcher.get_match_log().count("Q4") == 1
+                               and bool((session.state.commits.get("Q5") or {}).get("values"))))
+            checks.append(("no damaged lines left in either journal",
+                           damaged_lines("bench_state.jsonl") == damaged_lines("bench_matchlog.jsonl") == 0))
+        finally:
+            FakeOBS.output_duration = 0
+            api.stop()
+        return checks, load_ms
+
+
+CRASH_CHILD = """
+import sys
+import FTC_Switcher as switcher
+api = sys.argv[1]
+switcher.match_details_url = lambda session, number: f"http://{api}/api/v1/events/{session.event_code}/matches/{number}/"
+switcher.match_list_url = lambda session: f"http://{api}/api/v1/events/{session.event_code}/matches/"
+switcher.apply_config(switcher.read_config_sources(switcher.parse_command_line(sys.argv[2:])))
+sys.exit(switcher.run_headless())
+"""
+
+
+def damaged_lines(path):
+    """
+    Lines of a JSON-lines file that do not parse, not counting a torn last line.
+    """
+    if not os.path.isfile(path):
+        return 0
+    with open(path, "r") as f:
+        complete = f.read().split("\n")[:-1]  # whatever follows the last newline is a torn write
+    damaged = 0
+    for line in complete:
+        try:
+            json.loads(line)
+        except ValueError:
+            damaged += 1
+    return damaged
+
+
+async def run_crash(engine, matches, seed):
+    """
+    Runs `FTC_Switcher.py --headless` as a child process and SIGKILLs it at random points while the
+    scorekeeper plays `matches` matches, restarting it after each kill. Returns (list of (check,
+    passed), {measurement: value}).
+    """
+    with in_temp_dir():
+        rng = random.Random(seed)
+        ftc, obs, api = FakeScorekeeper(), FakeOBS(), FakeScoringAPI()
+        await ftc.start()
+        await obs.start()
+        for number in range(1, matches + 1):
+            api.results[number] = match_details(number)
+            api.schedule.append({"matchBrief": match_details(number)["matchBrief"]})
+        api.start()
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(SWITCHER_PATH))
+        options = ["--engine", engine, "--obs-servername", "127.0.0.1", "--obs-websocket-port", str(obs.port),
+                   "--obs-scenename-field1", "Field 1", "--obs-scenename-field2", "Field 2",
+                   "--ftcserver-name", f"127.0.0.1:{ftc.port}", "--ftcserver-eventcode", "bench"]
+        results = {"kills": 0, "restart_ms": [], "damaged": 0}
+        process = None
+
+        async def spawn():
+            nonlocal process
+            began = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", CRASH_CHILD, f"127.0.0.1:{api.port}", *options, env=env,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+            await asyncio.wait_for(ftc.connected.wait(), 30)
+            results["restart_ms"].append((time.perf_counter() - began) * 1000.0)
+
+        async def push(updateType, number, field):
+            await ftc.connected.wait()
+            try:
+                await ftc.push(updateType, shortName=f"Q{number}", number=number, field=field)
+            except websockets.ConnectionClosed:
+                pass  # pushed to the killed child; the frame is lost with it
+
+        async def killer():
+            while True:
+                try:
+                    await asyncio.wait_for(finished.wait(), rng.uniform(0.05, 0.5))
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                ftc.connected.clear()
+                process.kill()
+                await process.wait()
+                results["kills"] += 1
+                results["damaged"] += damaged_lines("bench_state.jsonl") + damaged_lines("bench_matchlog.jsonl")
+                await spawn()
+
+        finished = asyncio.Event()
+        await spawn()
+        kills = asyncio.create_task(killer())
+        began = time.perf_counter()
+        try:
+            for number in range(1, matches + 1):
+                field = 1 + number % 2
+                for updateType in ("SHOW_PREVIEW", "SHOW_MATCH", "MATCH_START", "MATCH_COMMIT"):
+                    await push(updateType, number, field)
+                    await asyncio.sleep(rng.uniform(0, 0.03))
+            results["seconds"] = time.perf_counter() - began
+            finished.set()
+            await kills
+            # The last run catches up on its own (warm restart and FTC reconnect resync), then stops cleanly.
+            await asyncio.sleep(2)
+            process.send_signal(signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), 10)
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            api.stop()
+            await ftc.stop()
+            await obs.stop()
+
+        log = switcher.MatchLog("bench")
+        log.close()
+        names = [row["MatchName"] for row in log.rows]
+        results["logged"] = len(set(names))
+        checks = [
+            (f"state and match log stay readable over {results['kills']} kills (a torn last line at most)",
+             results["damaged"] == 0),
+            ("no match is logged twice", len(names) == len(set(names))),
+            ("every logged match ends up with scores", all(row["RedFinal"] for row in log.rows)),
+            (f"at most one match lost per kill ({matches - results['logged']} lost)",
+             matches - results["logged"] <= results["kills"]),
+            ("stops cleanly after the last restart", process.returncode == 0),
+        ]
+        return checks, results
+
+
+def legacy_ping_preflight(hosts, count=5):
+    """
+    The old startup check: `ping -c 5` per host, one after the other. Returns seconds, or None
+    when there is no ping binary here.
+    """
+    if shutil.which("ping") is None:
+        return None
+    began = time.perf_counter()
+    for host in hosts:
+        subprocess.run(["ping", "-n" if os.name == "nt" else "-c", str(count), host],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - began
+
+
+async def run_startup(engine, runs):
+    """
+    Times main() from its start to the first scene switch (a SHOW_MATCH is waiting on the stream),
+    and, with nothing listening on the OBS port, to main() giving up.
+    Returns (list of (check, passed), first-switch times in ms, give-up times in ms).
+    """
+    console = sys.stdout
+    ready_samples = []
+    for _ in range(runs):
+        ftc, obs = FakeScorekeeper(), FakeOBS()
+        await ftc.start()
+        await obs.start()
+        configure_switcher([obs.port], ftc.port, engine)
+        began = time.perf_counter()
+        engine_thread = threading.Thread(target=switcher.main, daemon=True)
+        engine_thread.start()
+        try:
+            await asyncio.wait_for(ftc.connected.wait(), 30)
+            await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=1)
+            switched = await asyncio.wait_for(obs.wait_for("SetCurrentProgramScene", began), 30)
+            ready_samples.append((switched - began) * 1000.0)
+        finally:
+            switcher.shutdown_event.set()
+            await asyncio.to_thread(engine_thread.join, 5)
+            await ftc.stop()
+            await obs.stop()
+    switcher.flush_logs()
+    up_log = console.getvalue()
+
+    ftc = FakeScorekeeper()
+    await ftc.start()
+    configure_switcher([free_port()], ftc.port, engine)
+    began = time.perf_counter()
+    engine_thread = threading.Thread(target=switcher.main, daemon=True)
+    engine_thread.start()
+    await asyncio.to_thread(engine_thread.join, 30)
+    gave_up = (time.perf_counter() - began) * 1000.0
+    switcher.flush_logs()
+    down_log = console.getvalue()[len(up_log):]
+    await ftc.stop()
+
+    checks = [("preflight reports OBS and FTC with an RTT",
+               "OBS main at 127.0.0.1" in up_log and "FTC scoring system at 127.0.0.1" in up_log
+               and "connect RTT" in up_log),
+              ("no reachability errors when both are up", "[ERROR] Unable" not in up_log),
+              ("OBS that is not listening is reported", "Unable to connect to OBS" in down_log
+               and "is not reachable" in down_log),
+              ("main() gives up without waiting on a ping", not engine_thread.is_alive() and gave_up < 5000)]
+    return checks, ready_samples, [gave_up]
+
+
+SWITCHER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "FTC_Switcher.py")
+
+# What each way of running the switcher has imported once it is switching scenes
+IMPORT_SETS = (
+    ("old eager imports", "import asyncio, http.server, requests, websocket, tkinter, tkinter.ttk, obswebsocket, "
+                          "FTC_Switcher"),
+    ("GUI, thread engine", "import FTC_Switcher, tkinter, tkinter.ttk, PIL.ImageTk, requests, websocket, obswebsocket"),
+    ("headless, thread", "import FTC_Switcher, requests, websocket, obswebsocket"),
+    ("headless, asyncio", "import FTC_Switcher, asyncio, requests, websockets"),
+    ("FTC_Switcher alone", "import FTC_Switcher"),
+)
+
+
+def import_cost(code):
+    """
+    Runs `code` in fresh interpreters. Returns (ms spent importing beyond a bare interpreter, from
+    -X importtime, and peak RSS in MB from a run without it, or None without /proc).
+    """
+    def run(options, statement):
+        return subprocess.run([sys.executable, *options, "-c", statement], capture_output=True, text=True,
+                              cwd=os.path.dirname(SWITCHER_PATH))
+
+    def top_level_us(statement):
+        total = 0
+        for line in run(["-X", "importtime"], statement).stderr.splitlines():
+            fields = line.split("|")
+            if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit() \
+                    and not fields[2].startswith("  "):
+                total += int(fields[1])
+        return total
+
+    # VmHWM rather than ru_maxrss, which keeps the parent's peak across fork/exec
+    out = run([], code + "\ntry:\n print([l.split()[1] for l in open('/proc/self/status') if l.startswith('VmHWM')][0])"
+                         "\nexcept OSError:\n pass").stdout.split()
+    return (top_level_us(code) - top_level_us("pass")) / 1000.0, int(out[-1]) / 1024.0 if out else None
+
+
+async def run_headless_process(engine):
+    """
+    Starts `FTC_Switcher.py --headless` configured from the environment, switches a scene, then
+    stops it with SIGTERM. Returns a list of (check, passed).
+    """
+    ftc, obs = FakeScorekeeper(), FakeOBS()
+    await ftc.start()
+    await obs.start()
+    env = dict(os.environ, FTC_SWITCHER_OBS_SERVERNAME="127.0.0.1", FTC_SWITCHER_OBS_WEBSOCKET_PORT=str(obs.port),
+               FTC_SWITCHER_OBS_SCENENAME_FIELD1="Field 1", FTC_SWITCHER_OBS_SCENENAME_FIELD2="Field 2",
+               FTC_SWITCHER_FTCSERVER_NAME=f"127.0.0.1:{ftc.port}", FTC_SWITCHER_FTCSERVER_EVENTCODE="bench")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-X", "importtime", SWITCHER_PATH, "--headless", "--engine", engine, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    try:
+        await asyncio.wait_for(ftc.connected.wait(), 30)
+        sent = time.perf_counter()
+        await ftc.push("SHOW_MATCH", shortName="Q1", number=1, field=2)
+        switched = await until(lambda: obs.program_scene == "Field 2", 10)
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        out, err = await asyncio.wait_for(process.communicate(), 10)
+        stopped = time.perf_counter() - stopping
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        await ftc.stop()
+        await obs.stop()
+    imported = {line.split("|")[2].strip() for line in err.decode().splitlines() if line.count("|") == 2}
+    thread_clients = {"obswebsocket", "websocket"}
+    return [("switches scenes configured from the environment", switched and time.perf_counter() > sent),
+            (f"SIGTERM stops it cleanly (exit {process.returncode}, {stopped:.1f} s)",
+             process.returncode == 0 and stopped < 3),
+            ("never imports tkinter or PIL", not imported & {"tkinter", "PIL", "_tkinter"}),
+            ("only loads its own engine's clients",
+             not imported & thread_clients if engine == "asyncio" else "asyncio" not in imported)]
+
+
+# ==================================================
+#               Recordings and Replay
+# ==================================================
+
+def load_recording(path):
+    """
+    Reads a RECORD_FILE recording. Returns (frames as [(t, raw frame)], match list entries,
+    {number: match details}, number of fields seen).
+    """
+    frames, schedule, results, fields = [], [], {}, 2
+    with open(path, 'r') as f:
+        for line in f:
+            entry = json.loads(line)
+            if "stream" in entry:
+                frames.append((entry["t"], entry["stream"]))
+                try:
+                    field = str(json.loads(entry["stream"]).get("payload", {}).get("field", ""))
+                except ValueError:
+                    field = ""
+                if field.isdigit():
+                    fields = max(fields, int(field))
+            elif "http" in entry:
+                parts = [part for part in entry["http"].split("/") if part]
+                if parts[-1] == "matches":
+                    schedule = entry["body"].get("matches", [])
+                elif parts[-1].isdigit():
+                    results[int(parts[-1])] = entry["body"]
+    frames.sort(key=lambda frame: frame[0])
+    return frames, schedule, results, fields
+
+
+def synthetic_event_day(path, matches, fields, cycle=420.0):
+    """
+    Writes a recording of a made-up event day: four practice matches, `matches` qualification
+    matches taking turns on `fields` fields (each field runs a match every `cycle` seconds) and a
+    best-of-three final, plus the scoring API answers for the match list and every qualification.
+    """
+    day_start = 1741420800.0
+    entries = [{"t": day_start, "http": "/api/v1/events/bench/matches/",
+                "body": {"matches": [{"matchBrief": match_details(i, 1 + (i - 1) % fields)["matchBrief"]}
+                                     for i in range(1, matches + 1)]}}]
+    schedule = [(f"T-{i}", i, 1 + (i - 1) % fields) for i in range(1, 5)]
+    schedule += [(f"Q{i}", i, 1 + (i - 1) % fields) for i in range(1, matches + 1)]
+    schedule += [(f"F-{i}", i, 1) for i in range(1, 4)]
+    for slot, (shortName, number, field) in enumerate(schedule):
+        start = day_start + 600 + slot * cycle / fields
+        timeline = [(-60, "MATCH_LOAD"), (-45, "SHOW_PREVIEW"), (-20, "SHOW_MATCH"), (0, "MATCH_START"),
+                    (240, "MATCH_COMMIT"), (300, "MATCH_POST")]
+        for offset, updateType in timeline:
+            frame = {"updateType": updateType, "updateTime": int((start + offset) * 1000),
+                     "payload": {"number": number, "shortName": shortName, "field": field}}
+            entries.append({"t": start + offset, "stream": json.dumps(frame)})
+        if shortName.startswith("Q"):
+            entries.append({"t": start + 241, "http": f"/api/v1/events/bench/matches/{number}/",
+                            "body": match_details(number, field)})
+    entries.sort(key=lambda entry: entry["t"])
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+
+def span_stats(metrics, span):
+    histogram = metrics.histograms.get(span)
+    if histogram is None:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "sum": 0.0}
+    return {"count": histogram.count, "sum": histogram.sum * 1000.0,
+            **{f"p{pct}": histogram.percentile(pct) * 1000.0 for pct in (50, 95, 99)}}
+
+
+async def run_replay(engine, recording, speed):
+    """
+    Replays a recording at `speed` times real time (0 = as fast as the switcher takes it) against
+    the stand-ins and returns throughput, the switcher's own span statistics and the CSV/TXT cost.
+    """
+    frames, schedule, results, fields = recording
+    api = FakeScoringAPI()
+    api.schedule = schedule
+    api.results = results
+    api.start()
+    switcher.METRICS_PORT = free_port()  # turns span recording on
+    try:
+        async with running_switcher(engine, api=api, fields=fields) as (ftc, (obs,)):
+            await until(lambda: running_schedule() is not None and running_schedule().matches, 5)
+            began = time.perf_counter()
+            first = frames[0][0]
+            for t, frame in frames:
+                if speed:
+                    delay = began + (t - first) / speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ftc.push_raw(frame)
+            pushed = time.perf_counter()
+
+            def parsed():
+                return span_stats(switcher.latency_metrics, "parse")["count"] >= len(frames) + ftc.pongs
+
+            await until(parsed, 300)
+            handled = time.perf_counter()
+            log = switcher.get_match_log()
+            qualifications = [name for name in log.index if name.startswith("Q")]
+            complete = await until(lambda: not [name for name in log.names_without_scores() if name.startswith("Q")], 30)
+            stats = {span: span_stats(switcher.latency_metrics, span)
+                     for span in ("switch_total", "ftc_queue", "matchlog_start", "matchlog_commit")}
+            stats.update(frames=len(frames), seconds=handled - began, lag=handled - pushed, rows=len(log.rows),
+                         qualifications=len(qualifications), complete=complete and bool(qualifications),
+                         export_bytes=export_size(log))
+    finally:
+        switcher.METRICS_PORT = 0
+        api.stop()
+    return stats
+
+
+def export_size(log):
+    log.export()
+    return sum(os.path.getsize(exporter.path(log.event_code)) for exporter in log.exports.exporters)
+
+
+def print_replay(engine, label, stats):
+    switch = stats["switch_total"]
+    start, commit = stats["matchlog_start"], stats["matchlog_commit"]
+    print(f"{engine:<8} {label}: {stats['frames']} frames in {stats['seconds']:.2f} s -> "
+          f"{stats['frames'] / stats['seconds']:.0f} msg/s; "
+          f"last frame handled {stats['lag'] * 1000:.0f} ms after it was sent")
+    print(f"{'':<8} switch_total p50/p95/p99 {switch['p50']:.2f}/{switch['p95']:.2f}/{switch['p99']:.2f} ms "
+          f"over {switch['count']} switches; ftc_queue p99 {stats['ftc_queue']['p99']:.2f} ms")
+    print(f"{'':<8} exports: {stats['rows']} rows, {stats['export_bytes']} bytes; match log start p50/p99 "
+          f"{start['p50']:.2f}/{start['p99']:.2f} ms, commit p50/p99 {commit['p50']:.2f}/{commit['p99']:.2f} ms, "
+          f"{start['sum'] + commit['sum']:.0f} ms of journal I/O for the day")
+
+
+def replay_and_report(recording, speeds, engines):
+    checks = {}
+    for speed in speeds:
+        label = f"{speed:g}x" if speed else "max speed"
+        for engine, stats in run_engines(lambda engine: run_replay(engine, recording, speed), engines).items():
+            print_replay(engine, label, stats)
+            checks.setdefault(engine, []).append(
+                (f"{label}: every qualification match logged with scores", stats["complete"]))
+    report_checks(checks)
+
+
+def legacy_parse_ftc_message(msg):
+    """
+    parse_ftc_message before FTCMessage: every frame is json.loads'ed into a dict and logged.
+    """
+    if msg == "pong":
+        return None
+    try:
+        message_obj = json.loads(msg)
+    except Exception:
+        switcher.WriteLog(f"Error converting message to JSON: {msg}", level="error")
+        return None
+    switcher.WriteLog("Received message: %r", message_obj, level="debug")
+    updateType = message_obj.get("updateType")
+    payload = message_obj.get("payload", {})
+    shortName = payload.get("shortName", "")
+    field = str(payload.get("field", ""))
+    switcher.WriteLog("updateType: %s, shortName: %s, field: %s", updateType, shortName, field)
+    return updateType, payload, shortName, field
+
+
+def legacy_dispatch(lookahead, msg):
+    parsed = legacy_parse_ftc_message(msg)
+    if parsed is not None:
+        updateType, payload, shortName, field = parsed
+        if updateType in ["SHOW_PREVIEW", "SHOW_MATCH"] and not shortName.startswith("F-"):
+            lookahead.routes(field, shortName)
+
+
+def fast_dispatch(lookahead, msg):
+    message = switcher.parse_ftc_message(msg)
+    if message is not None:
+        if message.updateType in ["SHOW_PREVIEW", "SHOW_MATCH"] and not message.shortName.startswith("F-"):
+            lookahead.routes(message.field, message.shortName)
+
+
+def per_message_us(function, frames, repeat):
+    """
+    Best-of-`repeat` cost of function(frame) in microseconds per frame.
+    """
+    if not frames:
+        return 0.0
+    rounds = max(1, 5000 // len(frames))
+    best = min(timeit.repeat(lambda: [function(frame) for frame in frames], number=rounds, repeat=repeat))
+    return best * 1e6 / rounds / len(frames)
+
+
+def run_decode_checks(frames):
+    checks = []
+    same = True
+    for frame in frames:
+        legacy, message = legacy_parse_ftc_message(frame), switcher.parse_ftc_message(frame)
+        if legacy is not None and legacy[0] in switcher.FTC_UPDATE_TYPES:
+            same = same and message is not None and \
+                (message.updateType, message.shortName, message.field, message.number) == \
+                (legacy[0], legacy[2], legacy[3], legacy[1].get("number"))
+        else:
+            same = same and message is None
+    checks.append(("decodes every acted-on frame like the old parser, drops the rest", same))
+    odd = '{"payload": {"shortName": "Q7", "number": 7, "field": 2},\n "updateType" :\t"SHOW_MATCH"}'
+    message = switcher.parse_ftc_message(odd)
+    checks.append(("other key orders and whitespace decode, bad frames are dropped",
+                   message is not None and (message.updateType, message.shortName, message.field, message.number)
+                   == ("SHOW_MATCH", "Q7", "2", 7)
+                   and all(switcher.parse_ftc_message(frame) is None
+                           for frame in ('{"updateType": null}', '{"payload": {}}', "not json", "[1]", "pong"))))
+    checks.append(("a payload that is not an object is dropped, unhashable updateTypes too",
+                   all(switcher.parse_ftc_message(frame) is None
+                       for frame in ('{"updateType": "SHOW_MATCH", "payload": "x"}',
+                                     '{"updateType": "MATCH_START", "payload": [1]}', '{"updateType": ["SHOW_MATCH"]}'))))
+    message = switcher.parse_ftc_message('{"updateType": "SHOW_MATCH", "payload": {"shortName": null, "field": 1}}')
+    checks.append(("shortName and field always come out as strings",
+                   message is not None and (message.shortName, message.field) == ("", "1")))
+    decoded = []
+    json_loads = switcher.json_loads
+    switcher.json_loads = lambda text: decoded.append(text) or json_loads(text)
+    try:
+        for frame in frames:
+            switcher.parse_ftc_message(frame)
+    finally:
+        switcher.json_loads = json_loads
+    checks.append((f"every frame is decoded once, with no second scan ({len(decoded)} decodes for "
+                   f"{len(frames)} frames)", len(decoded) == len(frames)))
+    return checks
+
+
+def bench_decode(args):
+    with in_temp_dir():
+        if args.recording:
+            source = args.recording
+            frames = [frame for _, frame in load_recording(os.path.join(args.cwd, args.recording))[0]]
+        else:
+            source = f"synthetic event day, {args.matches} qualifications"
+            synthetic_event_day("day.jsonl", args.matches, 2)
+            frames = [frame for _, frame in load_recording("day.jsonl")[0]]
+    switcher.import_json_decoder()
+    acted_on = [frame for frame in frames if json.loads(frame).get("updateType") in switcher.FTC_UPDATE_TYPES]
+    ignored = [frame for frame in frames if json.loads(frame).get("updateType") not in switcher.FTC_UPDATE_TYPES]
+    session = switcher.EventSession(settings={"OBS_SCENENAME_FIELD1": "Field 1", "OBS_SCENENAME_FIELD2": "Field 2",
+                                              "OBS_SCENENAME_FIELD3": "", "OBS_SCENENAME_FIELD4": "",
+                                              "ROUTING_CONFIG_FILE": ""})
+    lookahead = switcher.PreviewLookahead(session, switcher.load_field_routing(session.settings)[1])
+    fastest = switcher.json_loads
+    backends = [("json", json.loads)] + ([("orjson", fastest)] if fastest is not json.loads else [])
+    rows = [("legacy parse (json)", None, legacy_parse_ftc_message)]
+    rows += [(f"fast path ({name})", loads, switcher.parse_ftc_message) for name, loads in backends]
+    rows += [("legacy parse + dispatch", None, lambda frame: legacy_dispatch(lookahead, frame)),
+             (f"fast path + dispatch ({backends[-1][0]})", fastest, lambda frame: fast_dispatch(lookahead, frame))]
+    print(f"{len(frames)} frames ({len(acted_on)} acted on) from {source}; us per frame, best of {args.repeat}; "
+          f"log lines off (see `logging`)")
+    print(f"{'':<32}{'all':>8}{'acted on':>10}{'ignored':>9}")
+    log_level = switcher.LOG_LEVEL
+    switcher.LOG_LEVEL = "warning"
+    try:
+        for name, loads, function in rows:
+            switcher.json_loads = loads or fastest
+            costs = [per_message_us(function, subset, args.repeat) for subset in (frames, acted_on, ignored)]
+            print(f"{name:<32}" + "".join(f"{cost:{width}.2f}" for cost, width in zip(costs, (8, 10, 9))))
+        switcher.json_loads = fastest
+        with contextlib.redirect_stdout(io.StringIO()):  # the bad-frame checks log errors on purpose
+            checks = run_decode_checks(frames)
+            switcher.flush_logs()
+    finally:
+        switcher.LOG_LEVEL, switcher.json_loads = log_level, fastest
+    report_checks({"decode": checks})
+
+
+def bench_eventday(args):
+    with tempfile.TemporaryDirectory() as scratch:
+        path = args.out or os.path.join(scratch, "eventday.jsonl")
+        synthetic_event_day(path, args.matches, args.fields)
+        recording = load_recording(path)
+        print(f"synthetic event day: {args.matches} qualification matches on {args.fields} fields, "
+              f"{len(recording[0])} scorekeeper frames over {(recording[0][-1][0] - recording[0][0][0]) / 3600:.1f} h")
+        replay_and_report(recording, (args.speed, 0), args.engines)
+
+
+def bench_replay(args):
+    recording = load_recording(os.path.abspath(args.recording))
+    print(f"{args.recording}: {len(recording[0])} scorekeeper frames, {len(recording[1])} scheduled matches, "
+          f"{len(recording[2])} match results")
+    replay_and_report(recording, (args.speed,), args.engines)
+
+
+def run_engines(scenario, engines=("thread", "asyncio")):
+    """
+    Runs scenario(engine) once per engine, each in its own scratch directory with the
+    switcher's console output swallowed. Returns {engine: result}.
+    """
+    results = {}
+    for engine in engines:
+        with in_temp_dir(), contextlib.redirect_stdout(io.StringIO()):
+            results[engine] = asyncio.run(scenario(engine))
+            switcher.flush_logs()
+    return results
+
+
+def report_checks(results):
+    failed = False
+    for engine, checks in results.items():
+        for name, passed in checks:
+            failed = failed or not passed
+            print(f"{engine:<10} {'ok  ' if passed else 'FAIL'} {name}")
+    raise SystemExit(1 if failed else 0)
+
+
+def bench_metrics(args):
+    results = run_engines(lambda engine: run_metrics(engine, args.switches))
+    for engine, (_, summary, samples) in results.items():
+        print(f"{engine}: {summary}")
+        print(summarize(engine, samples) + "  (as seen by the fake OBS)")
+    calls = 200000
+    switcher.metrics_enabled = False
+    off = timeit.timeit(lambda: switcher.observe_span("bench", 0.001), number=calls)
+    switcher.metrics_enabled = True
+    on = timeit.timeit(lambda: switcher.observe_span("bench", 0.001), number=calls)
+    switcher.metrics_enabled = False
+    print(f"observe_span cost: {off / calls * 1e9:.0f} ns with metrics off, {on / calls * 1e9:.0f} ns on "
+          f"(about 8 spans per switch)")
+    report_checks({engine: checks for engine, (checks, _, _) in results.items()})
+
+
+class SlowConsole(io.StringIO):
+    """
+    A console that takes `delay` seconds per write, like a busy terminal or a Windows console.
+    """
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+def legacy_write_log(message):
+    print(f"{time.strftime('%Y%m%d %H:%M:%S')} {message}")
+
+
+def run_log_checks():
+    """
+    Level filtering, JSON-lines output and rotation of the log file. Returns a list of (check, passed).
+    """
+    checks = []
+    saved = (switcher.LOG_LEVEL, switcher.LOG_FILE, switcher.LOG_MAX_BYTES, switcher.LOG_BACKUP_COUNT)
+    with in_temp_dir(), contextlib.redirect_stdout(io.StringIO()) as console:
+        switcher.LOG_LEVEL, switcher.LOG_FILE = "info", "switcher.log"
+        switcher.LOG_MAX_BYTES, switcher.LOG_BACKUP_COUNT = 20000, 2
+        switcher.WriteLog("payload %r", {"x": 1}, level="debug")
+        switcher.WriteLog("updateType: %s, field: %s", "SHOW_MATCH", 1)
+        switcher.Write_Host("Switching to FIELD 1", stamped=True)
+        switcher.flush_logs()
+        lines = console.getvalue().splitlines()
+        checks.append(("debug lines are dropped at info", not any("payload" in line for line in lines)))
+        checks.append(("args are formatted on the writer", lines[0].endswith("updateType: SHOW_MATCH, field: 1")))
+        checks.append(("stamped host line", lines[1].startswith("[") and lines[1].endswith("] Switching to FIELD 1")))
+        for i in range(2000):
+            switcher.WriteLog("Error switching to FIELD %s: %s", i % 4 + 1, "timed out", level="error")
+        switcher.flush_logs()
+        files = sorted(name for name in os.listdir() if name.startswith("switcher.log"))
+        checks.append(("log file rotated, backups capped", files == ["switcher.log", "switcher.log.1", "switcher.log.2"]))
+        records = [json.loads(line) for name in files for line in open(name)]
+        checks.append(("every file line is a JSON record",
+                       all(set(record) == {"ts", "level", "msg"} for record in records)))
+        checks.append(("files stay near the size cap", all(os.path.getsize(name) <= 20000 for name in files)))
+        switcher.LOG_FILE = ""
+        switcher.WriteLog("close the file")
+        switcher.flush_logs()
+    switcher.LOG_LEVEL, switcher.LOG_FILE, switcher.LOG_MAX_BYTES, switcher.LOG_BACKUP_COUNT = saved
+    return checks
+
+
+def bench_logging(args):
+    message = {"updateType": "SHOW_MATCH", "payload": {"shortName": "Q12", "number": 12, "field": 1}}
+    print(f"caller-side cost of one log line, console taking {args.console_ms} ms per write")
+    for name, log in (("print", lambda: legacy_write_log(f"Received message: {message}")),
+                      ("queued", lambda: switcher.WriteLog("updateType: %s, shortName: %s, field: %s",
+                                                           "SHOW_MATCH", "Q12", "1")),
+                      ("debug off", lambda: switcher.WriteLog("Received message: %r", message, level="debug"))):
+        samples = []
+        with contextlib.redirect_stdout(SlowConsole(args.console_ms / 1000.0)):
+            for _ in range(args.lines):
+                began = time.perf_counter()
+                log()
+                samples.append((time.perf_counter() - began) * 1000.0)
+            began = time.perf_counter()
+            switcher.flush_logs()
+            drained = time.perf_counter() - began
+        print(summarize(name, samples) + (f"  (writer drained the backlog in {drained:.2f} s)"
+                                          if name == "queued" else ""))
+    report_checks({"logging": run_log_checks()})
+
+
+def bench_importtime(args):
+    print("-X importtime, ms beyond a bare interpreter (best of 5), and peak RSS")
+    for name, code in IMPORT_SETS:
+        runs = [import_cost(code) for _ in range(5)]
+        rss = min(rss for _, rss in runs) if runs[0][1] else None
+        print(f"{name:<20} {min(ms for ms, _ in runs):7.1f} ms" + (f"  {rss:6.1f} MB" if rss else ""))
+    checks = {}
+    for engine in args.engines:
+        with in_temp_dir():
+            checks[engine] = asyncio.run(run_headless_process(engine))
+    report_checks(checks)
+
+
+def bench_startup(args):
+    legacy = legacy_ping_preflight(["127.0.0.1", "127.0.0.1"])
+    if legacy is None:
+        print("before: no ping binary here; the old check ran `ping -c 5` per host one after the other, "
+              "about 4 s per reachable host, so ~8 s before any connection was opened")
+    else:
+        print(f"before: sequential `ping -c 5` of OBS and FTC took {legacy:.2f} s before any connection was opened")
+    results = run_engines(lambda engine: run_startup(engine, args.runs))
+    print("after: main() start -> first scene switch (TCP preflight overlapping the OBS and FTC connects)")
+    for engine, (_, ready, _) in results.items():
+        print(summarize(engine, ready))
+    for engine, (_, _, gave_up) in results.items():
+        print(f"{engine:<10} OBS port closed: main() gave up after {gave_up[0]:.0f} ms")
+    report_checks({engine: checks for engine, (checks, _, _) in results.items()})
+
+
+def bench_burst(args):
+    results = run_engines(lambda engine: run_burst(engine, args.bursts, args.obs_ms / 1000.0,
+                                                   args.status_ms / 1000.0))
+    print(f"{args.bursts} SHOW_PREVIEW+SHOW_MATCH pairs back to back, alternating fields, OBS taking "
+          f"{args.obs_ms} ms per request")
+    for engine, (_, r) in results.items():
+        print(f"{engine:<10} {r['burst_switches']} OBS switches, {r['coalesced']} coalesced, on the last field after "
+              f"{r['burst_ms']:.0f} ms; SHOW_MATCH behind a MATCH_START with a {args.status_ms} ms stream-status "
+              f"lookup switched after {r['switch_after_start_ms']:.1f} ms")
+    report_checks({engine: checks for engine, (checks, _) in results.items()})
+
+
+def bench_preview(args):
+    results = run_engines(lambda engine: run_preview(engine, args.matches))
+    print(f"{args.matches} scheduled matches on 3 fields, not round-robin: next match already on program or "
+          f"in preview when its SHOW_MATCH arrives")
+    for engine, (_, r) in results.items():
+        print(f"{engine:<10} lookahead {r['lookahead']}/{r['switches']}  fixed rotation {r['rotation']}/{r['switches']}")
+    report_checks({engine: checks for engine, (checks, _) in results.items()})
+
+
+def bench_export(args):
+    results = run_engines(lambda engine: run_export(engine, args.rows, args.switches))
+    print(f"match log of {args.rows} matches exported as txt, csv, json and md; SHOW_MATCH -> SetCurrentProgramScene")
+    for engine, (_, r) in results.items():
+        print(summarize(f"{engine[:5]}/idle", r["idle"]))
+        print(summarize(f"{engine[:5]}/exp", r["export"]))
+        span = r["export_span"]
+        print(f"{'':<10} {span['count']} exports on the worker, p50 {span['p50']:.1f} ms, p99 {span['p99']:.1f} ms; "
+              f"{r['reads']} concurrent reads, {r['torn']} partial")
+    report_checks({engine: checks for engine, (checks, _) in results.items()})
+
+
+def run_events_file_checks():
+    """
+    Events files that load_event_sessions must refuse. Returns a list of (check, passed).
+    """
+    checks = []
+    with in_temp_dir():
+        for label, entries in (("the same name", [{"name": "a", "FTCSERVER_EVENTCODE": "x"},
+                                                  {"name": "a", "FTCSERVER_EVENTCODE": "y"}]),
+                               ("the same event code", [{"name": "a", "FTCSERVER_EVENTCODE": "x"},
+                                                        {"name": "b", "FTCSERVER_EVENTCODE": "x"}])):
+            with open("events.json", "w") as f:
+                json.dump({"events": entries}, f)
+            switcher.EVENTS_FILE = os.path.abspath("events.json")
+            try:
+                switcher.load_event_sessions()
+                refused = False
+            except ValueError:
+                refused = True
+            finally:
+                switcher.EVENTS_FILE = ""
+            checks.append((f"two events with {label} are refused", refused))
+    return checks
+
+
+def bench_multievent(args):
+    print(f"event sessions in one process, {args.matches} matches each, every event playing at the same time; "
+          f"SHOW_MATCH -> SetCurrentProgramScene")
+    results = {}
+    for events in (1, args.events):
+        for engine, result in run_engines(lambda engine: run_multievent(engine, events, args.matches)).items():
+            results.setdefault(engine, []).append((events, result))
+    for engine, runs in results.items():
+        for events, (_, r) in runs:
+            print(summarize(f"{engine[:5]}/{events}ev", r["samples"]))
+            print(f"{'':<10} all connected after {r['startup_ms']:.0f} ms, {r['threads']} threads in the process, "
+                  f"{events * args.matches / r['seconds']:.0f} matches/s overall")
+    checks = {f"{engine}/{events}": checks for engine, runs in results.items() for events, (checks, _) in runs}
+    checks["events"] = run_events_file_checks()
+    report_checks(checks)
+
+
+def bench_crash(args):
+    print("warm restart: held commits, a MATCH_START replayed from the saved state")
+    restarts = run_engines(run_warm_restart)
+    for engine, (_, load_ms) in restarts.items():
+        print(f"{engine:<8} state restored in {load_ms:.2f} ms")
+    print(f"SIGKILL at random points while {args.matches} matches are played")
+    crashes = run_engines(lambda engine: run_crash(engine, args.matches, args.seed))
+    for engine, (_, r) in crashes.items():
+        print(f"{engine:<8} {r['kills']} kills in {r['seconds']:.1f} s, {r['logged']}/{args.matches} matches logged; "
+              f"restart to reconnected p50 {statistics.median(r['restart_ms']):.0f} ms")
+    report_checks({**{engine: checks for engine, (checks, _) in restarts.items()},
+                   **{f"{engine}/kill": checks for engine, (checks, _) in crashes.items()}})
+
+
+def bench_clock(args):
+    print(f"MATCH_START chapter time minus true stream time, OBS answering 200 ms late, {args.matches} matches")
+    results = run_engines(lambda engine: run_clock(engine, args.matches))
+    for engine, (_, errors) in results.items():
+        print(summarize(engine, errors))
+    report_checks({engine: checks for engine, (checks, _) in results.items()})
+
+
+def bench_status(args):
+    print(f"status board: {args.matches} matches, then {args.switches} switches with the board off and on")
+    with uncaught_thread_errors() as errors:
+        results = run_engines(lambda engine: run_status(engine, args.matches, args.switches))
+    for engine, (_, r) in results.items():
+        print(summarize(f"{engine[:5]}/off", r["off"]))
+        print(summarize(f"{engine[:5]}/on", r["on"]) + f"  ({r['redraws']} redraws)")
+        print(f"{'':<10} one sample {r['sample_us']:.1f} us, formatting it {r['format_us']:.1f} us, "
+              f"on the board's own thread / the window's")
+    checks = {engine: checks for engine, (checks, _) in results.items()}
+    checks["threads"] = [("no thread dies with a traceback" + (f" {errors}" if errors else ""), not errors)]
+    report_checks(checks)
+
+
+def bench_chaos(args):
+    with uncaught_thread_errors() as errors:
+        results = run_engines(lambda engine: run_chaos(engine, args.outage_ms / 1000.0))
+        stalled = run_engines(run_reconnect_without_api)
+    print(f"time to recover, from the switcher noticing the outage (crashed stand-ins stay down "
+          f"{args.outage_ms} ms; silent ones are noticed after the heartbeat timeout, 0.6 s here)")
+    for engine, (_, recovery) in results.items():
+        for name, stats in recovery.items():
+            print(f"{engine:<10} {name:<10} outages={stats['outages']}  last={stats['last'] * 1000:7.1f} ms  "
+                  f"max={stats['max'] * 1000:7.1f} ms")
+    report_checks({**{engine: checks for engine, (checks, _) in results.items()},
+                   **{f"{engine}/api": checks for engine, (checks, _) in stalled.items()},
+                   "threads": [("no thread dies with a traceback" + (f" {errors}" if errors else ""), not errors)]})
+
+
+def bench_schedule(args):
+    report_checks(run_engines(run_schedule))
+
+
+def bench_commit_fetch(args):
+    results = run_engines(lambda engine: run_commit_fetch(engine, args.delay_ms / 1000.0, args.switches))
+    for engine, (samples, hits, filled) in results.items():
+        print(f"{engine}: match-detail fetch takes {args.delay_ms} ms; 3 commits -> "
+              f"{hits} HTTP requests; row filled: {filled}")
+        print(summarize(engine, samples))
+
+
+def bench_latency(args):
+    results = {}
+    for name, engine, batch_execution in (("thread", "thread", "realtime"),
+                                          ("async/rt", "asyncio", "realtime"),
+                                          ("async/frm", "asyncio", "frame")):
+        random.seed(1)
+        results[name] = run_engines(
+            lambda engine: run_latency(engine, batch_execution, args.switches, args.gap), (engine,))[engine]
+    print("SHOW_MATCH -> SetCurrentProgramScene")
+    for name, (program_samples, _) in results.items():
+        print(summarize(name, program_samples))
+    print("SHOW_MATCH -> program and next preview both staged")
+    for name, (_, switch_samples) in results.items():
+        print(summarize(name, switch_samples))
+
+
+def bench_routing(args):
+    results = run_engines(lambda engine: run_routing(engine, args.obs, args.slow_ms / 1000.0))
+    print(f"{args.obs} OBS, {2 * args.obs} fields, obs1 answers after {args.slow_ms} ms: "
+          f"switch latency on the other OBS")
+    for engine, (_, samples) in results.items():
+        print(summarize(engine, samples))
+    report_checks({engine: checks for engine, (checks, _) in results.items()})
+
+
+async def run_pipeline_timeout():
+    """
+    A pipelined program+preview where the program answer comes after the timeout: nothing may be
+    left behind in obsws' answer bookkeeping. Returns a list of (check, passed).
+    """
+    obs = FakeOBS()
+    await obs.start()
+    switcher.import_obswebsocket()
+    connection = switcher.obsws(host="127.0.0.1", port=obs.port, password="", timeout=2)
+    await asyncio.to_thread(connection.connect)
+    try:
+        obs.request_delays["SetCurrentProgramScene"] = 0.3
+        requests = [switcher.obsrequests.SetCurrentProgramScene(sceneName="Field 1"),
+                    switcher.obsrequests.SetCurrentPreviewScene(sceneName="Field 2")]
+        try:
+            await asyncio.to_thread(switcher.Call_OBSPipelined, connection, requests, 0.1)
+            timed_out = False
+        except Exception:
+            timed_out = True
+        await asyncio.sleep(0.5)  # both answers are in by now
+        leftovers = [key for key in list(connection.events) + list(connection.answers) if key.startswith("p")]
+    finally:
+        await asyncio.to_thread(connection.disconnect)
+        await obs.stop()
+    return [("a missing answer raises", timed_out),
+            (f"no pipelined ids left in obsws after it ({len(leftovers)} left)", not leftovers)]
+
+
+def bench_scene_cache(args):
+    results = run_engines(run_scene_cache)
+    results["pipeline"] = asyncio.run(run_pipeline_timeout())
+    report_checks(results)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="FTC_Switcher benchmarks against local stand-in servers")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    latency = sub.add_parser("latency", help="scene-switch latency, thread engine vs asyncio engine batches")
+    latency.add_argument("--switches", type=int, default=30)
+    latency.add_argument("--gap", type=float, default=1.2,
+                         help="maximum random idle time between scorekeeper messages, in seconds")
+    latency.set_defaults(func=bench_latency)
+
+    matchlog = sub.add_parser("matchlog", help="match log store vs whole-CSV rewrite per commit")
+    matchlog.add_argument("--matches", type=int, nargs="+", default=[1000, 10000])
+    matchlog.add_argument("--ops", type=int, default=20)
+    matchlog.set_defaults(func=bench_match_log)
+
+    commit = sub.add_parser("commit", help="scene switching while a slow MATCH_COMMIT fetch is running")
+    commit.add_argument("--delay-ms", type=int, default=1500)
+    commit.add_argument("--switches", type=int, default=20)
+    commit.set_defaults(func=bench_commit_fetch)
+
+    schedule = sub.add_parser("schedule", help="match schedule cache checks against the HTTP stand-in")
+    schedule.set_defaults(func=bench_schedule)
+
+    burst = sub.add_parser("burst", help="scorekeeper bursts: coalescing, bookkeeping lane, slow MATCH_START")
+    burst.add_argument("--bursts", type=int, default=10)
+    burst.add_argument("--obs-ms", type=int, default=150)
+    burst.add_argument("--status-ms", type=int, default=1000)
+    burst.set_defaults(func=bench_burst)
+
+    preview = sub.add_parser("preview", help="schedule lookahead vs fixed rotation for the staged preview")
+    preview.add_argument("--matches", type=int, default=24)
+    preview.set_defaults(func=bench_preview)
+
+    export = sub.add_parser("export", help="switch latency while the exports are regenerated, atomic writes")
+    export.add_argument("--rows", type=int, default=2000)
+    export.add_argument("--switches", type=int, default=20)
+    export.set_defaults(func=bench_export)
+
+    multievent = sub.add_parser("multievent", help="several event sessions in one process (load test)")
+    multievent.add_argument("--events", type=int, default=8)
+    multievent.add_argument("--matches", type=int, default=20)
+    multievent.set_defaults(func=bench_multievent)
+
+    crash = sub.add_parser("crash", help="warm restart and SIGKILL at random points")
+    crash.add_argument("--matches", type=int, default=40)
+    crash.add_argument("--seed", type=int, default=1)
+    crash.set_defaults(func=bench_crash)
+
+    clock = sub.add_parser("clock", help="stream-time accuracy of the match log timestamps")
+    clock.add_argument("--matches", type=int, default=30)
+    clock.set_defaults(func=bench_clock)
+
+    status = sub.add_parser("status", help="status board snapshot checks, switch latency with the board on")
+    status.add_argument("--matches", type=int, default=20)
+    status.add_argument("--switches", type=int, default=30)
+    status.set_defaults(func=bench_status)
+
+    decode = sub.add_parser("decode", help="per-frame parse and dispatch cost over a recording")
+    decode.add_argument("--matches", type=int, default=120)
+    decode.add_argument("--recording", help="a RECORD_FILE recording instead of a synthetic event day")
+    decode.add_argument("--repeat", type=int, default=5)
+    decode.set_defaults(func=bench_decode, cwd=os.getcwd())
+
+    chaos = sub.add_parser("chaos", help="kill and hang the stand-in servers, check reconnect and resync")
+    chaos.add_argument("--outage-ms", type=int, default=500)
+    chaos.set_defaults(func=bench_chaos)
+
+    metrics = sub.add_parser("metrics", help="latency spans, /metrics endpoint and recording overhead")
+    metrics.add_argument("--switches", type=int, default=50)
+    metrics.set_defaults(func=bench_metrics)
+
+    importtime = sub.add_parser("importtime", help="import cost of GUI vs headless runs, headless SIGTERM checks")
+    importtime.add_argument("--engines", nargs="+", default=["thread", "asyncio"])
+    importtime.set_defaults(func=bench_importtime)
+
+    startup = sub.add_parser("startup", help="time from start to first switch, preflight reporting")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.set_defaults(func=bench_startup)
+
+    logging = sub.add_parser("logging", help="queued WriteLog vs print with a slow console, log file rotation")
+    logging.add_argument("--lines", type=int, default=200)
+    logging.add_argument("--console-ms", type=float, default=2)
+    logging.set_defaults(func=bench_logging)
+
+    eventday = sub.add_parser("eventday", help="replay a synthetic event day: throughput, latency, CSV/TXT cost")
+    eventday.add_argument("--matches", type=int, default=120)
+    eventday.add_argument("--fields", type=int, default=2, choices=(1, 2, 3, 4))
+    eventday.add_argument("--speed", type=float, default=1000, help="times real time; it is also run at max speed")
+    eventday.add_argument("--out", help="keep the generated recording at this path")
+    eventday.add_argument("--engines", nargs="+", default=["thread", "asyncio"])
+    eventday.set_defaults(func=bench_eventday)
+
+    replay = sub.add_parser("replay", help="replay a recorded scorekeeper stream against the stand-ins")
+    replay.add_argument("recording")
+    replay.add_argument("--speed", type=float, default=1, help="times real time, 0 = as fast as possible")
+    replay.add_argument("--engines", nargs="+", default=["thread", "asyncio"])
+    replay.set_defaults(func=bench_replay)
+
+    routing = sub.add_parser("routing", help="field routing across several OBS with one slow OBS")
+    routing.add_argument("--obs", type=int, default=3)
+    routing.add_argument("--slow-ms", type=int, default=300)
+    routing.set_defaults(func=bench_routing)
+
+    scenes = sub.add_parser("scenes", help="scene-state cache checks against the fake OBS")
+    scenes.set_defaults(func=bench_scene_cache)
+    return parser
+
+
+if __name__ == '__main__':
+    arguments = build_parser().parse_args()
+    arguments.func(arguments)
@@ -2,393 +2,3445 @@
 
 import os
 import sys
+import atexit
 import time
 import threading
 import json
 import csv
+import io
+import bisect
+import collections
+import itertools
+import random
+import concurrent.futures
+import base64
+import hashlib
+import importlib.util
 import re
+import socket
 import uuid
-import subprocess
-import requests
+import urllib.parse
 import queue
-import websocket
-import tkinter as tk
-from tkinter import ttk
+import signal
+import argparse
 
-# Global exit flag
-exit_requested = False
+# asyncio, requests, websocket-client, obs-websocket-py, http.server, tkinter and PIL are imported
+# where they are first used: a headless run never loads the GUI, and each engine only loads its own clients.
+
+# Set by the Exit button or SIGINT/SIGTERM; both engines stop their main loop when it is set.
+shutdown_event = threading.Event()
 
 # ==================================================
 #               Default Variables
-#       (These will be updated by the GUI)
+#   (Updated by the GUI, or see Headless Mode)
+# ==================================================
+
+OBS_SERVERNAME = ""
+OBS_WEBSOCKET_PASSWORD = ""
+OBS_WEBSOCKET_PORT = 4455  # Use an integer port
+
+OBS_SCENENAME_FIELD2 = ""
+OBS_SCENENAME_FIELD1 = ""
+# If these are not set, the script proceeds as a 2-field event.
+OBS_SCENENAME_FIELD3 = ""
+OBS_SCENENAME_FIELD4 = ""
+
+FTCSERVER_NAME = ""
+FTCSERVER_EVENTCODE = ""
+
+# "thread" (recv/send threads + polling loop) or "asyncio" (single event loop, needs the websockets package)
+ENGINE = "thread"
+OBS_REQUEST_TIMEOUT = 10  # seconds
+PREFLIGHT_TIMEOUT = 2  # seconds per TCP reachability probe at startup
+# How OBS runs the program+preview request batch (asyncio engine):
+# "realtime" = SerialRealtime (back to back), "frame" = SerialFrame (one request per rendered frame)
+OBS_BATCH_EXECUTION = "realtime"
+# Optional JSON file mapping fields to scenes on one or more OBS instances (see load_field_routing)
+ROUTING_CONFIG_FILE = ""
+# Optional JSON file listing several events (divisions) to run in this one process (see Event Sessions)
+EVENTS_FILE = ""
+# Latency metrics (see Latency Metrics below); recording is off unless one of these is set
+METRICS_PORT = 0  # serve Prometheus text on http://127.0.0.1:<port>/metrics, 0 = off
+METRICS_SUMMARY_INTERVAL = 0  # seconds between latency summary log lines, 0 = off
+# Optional JSON-lines file that every scorekeeper frame and scoring API response is appended to
+# (replay it with FTC_Bench.py replay)
+RECORD_FILE = ""
+LOG_LEVEL = "info"  # debug / info / warning / error; debug adds the full payload of every scorekeeper frame
+LOG_FILE = ""  # optional JSON-lines log file, rotated at LOG_MAX_BYTES
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+# Files generated from the match log (see Output Exporters): txt = YouTube description, csv, json, md
+EXPORT_FORMATS = "txt,csv"
+
+
 # ==================================================
+#               Helper Functions
+# ==================================================
+
+LOG_LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class LogWriter:
+    """
+    Background writer behind WriteLog and Write_Host. Callers only put a tuple on a queue; the
+    timestamp, %-formatting of the arguments, console output and the JSON-lines LOG_FILE (rotated
+    at LOG_MAX_BYTES, LOG_BACKUP_COUNT old files kept) are all done on this thread, a batch at a
+    time, so a slow console or disk never holds up a scene switch.
+    """
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.file = None
+        self.file_path = ""
+        self.file_size = 0
+        self.stamp_second = None
+        self.stamp_text = ""
+
+    def put(self, record):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                    self.thread.start()
+        self.queue.put(record)
+
+    def flush(self, timeout=5):
+        """
+        Waits until everything logged so far has been written.
+        """
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait(timeout)
+
+    def _stamp(self, t):
+        second = int(t)
+        if second != self.stamp_second:
+            self.stamp_second = second
+            self.stamp_text = time.strftime('%Y%m%d %H:%M:%S', time.localtime(second))
+        return self.stamp_text
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < 1000:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            console = []
+            lines = []
+            waiters = []
+            for record in batch:
+                if isinstance(record, threading.Event):
+                    waiters.append(record)
+                    continue
+                t, level, message, args, style = record
+                if args:
+                    try:
+                        message = message % args
+                    except Exception:
+                        message = f"{message} {args!r}"
+                if style == "log":
+                    console.append(f"{self._stamp(t)} {message}\n")
+                elif style == "stamped":
+                    console.append(f"[{self._stamp(t)}] {message}\n")
+                else:
+                    console.append(f"{message}\n")
+                if LOG_FILE:
+                    lines.append(json.dumps({
+                        "ts": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(t)) + f".{int(t * 1000) % 1000:03d}",
+                        "level": level, "msg": message}) + "\n")
+            try:
+                if sys.stdout is not None:  # None in a windowed (--noconsole) build
+                    sys.stdout.write("".join(console))
+                    sys.stdout.flush()
+            except Exception:
+                pass
+            try:
+                self._write_file(lines)
+            except OSError:
+                pass
+            for waiter in waiters:
+                waiter.set()
+
+    def _write_file(self, lines):
+        if self.file_path != LOG_FILE:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.file_path = LOG_FILE
+            if LOG_FILE:
+                self.file = open(LOG_FILE, 'ab')
+                self.file_size = self.file.tell()
+        if self.file is None or not lines:
+            return
+        chunk = []
+        for line in lines:
+            data = line.encode('utf-8')
+            if self.file_size and self.file_size + len(data) > LOG_MAX_BYTES:
+                self.file.write(b"".join(chunk))
+                chunk = []
+                self._rotate()
+            chunk.append(data)
+            self.file_size += len(data)
+        self.file.write(b"".join(chunk))
+        self.file.flush()
+
+    def _rotate(self):
+        self.file.close()
+        for i in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            if os.path.exists(f"{self.file_path}.{i}"):
+                os.replace(f"{self.file_path}.{i}", f"{self.file_path}.{i + 1}")
+        if LOG_BACKUP_COUNT:
+            os.replace(self.file_path, f"{self.file_path}.1")
+        self.file = open(self.file_path, 'wb')
+        self.file_size = 0
+
+
+log_writer = LogWriter()
+
+
+def flush_logs():
+    log_writer.flush()
+
+
+atexit.register(flush_logs)
+
+
+def WriteLog(LogString="", *args, level="info"):
+    """
+    Logs a timestamped line. Extra args are %-formatted into LogString on the writer thread and only
+    if `level` passes LOG_LEVEL, so pass expensive values as args instead of formatting them here.
+    """
+    if LOG_LEVELS.get(level, 20) < LOG_LEVELS.get(LOG_LEVEL, 20):
+        return
+    log_writer.put((time.time(), level, LogString, args, "log"))
+
+
+def Write_Host(message, stamped=False):
+    """
+    Console message for the operator; stamped=True prefixes "[<date> <time>] ".
+    """
+    log_writer.put((time.time(), "info", message, (), "stamped" if stamped else "host"))
+
+
+class Preflight:
+    """
+    Startup reachability check. TCP-connects to every OBS websocket port and to the scorekeeper's
+    HTTP port at the same time, on background threads, while the real connections are being opened.
+    Each result (reachable with its connect RTT, or the error) is logged as soon as it is in.
+    """
+
+    def __init__(self, session, obs_servers):
+        ftc = urllib.parse.urlsplit(f"http://{session.server}")
+        try:
+            ftc_port = ftc.port or 80
+        except ValueError:
+            ftc_port = 80
+        self.endpoints = [("obs", session.label(f"OBS {name}"), server["host"], int(server["port"] or 4455))
+                          for name, server in obs_servers.items()]
+        self.endpoints.append(("ftc", session.label("FTC scoring system"), ftc.hostname or "", ftc_port))
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.endpoints))
+        self.futures = [pool.submit(self._probe, *endpoint) for endpoint in self.endpoints]
+        pool.shutdown(wait=False)
+
+    @staticmethod
+    def _probe(kind, label, host, port):
+        began = time.perf_counter()
+        try:
+            with socket.create_connection((host, port), timeout=PREFLIGHT_TIMEOUT):
+                rtt = time.perf_counter() - began
+        except OSError as e:
+            WriteLog(f"Preflight: {label} at {host}:{port} is not reachable ({e})", level="warning")
+            return kind, False
+        WriteLog(f"Preflight: {label} at {host}:{port} reachable, connect RTT {rtt * 1000:.1f} ms")
+        return kind, True
+
+    def report(self):
+        """
+        Waits for the probes (at most PREFLIGHT_TIMEOUT) and shows the usual errors for OBS or the
+        FTC scoring system if they could not be reached.
+        """
+        results = [future.result() for future in self.futures]
+        report_connection_tests(all(ok for kind, ok in results if kind == "obs"),
+                                all(ok for kind, ok in results if kind == "ftc"))
+
+
+# --------------------------------------------------
+# OBS functions using obs-websocket-py (synchronous)
+# --------------------------------------------------
+
+obsws = obsrequests = obsevents = None  # obs-websocket-py, imported by Connect_OBS on first use
+
+
+def import_obswebsocket():
+    global obsws, obsrequests, obsevents
+    if obsws is None:
+        from obswebsocket import obsws, requests as obsrequests, events as obsevents
+        install_obs_recv_excepthook()
+
+
+def install_obs_recv_excepthook():
+    """
+    When OBS drops the connection, obs-websocket-py's receive thread re-raises the socket error and
+    Python prints its traceback. Here that is a normal reconnect, so the error becomes one log line
+    and the connection's on_disconnect wakes the OBSTarget supervisor, which reconnects.
+    """
+    from obswebsocket.core import RecvThread
+    previous_hook = threading.excepthook
+
+    def excepthook(args):
+        if isinstance(args.thread, RecvThread) and issubclass(args.exc_type, OSError):
+            connection = args.thread.core
+            WriteLog(f"OBS connection dropped ({connection.host}:{connection.port}): {args.exc_value}",
+                     level="warning")
+            if connection.on_disconnect:
+                connection.on_disconnect(connection)
+        else:
+            previous_hook(args)
+
+    threading.excepthook = excepthook
+
+
+def Connect_OBS(host, port, password, scene_state, stream_clock=None):
+    """
+    Connect to OBS using obs-websocket-py.
+    The scene-state cache (and stream clock) are attached first so they resync on every (re)connect.
+    """
+    import_obswebsocket()
+    try:
+        port = port if port else 4455
+        connection = obsws(host=host, port=int(port), password=password, timeout=OBS_REQUEST_TIMEOUT)
+        scene_state.attach(connection)
+        if stream_clock is not None:
+            stream_clock.attach(connection)
+        connection.connect()
+        WriteLog("Connected to OBS!")
+        return connection
+    except Exception as e:
+        raise Exception(f"Failed to connect to OBS: {e}")
+
+
+def Get_OBSCurrentProgramScene(connection):
+    """
+    Gets the current program scene using GetCurrentProgramScene().
+    """
+    try:
+        response = connection.call(obsrequests.GetCurrentProgramScene())
+        scene = response.getCurrentProgramSceneName()
+        WriteLog(f"OBS Current Scene: '{scene}'")
+        return scene
+    except Exception as e:
+        WriteLog(f"Error getting current scene: {e}", level="error")
+        return ""
+
+
+def Get_OBSCurrentPreviewScene(connection):
+    """
+    Gets the preview scene using GetCurrentPreviewScene().
+    (Fails when OBS is not in Studio Mode.)
+    """
+    try:
+        response = connection.call(obsrequests.GetCurrentPreviewScene())
+        return response.getCurrentPreviewSceneName()
+    except Exception as e:
+        WriteLog(f"Error getting preview scene: {e}", level="error")
+        return ""
+
+
+def Set_OBSCurrentPreviewScene(connection, SceneName):
+    """
+    Sets the preview scene using SetCurrentPreviewScene.
+    (Note: This only works if OBS is in Studio Mode.)
+    Returns True if OBS accepted the request.
+    """
+    try:
+        WriteLog(f"Setting OBS preview scene to: '{SceneName}'")
+        response = connection.call(obsrequests.SetCurrentPreviewScene(sceneName=SceneName))
+        return bool(response.status)
+    except Exception as e:
+        WriteLog(f"Error setting preview scene to {SceneName}: {e}", level="error")
+        return False
+
+
+obs_pipeline_ids = itertools.count(1)  # shared by the switch workers and heartbeats, next() is thread-safe
+
+
+def Call_OBSPipelined(connection, request_objs, timeout=None):
+    """
+    Sends several obs-websocket-py requests back to back, then waits for all of their answers,
+    so N requests cost one round-trip instead of N. Uses obsws' own answer bookkeeping.
+    Returns the request objects populated with their responses.
+    """
+    if connection.legacy:
+        return [connection.call(obj) for obj in request_objs]
+
+    pending = []
+    try:
+        for obj in request_objs:
+            message_id = f"p{next(obs_pipeline_ids)}"
+            event = threading.Event()
+            pending.append((message_id, event, obj))
+            connection.events[message_id] = event
+            connection.ws.send(json.dumps({
+                "op": 6,
+                "d": {"requestId": message_id, "requestType": obj.name, "requestData": obj.data()}
+            }))
+
+        deadline = time.monotonic() + (OBS_REQUEST_TIMEOUT if timeout is None else timeout)
+        for message_id, event, obj in pending:
+            event.wait(max(0.0, deadline - time.monotonic()))
+            answer = connection.answers.pop(message_id, None)
+            if answer is None:
+                raise Exception(f"No answer from OBS for {obj.name}")
+            obj.input(answer.get('responseData', {}), answer['requestStatus']['result'])
+    finally:
+        # Including the ids not waited for after a missing answer: obsws drops answers to ids that
+        # are not in connection.events, so nothing late is left in connection.answers.
+        for message_id, _, _ in pending:
+            connection.events.pop(message_id, None)
+            connection.answers.pop(message_id, None)
+    return request_objs
+
+
+def Set_OBSProgramAndPreview(connection, ProgramScene, PreviewScene):
+    """
+    Switches program and stages the next preview scene with a single pipelined round-trip
+    (replaces SetCurrentProgramScene + sleep + SetCurrentPreviewScene). A PreviewScene of None
+    leaves the preview alone, for when it is already staged.
+    Returns (program accepted, preview accepted).
+    """
+    try:
+        WriteLog(f"Setting OBS current scene to: '{ProgramScene}', preview scene to: '{PreviewScene}'")
+        request_objs = [obsrequests.SetCurrentProgramScene(sceneName=ProgramScene)]
+        if PreviewScene is not None:
+            request_objs.append(obsrequests.SetCurrentPreviewScene(sceneName=PreviewScene))
+        program, *preview = Call_OBSPipelined(connection, request_objs)
+        if not program.status:
+            WriteLog(f"Error setting current scene to {ProgramScene}: {program.datain}", level="error")
+        if preview and not preview[0].status:
+            WriteLog(f"Error setting preview scene to {PreviewScene}: {preview[0].datain}", level="error")
+        return bool(program.status), not preview or bool(preview[0].status)
+    except Exception as e:
+        WriteLog(f"Error switching to {ProgramScene}: {e}", level="error")
+        return False, False
+
+
+def Get_OBSStreamStatus(connection):
+    """
+    Gets the OBS stream status.
+    Returns a dictionary with 'outputActive' and 'outputDuration' in milliseconds, or None on error.
+    """
+    try:
+        response = connection.call(obsrequests.GetStreamStatus())
+        return {"outputActive": bool(response.getOutputActive()), "outputDuration": response.getOutputDuration()}
+    except Exception as e:
+        WriteLog(f"Error getting OBS stream status: {e}", level="error")
+        return None
+
+
+class OBSSceneState:
+    """
+    In-memory copy of the OBS program and preview scenes.
+
+    Kept current by the CurrentProgramSceneChanged / CurrentPreviewSceneChanged events, so deciding
+    whether a field is already on program costs no OBS round-trip. None means "unknown"
+    (not yet synced, or disconnected), which always compares unequal and forces a switch.
+    """
+
+    def __init__(self):
+        self.program_scene = None
+        self.preview_scene = None
+
+    def on_event(self, event_type, event_data):
+        if event_type == "CurrentProgramSceneChanged":
+            self.program_scene = event_data.get("sceneName")
+        elif event_type == "CurrentPreviewSceneChanged":
+            self.preview_scene = event_data.get("sceneName")
+
+    def invalidate(self):
+        self.program_scene = None
+        self.preview_scene = None
+
+    def attach(self, connection):
+        """
+        Subscribes to scene events on an obsws connection and resyncs whenever it (re)connects.
+        """
+        def forward(event):
+            self.on_event(event.name, event.datain)
+
+        connection.register(forward, obsevents.CurrentProgramSceneChanged)
+        connection.register(forward, obsevents.CurrentPreviewSceneChanged)
+        connection.on_connect = self.resync
+        connection.on_disconnect = lambda conn: self.invalidate()
+
+    def resync(self, connection):
+        self.program_scene = Get_OBSCurrentProgramScene(connection) or None
+        self.preview_scene = Get_OBSCurrentPreviewScene(connection) or None
+        WriteLog(f"OBS scene state synced: program '{self.program_scene}', preview '{self.preview_scene}'")
+
+    async def resync_async(self, obs):
+        try:
+            self.program_scene = (await obs.call("GetCurrentProgramScene")).get("currentProgramSceneName")
+        except Exception as e:
+            WriteLog(f"Error getting current scene: {e}", level="error")
+            self.program_scene = None
+        try:
+            self.preview_scene = (await obs.call("GetCurrentPreviewScene")).get("currentPreviewSceneName")
+        except Exception as e:
+            WriteLog(f"Error getting preview scene: {e}", level="error")
+            self.preview_scene = None
+        WriteLog(f"OBS scene state synced: program '{self.program_scene}', preview '{self.preview_scene}'")
+
+
+STREAM_SEGMENTS_KEPT = 16  # stream (re)starts remembered, so a late MATCH_START job still finds its segment
+STREAM_RESYNC_TOLERANCE = 1.0  # seconds; a resynced start further off than this is a new stream segment
+
+
+class StreamClock:
+    """
+    The stream time of one OBS, kept locally so a MATCH_START row is stamped without asking OBS.
+
+    Each stream segment (a start to a stop) is a pair of perf_counter times; a restarted stream is
+    a new segment counted from zero, like OBS's outputDuration. StreamStateChanged events open and
+    close segments as they happen, and a GetStreamStatus on every (re)connect re-anchors the live
+    one and catches a start or stop missed while disconnected. An ingest reconnect
+    (OUTPUT_RECONNECTING / OUTPUT_RECONNECTED) stays in the same segment.
+
+    Frames are stamped with perf_counter when they are received, so the stream time of a frame
+    does not depend on how long it then waits in a queue.
+    """
+
+    def __init__(self):
+        self.segments = collections.deque(maxlen=STREAM_SEGMENTS_KEPT)  # [start, end]; end is None while live
+        self.lock = threading.Lock()  # events come from the OBS receive thread, lookups from bookkeeping
+
+    def on_event(self, event_type, event_data):
+        if event_type != "StreamStateChanged":
+            return
+        now = time.perf_counter()
+        state = event_data.get("outputState")
+        if state == "OBS_WEBSOCKET_OUTPUT_STARTED":
+            self.sync(True, 0, now)
+        elif state == "OBS_WEBSOCKET_OUTPUT_STOPPED":
+            self.sync(False, 0, now)
+
+    def sync(self, active, duration_ms, at):
+        """
+        The stream was `active` for `duration_ms` at perf_counter time `at`.
+        """
+        with self.lock:
+            live = self.segments[-1] if self.segments and self.segments[-1][1] is None else None
+            if not active:
+                if live is not None:
+                    live[1] = at
+                return
+            start = at - duration_ms / 1000.0
+            if live is not None and abs(live[0] - start) <= STREAM_RESYNC_TOLERANCE:
+                live[0] = start
+                return
+            if live is not None:
+                live[1] = start  # restarted while we were not looking
+            self.segments.append([start, None])
+
+    def stream_time_ms(self, at):
+        """
+        Milliseconds into the stream segment that was live at perf_counter time `at`, 0 if none was.
+        """
+        with self.lock:
+            for start, end in reversed(self.segments):
+                if start <= at and (end is None or at <= end):
+                    return (at - start) * 1000.0
+        return 0
+
+    def attach(self, connection):
+        """
+        Subscribes to stream events on an obsws connection and resyncs on every (re)connect, after
+        whatever on_connect was already set (the scene cache's resync).
+        """
+        def forward(event):
+            self.on_event(event.name, event.datain)
+
+        def on_connect(conn):
+            if previous is not None:
+                previous(conn)
+            self.resync(conn)
+
+        previous = connection.on_connect
+        connection.register(forward, obsevents.StreamStateChanged)
+        connection.on_connect = on_connect
+
+    def resync(self, connection):
+        began = time.perf_counter()
+        status = Get_OBSStreamStatus(connection)
+        if status is not None:
+            self.sync(status["outputActive"], status["outputDuration"] or 0, (began + time.perf_counter()) / 2)
+
+    async def resync_async(self, obs):
+        began = time.perf_counter()
+        try:
+            status = await obs.call("GetStreamStatus")
+        except Exception as e:
+            WriteLog(f"Error getting OBS stream status: {e}", level="error")
+            return
+        self.sync(bool(status.get("outputActive")), status.get("outputDuration") or 0,
+                  (began + time.perf_counter()) / 2)
+
+
+def format_description_entry(row):
+    """
+    One match in the YouTube description TXT.
+    """
+    return (f"Match: {row.get('MatchName', '')}\n"
+            f"Time: {row.get('TimeStamp', '')}\n"
+            f"Red Alliance: {row.get('Red1', '')} & {row.get('Red2', '')} - Score: {row.get('RedFinal', '')}\n"
+            f"Blue Alliance: {row.get('Blue1', '')} & {row.get('Blue2', '')} - Score: {row.get('BlueFinal', '')}\n"
+            "-----------------------------\n")
+
+
+# ==================================================
+#               Output Exporters
+# ==================================================
+
+EXPORT_DEBOUNCE = 0.5  # seconds without a change before the files are regenerated
+EXPORT_MAX_DELAY = 5  # seconds; a steady stream of changes still gets written this often
+
+
+class Exporter:
+    """
+    One file generated from the match rows. A format sets its file suffix and fills in the template:
+    header(), then entry(row) for every row joined by `separator`, then footer().
+    """
+    suffix = ""
+    separator = ""
+
+    def path(self, event_code):
+        return f"{event_code}{self.suffix}"
+
+    def header(self):
+        return ""
+
+    def entry(self, row):
+        return ""
+
+    def footer(self):
+        return ""
+
+    def assemble(self, entries):
+        return self.header() + self.separator.join(entries) + self.footer()
+
+    def render(self, rows):
+        return self.assemble([self.entry(row) for row in rows])
+
+
+class DescriptionExporter(Exporter):
+    """
+    The YouTube description TXT: each match with its stream time, for chapters.
+    """
+    suffix = "_YouTube_Description.txt"
+
+    def entry(self, row):
+        return format_description_entry(row)
+
+
+class CSVExporter(Exporter):
+    suffix = "_YouTube_Description.csv"
+
+    def header(self):
+        return ",".join(CSV_FIELDNAMES) + "\r\n"
+
+    def entry(self, row):
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=CSV_FIELDNAMES).writerow(row)
+        return buffer.getvalue()
+
+
+class JSONExporter(Exporter):
+    suffix = "_matches.json"
+    separator = ",\n"
+
+    def header(self):
+        return '{"matches": [\n'
+
+    def entry(self, row):
+        return json.dumps(row)
+
+    def footer(self):
+        return "\n]}\n"
+
+
+class MarkdownExporter(Exporter):
+    suffix = "_matches.md"
+
+    def header(self):
+        return ("| Time | Match | Red Alliance | Red Score | Blue Alliance | Blue Score |\n"
+                "|---|---|---|---|---|---|\n")
+
+    def entry(self, row):
+        return (f"| {row['TimeStamp']} | {row['MatchName']} | {row['Red1']} & {row['Red2']} | {row['RedFinal']} "
+                f"| {row['Blue1']} & {row['Blue2']} | {row['BlueFinal']} |\n")
+
+
+# EXPORT_FORMATS names are looked up here; a new format is an Exporter subclass added to this dict.
+EXPORTERS = {"txt": DescriptionExporter(), "csv": CSVExporter(), "json": JSONExporter(), "md": MarkdownExporter()}
+
+
+def write_atomic(path, text):
+    """
+    Writes a temp file next to `path` and renames it over `path`, so a reader (OBS text source,
+    upload script) sees either the old file or the new one, never half of one.
+    """
+    temp_file = path + ".tmp"
+    with open(temp_file, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(temp_file, path)
+
+
+def selected_exporters():
+    exporters = []
+    for name in EXPORT_FORMATS.replace(" ", "").lower().split(","):
+        if name in EXPORTERS:
+            exporters.append(EXPORTERS[name])
+        elif name:
+            WriteLog(f"Unknown export format '{name}' (known: {', '.join(EXPORTERS)})", level="warning")
+    return exporters
+
+
+class ExportWorker:
+    """
+    Regenerates a match log's export files on a background thread. schedule() only marks rows
+    stale; the worker waits until EXPORT_DEBOUNCE passes without another change (or EXPORT_MAX_DELAY
+    after the first one), renders the stale rows again and writes every format. Each format keeps
+    its rendered entries, so a re-export of a long event renders only the rows that changed.
+    """
+
+    def __init__(self, match_log, exporters):
+        self.match_log = match_log
+        self.exporters = exporters
+        self.entries = [[] for _ in exporters]  # per format, the rendered entry of every row
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.stale = set()  # row positions changed since they were rendered
+        self.first_change = None  # monotonic time of the oldest change not written yet
+        self.last_change = None
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def schedule(self, positions=()):
+        """
+        Marks the rows at `positions` (and any rows added since the last write) for the next write.
+        """
+        now = time.monotonic()
+        with self.condition:
+            self.stale.update(positions)
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+            self.condition.notify()
+
+    def _wait_until_due(self):
+        """
+        Blocks until the files are due for a rewrite. Returns False once the worker is stopped.
+        """
+        with self.condition:
+            while not self.stopped:
+                if self.first_change is None:
+                    self.condition.wait()
+                    continue
+                remaining = min(self.last_change + EXPORT_DEBOUNCE,
+                                self.first_change + EXPORT_MAX_DELAY) - time.monotonic()
+                if remaining <= 0:
+                    self.first_change = None
+                    return True
+                self.condition.wait(remaining)
+            return False
+
+    def _run(self):
+        while self._wait_until_due():
+            self.write()
+
+    def write(self):
+        """
+        Writes every format now, from the rows as they are at this moment.
+        """
+        with self.write_lock:
+            began = time.perf_counter()
+            rendered = len(self.entries[0]) if self.entries else 0
+            with self.match_log.lock:
+                with self.condition:
+                    stale, self.stale = self.stale, set()
+                rows = self.match_log.rows
+                positions = sorted(stale.union(range(rendered, len(rows))))
+                changed = [(position, dict(rows[position])) for position in positions if position < len(rows)]
+                count = len(rows)
+            for exporter, entries in zip(self.exporters, self.entries):
+                entries.extend([""] * (count - len(entries)))
+                for position, row in changed:
+                    entries[position] = exporter.entry(row)
+                path = exporter.path(self.match_log.event_code)
+                try:
+                    write_atomic(path, exporter.assemble(entries))
+                except OSError as e:
+                    WriteLog(f"Error writing {path}: {e}", level="error")
+            observe_span("export", time.perf_counter() - began)
+
+    def close(self):
+        """
+        Stops the worker and writes whatever it had not written yet.
+        """
+        with self.condition:
+            self.stopped = True
+            pending = self.first_change is not None
+            self.first_change = None
+            self.condition.notify()
+        self.thread.join(timeout=5)
+        if pending:
+            self.write()
+
+
+# ==================================================
+#               Match Log Store
+# ==================================================
+
+CSV_FIELDNAMES = ["TimeStamp", "MatchName", "Red1", "Red2", "Blue1", "Blue2", "RedFinal", "BlueFinal"]
+MATCH_LOG_COMPACT_MIN = 256  # journal lines before compaction is considered
+
+
+def read_journal(path):
+    """
+    The complete lines of an append-only journal. A last line without its newline (torn by a crash
+    in the middle of an append) is cut off the file, so the next append starts a line of its own
+    instead of being glued onto the fragment and lost with it on the following load.
+    """
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            WriteLog(f"Dropping the torn last line of {path}: {data[end:]!r}", level="warning")
+            f.truncate(end)
+            f.flush()
+            os.fsync(f.fileno())
+    return data[:end].decode("utf-8", errors="replace").splitlines()
+
+
+class MatchLog:
+    """
+    Match records for one event, indexed by MatchName.
+
+    Every change is appended to <EVENTCODE>_matchlog.jsonl and applied to the in-memory rows, so a
+    start or a commit costs O(1) however long the event day gets. Starts and results are fsynced
+    before they return, since the session state stops tracking them once they are in. The journal
+    is compacted to one line per row once it is mostly superseded updates.
+
+    The EXPORT_FORMATS files (CSV/TXT description, ...) are exports of the in-memory rows and are
+    never read back. Starts and commits only mark them stale; an ExportWorker rewrites them.
+    """
+
+    def __init__(self, event_code):
+        self.event_code = event_code
+        self.csv_file = f"{event_code}_YouTube_Description.csv"
+        self.journal_file = f"{event_code}_matchlog.jsonl"
+        self.rows = []
+        self.index = {}  # MatchName -> positions in self.rows (a replayed match has several rows)
+        self.journal_lines = 0
+        self.lock = threading.RLock()  # results from the fetch workers are applied off the dispatch thread
+        self.exports = ExportWorker(self, selected_exporters())
+        self._load()
+        self.journal = open(self.journal_file, 'a')
+
+    def _load(self):
+        if os.path.isfile(self.journal_file):
+            for line in read_journal(self.journal_file):
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    WriteLog(f"Skipping damaged match log line: {line.strip()}", level="warning")
+                self.journal_lines += 1
+        elif os.path.isfile(self.csv_file):
+            # First run with a match log: take over the rows an older version left in the CSV.
+            with open(self.csv_file, 'r', newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    self._apply({"op": "start", "row": row})
+            self._write_snapshot()
+        self.exports.schedule()
+
+    def _apply(self, entry):
+        if entry["op"] == "start":
+            row = {key: entry["row"].get(key, "") for key in CSV_FIELDNAMES}
+            self.index.setdefault(row["MatchName"], []).append(len(self.rows))
+            self.rows.append(row)
+        elif entry["op"] == "update":
+            for position in self.index.get(entry["name"], ()):
+                self.rows[position].update(entry["values"])
+
+    def _append(self, entry, sync=False):
+        self.journal.write(json.dumps(entry) + "\n")
+        self.journal.flush()
+        if sync:
+            os.fsync(self.journal.fileno())
+        self.journal_lines += 1
+        self._apply(entry)
+
+    def start(self, row):
+        """
+        Adds a row for a starting match.
+        """
+        with self.lock:
+            self._append({"op": "start", "row": row}, sync=True)
+            position = len(self.rows) - 1
+        self.exports.schedule([position])
+
+    def update(self, name, values, sync=False):
+        """
+        Updates every row for a match, fsynced if `sync`. Returns False (and writes nothing) if the
+        match has no row or nothing changed.
+        """
+        with self.lock:
+            positions = self.index.get(name)
+            if not positions:
+                return False
+            values = {key: "" if value is None else str(value) for key, value in values.items()}
+            if all(self.rows[p].get(key) == value for p in positions for key, value in values.items()):
+                return False
+            self._append({"op": "update", "name": name, "values": values}, sync)
+            if self.journal_lines > max(MATCH_LOG_COMPACT_MIN, 2 * len(self.rows)):
+                self.compact()
+        self.exports.schedule(positions)
+        return True
+
+    def count(self, name):
+        """
+        Number of rows for a match (more than one if it was replayed).
+        """
+        with self.lock:
+            return len(self.index.get(name, ()))
+
+    def names_without_teams(self):
+        with self.lock:
+            return [name for name, positions in self.index.items()
+                    if any(not self.rows[p]["Red1"] for p in positions)]
+
+    def names_without_scores(self):
+        with self.lock:
+            return [name for name, positions in self.index.items()
+                    if any(not self.rows[p]["RedFinal"] for p in positions)]
+
+    def _write_snapshot(self):
+        temp_file = self.journal_file + ".tmp"
+        with open(temp_file, 'w') as f:
+            for row in self.rows:
+                f.write(json.dumps({"op": "start", "row": row}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.journal_file)
+        self.journal_lines = len(self.rows)
+
+    def compact(self):
+        """
+        Rewrites the journal as one start line per row, dropping superseded updates.
+        """
+        with self.lock:
+            self.journal.close()
+            self._write_snapshot()
+            self.journal = open(self.journal_file, 'a')
+
+    def export(self):
+        """
+        Rewrites every export file now instead of after the debounce.
+        """
+        self.exports.write()
+
+    def close(self):
+        self.exports.close()
+        self.journal.close()
+
+
+match_logs = {}  # event code -> MatchLog, one per event however many sessions run
+match_log_lock = threading.Lock()
+
+
+def close_match_logs():
+    with match_log_lock:
+        for log in match_logs.values():
+            log.close()
+        match_logs.clear()
+
+
+def get_match_log(event_code=None):
+    """
+    The match log for an event (FTCSERVER_EVENTCODE if not given), opened on first use.
+    """
+    if event_code is None:
+        event_code = FTCSERVER_EVENTCODE
+    with match_log_lock:
+        log = match_logs.get(event_code)
+        if log is None:
+            log = match_logs[event_code] = MatchLog(event_code)
+        return log
+
+
+def match_details_url(session, number):
+    return f"http://{session.server}/api/v1/events/{session.event_code}/matches/{number}/"
+
+
+def match_list_url(session):
+    return f"http://{session.server}/api/v1/events/{session.event_code}/matches/"
+
+
+def record_match_start(session, shortName, outputDuration):
+    """
+    Adds a row for a starting match to the match log (its exports follow in the background).
+    outputDuration is the OBS stream duration in milliseconds.
+    """
+    try:
+        seconds = outputDuration / 1000.0
+        TimeStamp = time.strftime("%H:%M:%S", time.gmtime(seconds))
+    except Exception:
+        TimeStamp = "00:00:00"
+    new_row = {
+        "TimeStamp": TimeStamp,
+        "MatchName": shortName,
+        "Red1": "",
+        "Red2": "",
+        "Blue1": "",
+        "Blue2": "",
+        "RedFinal": "",
+        "BlueFinal": ""
+    }
+    teams = session.schedule.teams(shortName) if session.schedule is not None else None
+    if teams:
+        new_row.update(teams)
+    began = time.perf_counter()
+    log = get_match_log(session.event_code)
+    held, expired = None, ()
+    with log.lock:  # a result being held for this match is either seen here or applied by record_match_commit
+        log.start(new_row)
+        if session.state is not None:
+            held = session.state.row_written(shortName)
+            expired = session.state.expire_commits(shortName)
+    for name in expired:
+        WriteLog(f"Dropping the held result of {name}: its match start was never seen{session.suffix}",
+                 level="warning")
+    if held:
+        WriteLog(f"Applying the result of {shortName} that arrived before its match start{session.suffix}")
+        log.update(shortName, held, sync=True)
+        session.state.commit_applied(shortName)
+    observe_span("matchlog_start", time.perf_counter() - began)
+
+
+def record_match_commit(session, shortName, res):
+    """
+    Fills in final scores for a committed match from the scoring API response.
+    Teams normally come from the match schedule at MATCH_START; they are only taken from the
+    response when the schedule did not know the match.
+    """
+    values = {
+        "RedFinal": res.get("redScore", ""),
+        "BlueFinal": res.get("blueScore", "")
+    }
+    if session.schedule is None or not session.schedule.teams(shortName):
+        values.update({
+            "Red1": res.get("matchBrief", {}).get("red", {}).get("team1", ""),
+            "Red2": res.get("matchBrief", {}).get("red", {}).get("team2", ""),
+            "Blue1": res.get("matchBrief", {}).get("blue", {}).get("team1", ""),
+            "Blue2": res.get("matchBrief", {}).get("blue", {}).get("team2", "")
+        })
+    began = time.perf_counter()
+    log = get_match_log(session.event_code)
+    with log.lock:
+        if session.state is not None and not log.count(shortName):
+            # The MATCH_COMMIT overtook the MATCH_START (or the start is being replayed after a
+            # restart): keep the result until the row exists instead of dropping it.
+            WriteLog(f"Holding the result of {shortName} until its match starts{session.suffix}")
+            session.state.hold_commit(shortName, values)
+            return
+        log.update(shortName, values, sync=True)
+    if session.state is not None:
+        session.state.commit_applied(shortName)
+    observe_span("matchlog_commit", time.perf_counter() - began)
+
+
+# ==================================================
+#               Session State
+# ==================================================
+
+STATE_FSYNC_INTERVAL = 0.2  # seconds; state changes within this window share one write and one fsync
+STATE_COMPACT_LINES = 1000  # journal lines before it is rewritten as a single snapshot
+COMMIT_HOLD_LIMIT = 300  # seconds a result waits for its MATCH_START before it is dropped
+
+
+class SessionState:
+    """
+    What an event session needs to pick up where it left off after a crash or restart: the match
+    that is running, the match each field last showed, MATCH_STARTs whose match log row is not
+    written yet, MATCH_COMMITs whose scores are not in the match log yet, and the position in the
+    scorekeeper stream (frames seen and when the last one came).
+
+    Changes go to <EVENTCODE>_state.jsonl as one small line each. The callers only update memory;
+    a writer thread appends whatever changed every STATE_FSYNC_INTERVAL with a single fsync, keeping
+    only the latest value of each key, so the dispatch path never waits for the disk. A line torn
+    by a crash is cut off on load (see read_journal). The journal is compacted to one snapshot line
+    once it grows.
+    """
+
+    def __init__(self, event_code):
+        self.path = f"{event_code}_state.jsonl"
+        self.current = None  # {"name", "number", "field", "at"} of the last MATCH_START
+        self.fields = {}  # field -> {"name", "at"} of the last SHOW_MATCH on it
+        self.starts = {}  # shortName -> {"at", "rows"}: MATCH_STARTs whose row is not written yet
+        self.commits = {}  # shortName -> {"number", "values", "at"}: MATCH_COMMITs not in the match log yet
+        self.offset = {"frames": 0, "at": 0}  # scorekeeper frames seen, wall time of the last one
+        self.condition = threading.Condition()
+        self.pending = {}  # (key, name) -> value not written yet
+        self.lines = 0
+        self.closed = False
+        began = time.perf_counter()
+        self.restored = self._load()
+        self.load_ms = (time.perf_counter() - began) * 1000.0
+        self.file = open(self.path, 'a')
+        self.thread = threading.Thread(target=self._run, daemon=True, name="state-writer")
+        self.thread.start()
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return False
+        for line in read_journal(self.path):
+            try:
+                entry = json.loads(line)
+                if "snapshot" in entry:
+                    self.__dict__.update(entry["snapshot"])
+                else:
+                    self._apply(entry["key"], entry.get("name"), entry["value"])
+            except (ValueError, KeyError, TypeError):
+                WriteLog(f"Skipping damaged state line: {line.strip()}", level="warning")
+            self.lines += 1
+        return True
+
+    def _apply(self, key, name, value):
+        if name is None:
+            setattr(self, key, value)
+        elif value is None:
+            getattr(self, key).pop(name, None)
+        else:
+            getattr(self, key)[name] = value
+
+    def _set(self, key, name, value):
+        with self.condition:
+            self._apply(key, name, value)
+            if not self.pending:
+                self.condition.notify()
+            self.pending[(key, name)] = value
+
+    def _snapshot(self):
+        return {"current": self.current, "fields": self.fields, "starts": self.starts,
+                "commits": self.commits, "offset": self.offset}
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                pending, self.pending = self.pending, {}
+            self._write([{"key": key, "name": name, "value": value} if name is not None
+                         else {"key": key, "value": value} for (key, name), value in pending.items()])
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed, STATE_FSYNC_INTERVAL)
+
+    def _write(self, entries):
+        began = time.perf_counter()
+        try:
+            self.file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.lines += len(entries)
+            if self.lines > STATE_COMPACT_LINES:
+                self.compact()
+        except OSError as e:
+            WriteLog(f"Error writing {self.path}: {e}", level="error")
+        observe_span("state_write", time.perf_counter() - began)
+
+    def compact(self):
+        """
+        Rewrites the journal as one snapshot line. Only called from the writer thread.
+        """
+        with self.condition:
+            snapshot = json.dumps({"snapshot": self._snapshot()})
+        temp_file = self.path + ".tmp"
+        with open(temp_file, 'w') as f:
+            f.write(snapshot + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.file.close()
+        os.replace(temp_file, self.path)
+        self.file = open(self.path, 'a')
+        self.lines = 1
+
+    def frame_received(self):
+        self._set("offset", None, {"frames": self.offset["frames"] + 1, "at": time.time()})
+
+    def match_shown(self, field, shortName):
+        self._set("fields", field, {"name": shortName, "at": time.time()})
+
+    def match_started(self, shortName, number, field, rows):
+        """
+        A MATCH_START arrived; `rows` is how many match log rows the match had before it.
+        """
+        now = time.time()
+        self._set("current", None, {"name": shortName, "number": number, "field": field, "at": now})
+        self._set("starts", shortName, {"at": now, "rows": rows})
+
+    def row_written(self, shortName):
+        """
+        The match log row of a MATCH_START exists. Returns the result held for it, if any.
+        """
+        self._set("starts", shortName, None)
+        with self.condition:
+            return (self.commits.get(shortName) or {}).get("values")
+
+    def commit_received(self, shortName, number):
+        self._set("commits", shortName, {"number": number, "values": None})
+
+    def hold_commit(self, shortName, values):
+        with self.condition:
+            number = (self.commits.get(shortName) or {}).get("number")
+        self._set("commits", shortName, {"number": number, "values": values, "at": time.time()})
+
+    def expire_commits(self, started=None):
+        """
+        Drops held results whose MATCH_START was never seen (the switcher came up mid-match or
+        missed the frame): once another match `started`, or COMMIT_HOLD_LIMIT after they were held.
+        Results of starts still waiting for their row are kept. Returns the dropped shortNames.
+        """
+        now = time.time()
+        with self.condition:
+            expired = [name for name, commit in self.commits.items()
+                       if commit.get("values") is not None and name not in self.starts
+                       and ((started is not None and name != started)
+                            or now - commit.get("at", now) > COMMIT_HOLD_LIMIT)]
+        for name in expired:
+            self._set("commits", name, None)
+        return expired
+
+    def commit_applied(self, shortName):
+        self._set("commits", shortName, None)
+
+    def describe(self):
+        with self.condition:
+            parts = [f"current match {self.current['name']}" if self.current else "no match started",
+                     f"{len(self.starts)} unwritten start(s)", f"{len(self.commits)} pending commit(s)"]
+            if self.offset["at"]:
+                parts.append(f"last of {self.offset['frames']} frames {time.time() - self.offset['at']:.0f}s ago")
+        return ", ".join(parts)
+
+    def close(self):
+        """
+        Writes what is still pending and stops the writer.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout=5)
+        self.file.close()
+
+
+def open_session_state(session):
+    """
+    Loads the session's state file (or starts an empty one) and attaches it to the session.
+    """
+    session.state = SessionState(session.event_code)
+    get_match_log(session.event_code)  # opened (and its journal read) now rather than on the first MATCH_START
+    if session.state.restored:
+        WriteLog(f"Restored state{session.suffix} in {session.state.load_ms:.1f} ms: {session.state.describe()}")
+    return session.state
+
+
+def warm_restart_jobs(session, match_fetcher, stream_clock):
+    """
+    Bookkeeping jobs that reconcile a restored state: rows for MATCH_STARTs that never made it into
+    the match log (stamped with the stream time they arrived at), then a fresh fetch of every
+    pending MATCH_COMMIT, whose result is held until its row exists. Held results older than
+    COMMIT_HOLD_LIMIT are dropped instead. Returned as (job, *args) tuples
+    for the session's bookkeeping lane, so the rows are written before the results come back.
+    """
+    state = session.state
+    log = get_match_log(session.event_code)
+    for name in state.expire_commits():
+        WriteLog(f"Dropping the held result of {name}: its match start was never seen{session.suffix}",
+                 level="warning")
+    with state.condition:
+        starts = sorted(state.starts.items(), key=lambda item: item[1]["at"])
+        commits = [(name, commit["number"]) for name, commit in state.commits.items()]
+    jobs = []
+    for name, start in starts:
+        if log.count(name) > start["rows"]:
+            state.row_written(name)  # written just before the crash, only the state had not caught up
+        else:
+            WriteLog(f"Replaying the MATCH_START of {name} from the saved state{session.suffix}")
+            received_at = time.perf_counter() - (time.time() - start["at"])
+            jobs.append((record_stream_match_start, session, stream_clock, name, received_at))
+    for name, number in commits:
+        if number is not None:
+            jobs.append((match_fetcher.submit, session, number, name))
+    return jobs
+
+
+# ==================================================
+#               Match Data Fetching
+# ==================================================
+
+FETCH_WORKERS = 4
+FETCH_TIMEOUT = (3.05, 5)  # (connect, read) seconds
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.5  # seconds, doubled after every failed attempt
+
+
+class MatchFetcher:
+    """
+    Fetches match details from the scoring system on a small worker pool, so a slow scoring
+    server never holds up scene switching. All requests share one keep-alive requests.Session,
+    which every event session's MatchSchedule uses as well.
+
+    Fetches are coalesced per event and match number: a commit that arrives while the same match is
+    already being fetched does not start a second request, it just makes the running one fetch once
+    more when it finishes (the scorekeeper may have edited the result in between).
+    """
+
+    def __init__(self, on_result, workers=FETCH_WORKERS, connections=None):
+        import requests
+        self.on_result = on_result  # on_result(session, number, shortNames, response_json)
+        self.http = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=connections or workers)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="match-fetch")
+        self.lock = threading.Lock()
+        self.in_flight = {}  # (event code, number) -> {"session", "names": set of shortNames, "again": bool}
+        self.closed = False
+
+    def submit(self, session, number, shortName):
+        key = (session.event_code, number)
+        with self.lock:
+            job = self.in_flight.get(key)
+            if job is not None:
+                job["names"].add(shortName)
+                job["again"] = True
+                return
+            self.in_flight[key] = {"session": session, "names": {shortName}, "again": False}
+        self.pool.submit(self._run, key)
+
+    def get_json(self, url):
+        """
+        GET with timeout and retries with exponential backoff. Raises after the last attempt.
+        """
+        import requests
+        delay = FETCH_BACKOFF
+        for attempt in range(1, FETCH_RETRIES + 1):
+            try:
+                response = self.http.get(url, timeout=FETCH_TIMEOUT)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                if attempt == FETCH_RETRIES:
+                    raise
+                WriteLog(f"Fetching {url} failed ({e}), retrying in {delay:.1f}s", level="warning")
+                time.sleep(delay)
+                delay *= 2
+
+    def _run(self, key):
+        session, number = self.in_flight[key]["session"], key[1]
+        while True:
+            with self.lock:
+                job = self.in_flight[key]
+                job["again"] = False
+                names = set(job["names"])
+            try:
+                began = time.perf_counter()
+                url = match_details_url(session, number)
+                result = self.get_json(url)
+                observe_span("commit_fetch", time.perf_counter() - began)
+                if stream_recorder is not None:
+                    stream_recorder.record_http(url, result, session.name)
+                if self.closed:
+                    return  # the commit is still pending in the session state and is fetched again on restart
+                self.on_result(session, number, names, result)
+            except Exception as e:
+                WriteLog(f"Error fetching match {number}{session.suffix}: {e}", level="error")
+            with self.lock:
+                if not job["again"]:
+                    del self.in_flight[key]
+                    return
+
+    def close(self):
+        self.closed = True
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.http.close()
+
+
+def apply_match_details(session, number, shortNames, res):
+    for shortName in shortNames:
+        record_match_commit(session, shortName, res)
+
+
+# ==================================================
+#               Match Schedule Cache
+# ==================================================
+
+SCHEDULE_REFRESH = 30  # seconds between conditional re-fetches of the match list
+
+
+class MatchSchedule:
+    """
+    The event's match list from /api/v1/events/<code>/matches/, fetched with one bulk call at
+    startup and re-fetched in the background with If-None-Match / If-Modified-Since, so a refresh
+    that finds nothing new is a 304 with no body. Lets MATCH_START rows carry their teams right away.
+    """
+
+    def __init__(self, session, http, on_change=None):
+        self.session = session
+        self.on_change = on_change  # called with the schedule after the match list changed
+        self.http = http  # the MatchFetcher's requests.Session, shared by every event session
+        self.matches = {}  # shortName -> {"number", "field", "Red1", "Red2", "Blue1", "Blue2"}
+        self.next_field = {}  # shortName -> field of the match scheduled after it
+        self.etag = None
+        self.last_modified = None
+        self.wake_event = threading.Event()
+        self.after_refresh = collections.deque()  # callbacks for after the next successful refresh
+        self.stopped = False
+        self.thread = None
+
+    def refresh(self):
+        """
+        Re-fetches the match list if it changed. Returns True when new data was loaded.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        response = self.http.get(match_list_url(self.session), headers=headers, timeout=FETCH_TIMEOUT)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        body = response.json()
+        if stream_recorder is not None:
+            stream_recorder.record_http(response.url, body, self.session.name)
+        matches = {}
+        for entry in body.get("matches", []):
+            brief = entry.get("matchBrief", entry)
+            name = brief.get("matchName") or brief.get("shortName")
+            if not name:
+                continue
+            matches[name] = {
+                "number": brief.get("matchNumber"),
+                "field": str(brief.get("field", "")),
+                "Red1": str(brief.get("red", {}).get("team1", "")),
+                "Red2": str(brief.get("red", {}).get("team2", "")),
+                "Blue1": str(brief.get("blue", {}).get("team1", "")),
+                "Blue2": str(brief.get("blue", {}).get("team2", ""))
+            }
+        self.matches = matches
+        self.next_field = {name: following["field"]
+                           for name, following in zip(matches, list(matches.values())[1:])
+                           if following["field"] not in ("", "None")}
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        WriteLog(f"Match schedule loaded: {len(matches)} matches{self.session.suffix}")
+        return True
+
+    def teams(self, shortName):
+        """
+        {"Red1": ..., "Blue2": ...} for a scheduled match, or None.
+        """
+        match = self.matches.get(shortName)
+        if match is None or not match["Red1"]:
+            return None
+        return {key: match[key] for key in ("Red1", "Red2", "Blue1", "Blue2")}
+
+    def _run(self):
+        while True:
+            try:
+                changed = self.refresh()
+                if self.stopped:
+                    return
+                if changed and self.on_change is not None:
+                    self.on_change(self)
+                while self.after_refresh:
+                    self.after_refresh.popleft()(self)
+            except Exception as e:
+                WriteLog(f"Error fetching match schedule{self.session.suffix}: {e}", level="error")
+            self.wake_event.wait(SCHEDULE_REFRESH)
+            self.wake_event.clear()
+            if self.stopped:
+                return
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def refresh_now(self, then=None):
+        """
+        Re-fetches on the background thread right away instead of at the next SCHEDULE_REFRESH.
+        then(schedule), if given, runs on that thread once a refresh has succeeded (retried every
+        SCHEDULE_REFRESH while the scoring API is down), so the caller never waits for the fetch.
+        """
+        if then is not None:
+            self.after_refresh.append(then)
+        self.wake_event.set()
+
+    def stop(self):
+        self.stopped = True
+        self.wake_event.set()
+
+
+def fill_teams_from_schedule(schedule):
+    """
+    Rows that were started before the schedule knew their teams get them as soon as it does.
+    """
+    log = get_match_log(schedule.session.event_code)
+    for name in log.names_without_teams():
+        teams = schedule.teams(name)
+        if teams:
+            log.update(name, teams)
+
+
+def start_match_schedule(session, http):
+    session.schedule = MatchSchedule(session, http, on_change=fill_teams_from_schedule)
+    session.schedule.start()
+
+
+def stop_match_schedule(session):
+    if session.schedule is not None:
+        session.schedule.stop()
+
+
+# ==================================================
+#               Connection Supervision
+# ==================================================
+
+HEARTBEAT_INTERVAL = 2  # seconds of silence before the FTC stream is pinged / OBS gets a GetVersion
+HEARTBEAT_TIMEOUT = 5  # seconds without any answer before a connection is treated as dead
+RECONNECT_INITIAL = 0.25  # seconds, first reconnect delay after the immediate retry
+RECONNECT_MAX = 10  # seconds, longest reconnect delay
+
+
+def reconnect_delays():
+    """
+    Delays between reconnect attempts: one immediate retry, then exponential backoff capped at
+    RECONNECT_MAX, each delay jittered down to half so several clients do not retry in lockstep.
+    """
+    yield 0
+    delay = RECONNECT_INITIAL
+    while True:
+        yield random.uniform(delay / 2, delay)
+        delay = min(delay * 2, RECONNECT_MAX)
+
+
+class ConnectionHealth:
+    """
+    Outages and time-to-recover for every supervised connection ("FTC", "OBS <name>").
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.down_since = {}  # name -> monotonic time the outage began
+        self.recoveries = {}  # name -> [seconds each outage lasted]
+
+    def lost(self, name):
+        with self.lock:
+            self.down_since.setdefault(name, time.monotonic())
+
+    def recovered(self, name, attempts):
+        with self.lock:
+            began = self.down_since.pop(name, None)
+            if began is None:
+                return
+            seconds = time.monotonic() - began
+            self.recoveries.setdefault(name, []).append(seconds)
+        WriteLog(f"{name} connection recovered after {seconds:.2f}s ({attempts} attempt(s))")
+
+    def is_down(self, name):
+        return name in self.down_since
+
+    def summary(self):
+        """
+        {name: {"outages", "last", "max", "total"}} with times in seconds.
+        """
+        with self.lock:
+            return {name: {"outages": len(times), "last": times[-1], "max": max(times), "total": sum(times)}
+                    for name, times in self.recoveries.items()}
+
+    def log_summary(self):
+        for name, stats in self.summary().items():
+            WriteLog(f"{name}: {stats['outages']} outage(s), time to recover last {stats['last']:.2f}s, "
+                     f"max {stats['max']:.2f}s, total {stats['total']:.2f}s")
+
+
+connection_health = ConnectionHealth()
+
+
+def resync_after_ftc_reconnect(session, match_fetcher):
+    """
+    The scorekeeper stream has no replay, so whatever it sent while we were disconnected is gone.
+    Refresh the schedule and fetch scores for every logged qualification match that has none yet;
+    a MATCH_COMMIT missed during the outage is recovered this way (one that was not committed yet
+    is simply fetched again when its own MATCH_COMMIT arrives).
+    Returns at once: the fetches are made from the schedule thread after its refresh, so neither
+    the FTC reader nor the event loop ever waits for the scoring API.
+    """
+    schedule = session.schedule
+    if schedule is not None:
+        schedule.refresh_now(then=lambda schedule: fetch_missing_scores(session, schedule, match_fetcher))
+
+
+def fetch_missing_scores(session, schedule, match_fetcher):
+    for name in get_match_log(session.event_code).names_without_scores():
+        number = schedule.matches.get(name, {}).get("number")
+        if name.startswith("Q") and number is not None:
+            match_fetcher.submit(session, number, name)
+
+
+# ==================================================
+#               Latency Metrics
+# ==================================================
+
+# Spans recorded along the pipeline (seconds):
+#   ftc_queue        frame received -> picked up by the dispatcher
+#   parse            JSON decode of the frame
+#   dispatch         decoded -> handed to the OBS switch worker(s)
+#   obs_queue        waiting in an OBS switch queue
+#   obs_request      program+preview request sent -> OBS answered
+#   switch_total     frame received -> OBS confirmed the program scene
+#   commit_fetch     match-detail HTTP fetch for a MATCH_COMMIT (with retries)
+#   matchlog_start   / matchlog_commit: match log append (exports are marked stale, not written)
+#   export           regenerating the EXPORT_FORMATS files on the export worker
+#   bookkeeping_queue  MATCH_START/MATCH_COMMIT waiting in the bookkeeping lane
+#   recv_blocked / bookkeeping_blocked: time a full queue made its producer wait
+# Counters: switch_coalesced (a switch replaced by a newer one before OBS got it),
+# recv_backpressure / bookkeeping_backpressure (a producer found its queue full).
+# Queue depth high-water marks: recv, bookkeeping.
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram (100 us to ~70 s, sqrt(2) apart). Percentiles are interpolated inside
+    the bucket, which is well within the resolution anyone reads a latency summary at.
+    """
+
+    BUCKETS = tuple(0.0001 * 2 ** (i / 2) for i in range(40))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.BUCKETS, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        """
+        (counts, count, max) copied without the lock, for readers that must never hold up observe().
+        A copy taken in the middle of an observe() is one sample out at most.
+        """
+        return list(self.counts), self.count, self.max
+
+    def percentile(self, pct, snapshot=None):
+        if snapshot is None:
+            with self.lock:
+                counts, count, largest = list(self.counts), self.count, self.max
+        else:
+            counts, count, largest = snapshot
+        if not count:
+            return 0.0
+        rank = pct / 100.0 * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.BUCKETS[index - 1] if index else 0.0
+                upper = self.BUCKETS[index] if index < len(self.BUCKETS) else largest
+                return min(largest, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return largest
+
+
+class LatencyMetrics:
+    """
+    One LatencyHistogram per span name, plus the text formats they are reported in.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = collections.Counter()
+        self.session_counters = collections.Counter()  # (session name, "frames" / "switches") -> count
+        self.depth_max = {}
+        self.lock = threading.Lock()
+
+    def count(self, event, n=1):
+        with self.lock:
+            self.counters[event] += n
+
+    def count_session(self, session_name, kind):
+        with self.lock:
+            self.session_counters[(session_name, kind)] += 1
+
+    def queue_depth(self, name, depth):
+        if depth > self.depth_max.get(name, 0):
+            with self.lock:
+                self.depth_max[name] = max(depth, self.depth_max.get(name, 0))
+
+    def observe(self, span, seconds):
+        histogram = self.histograms.get(span)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(span, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def summary_line(self):
+        parts = [f"{span} {h.percentile(50) * 1000:.1f}/{h.percentile(95) * 1000:.1f}/"
+                 f"{h.percentile(99) * 1000:.1f} (n={h.count})"
+                 for span, h in sorted(self.histograms.items())]
+        line = "Latency p50/p95/p99 ms: " + (" | ".join(parts) if parts else "no samples yet")
+        if self.counters:
+            line += " | " + " ".join(f"{event}={n}" for event, n in sorted(self.counters.items()))
+        if self.depth_max:
+            line += " | max depth " + " ".join(f"{name}={n}" for name, n in sorted(self.depth_max.items()))
+        if self.session_counters:
+            line += " | sessions " + " ".join(f"{name}:{kind}={n}"
+                                               for (name, kind), n in sorted(self.session_counters.items()))
+        return line
+
+    def prometheus_text(self):
+        lines = ["# HELP ftc_switcher_span_seconds Time spent in each stage of the switcher pipeline.",
+                 "# TYPE ftc_switcher_span_seconds histogram"]
+        for span, h in sorted(self.histograms.items()):
+            with h.lock:
+                counts, count, total = list(h.counts), h.count, h.sum
+            cumulative = 0
+            for bound, bucket_count in zip(h.BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'ftc_switcher_span_seconds_bucket{{span="{span}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'ftc_switcher_span_seconds_bucket{{span="{span}",le="+Inf"}} {count}')
+            lines.append(f'ftc_switcher_span_seconds_sum{{span="{span}"}} {total:.6f}')
+            lines.append(f'ftc_switcher_span_seconds_count{{span="{span}"}} {count}')
+        lines += ["# HELP ftc_switcher_reconnects_total Outages recovered from, per connection.",
+                  "# TYPE ftc_switcher_reconnects_total counter"]
+        for name, stats in sorted(connection_health.summary().items()):
+            lines.append(f'ftc_switcher_reconnects_total{{connection="{name}"}} {stats["outages"]}')
+        lines += ["# HELP ftc_switcher_dispatch_events_total Coalesced switches and backpressure events.",
+                  "# TYPE ftc_switcher_dispatch_events_total counter"]
+        for event, n in sorted(self.counters.items()):
+            lines.append(f'ftc_switcher_dispatch_events_total{{event="{event}"}} {n}')
+        lines += ["# HELP ftc_switcher_queue_depth_max Deepest each dispatch queue has been.",
+                  "# TYPE ftc_switcher_queue_depth_max gauge"]
+        for name, n in sorted(self.depth_max.items()):
+            lines.append(f'ftc_switcher_queue_depth_max{{queue="{name}"}} {n}')
+        lines += ["# HELP ftc_switcher_session_events_total Scorekeeper frames and scene switches per event session.",
+                  "# TYPE ftc_switcher_session_events_total counter"]
+        for (name, kind), n in sorted(self.session_counters.items()):
+            lines.append(f'ftc_switcher_session_events_total{{session="{name}",kind="{kind}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+metrics_enabled = False
+latency_metrics = LatencyMetrics()
+metrics_server = None
+metrics_stop_event = threading.Event()
+
+
+def observe_span(span, seconds):
+    """
+    Records one span. Costs a global lookup and a return while metrics are off.
+    """
+    if metrics_enabled:
+        latency_metrics.observe(span, seconds)
+
+
+def count_event(event):
+    if metrics_enabled:
+        latency_metrics.count(event)
+
+
+def count_session_event(session, kind):
+    """
+    Per-session frame and switch counts, kept when several event sessions share the metrics.
+    """
+    if metrics_enabled and session.name:
+        latency_metrics.count_session(session.name, kind)
+
+
+def metrics_summary_job():
+    while not metrics_stop_event.wait(METRICS_SUMMARY_INTERVAL):
+        WriteLog(latency_metrics.summary_line())
+
+
+def start_metrics():
+    """
+    Turns recording on if METRICS_PORT or METRICS_SUMMARY_INTERVAL is set or the status window is
+    open, and starts the endpoint and the summary thread that were asked for.
+    """
+    global metrics_enabled, metrics_server, latency_metrics
+    if not METRICS_PORT and not METRICS_SUMMARY_INTERVAL and not status_board.running():
+        return
+    latency_metrics = LatencyMetrics()
+    metrics_stop_event.clear()
+    metrics_enabled = True
+    if METRICS_PORT:
+        import http.server
+
+        class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = latency_metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            metrics_server = http.server.ThreadingHTTPServer(("127.0.0.1", int(METRICS_PORT)), MetricsRequestHandler)
+            threading.Thread(target=metrics_server.serve_forever, daemon=True).start()
+            WriteLog(f"Latency metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as e:
+            WriteLog(f"[ERROR] Could not start the metrics endpoint on port {METRICS_PORT}: {e}", level="error")
+            metrics_server = None
+    if METRICS_SUMMARY_INTERVAL:
+        threading.Thread(target=metrics_summary_job, daemon=True).start()
+
+
+def stop_metrics():
+    global metrics_enabled, metrics_server
+    if not metrics_enabled:
+        return
+    metrics_enabled = False
+    metrics_stop_event.set()
+    if metrics_server is not None:
+        metrics_server.shutdown()
+        metrics_server.server_close()
+        metrics_server = None
+    WriteLog(latency_metrics.summary_line())
+
+
+# ==================================================
+#               Stream Recording
+# ==================================================
+
+class StreamRecorder:
+    """
+    Appends what the scorekeeper sends to a JSON-lines file with wall-clock timestamps:
+
+        {"t": 1741420800.123, "stream": "<raw websocket frame>"}
+        {"t": 1741420800.456, "http": "/api/v1/events/<code>/matches/12/", "body": {...}}
+
+    With several event sessions each line also names its session ("session": "<name>").
+    "pong" keepalives are left out. Each line is flushed as it is written, so a recording survives
+    the switcher being killed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+        self.lock = threading.Lock()
+
+    def _write(self, entry, session_name):
+        if session_name:
+            entry["session"] = session_name
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def record_frame(self, frame, session_name=""):
+        if frame != "pong":
+            self._write({"t": time.time(), "stream": frame}, session_name)
+
+    def record_http(self, url, body, session_name=""):
+        self._write({"t": time.time(), "http": urllib.parse.urlsplit(url).path, "body": body}, session_name)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+stream_recorder = None
+
+
+def start_stream_recording():
+    global stream_recorder
+    if RECORD_FILE:
+        stream_recorder = StreamRecorder(RECORD_FILE)
+        WriteLog(f"Recording the scorekeeper stream to {RECORD_FILE}")
+
+
+def stop_stream_recording():
+    global stream_recorder
+    if stream_recorder is not None:
+        stream_recorder.close()
+        stream_recorder = None
+
+
+# ==================================================
+#               Dispatch Scheduler
+# ==================================================
+
+# Scorekeeper frames are handled in two lanes. Scene switches (SHOW_PREVIEW / SHOW_MATCH) are the
+# priority lane: the loop reading the stream hands them straight to the OBS targets. Bookkeeping
+# (MATCH_START's stream-time lookup and match log row, MATCH_COMMIT's fetch) is the background lane:
+# it runs in arrival order on its own worker, so an OBS round trip or a file write is never in
+# front of a switch. Each OBS target only keeps the newest switch it has not started, so switches
+# superseded while OBS is busy are collapsed (see OBSTarget.submit).
+
+RECV_QUEUE_SIZE = 1024  # scorekeeper frames read but not yet dispatched; the reader waits when full
+BOOKKEEPING_QUEUE_SIZE = 256
+
+
+def put_with_backpressure(target_queue, item, lane, stop_event=None):
+    """
+    Puts on a bounded queue. If it is full, counts a "<lane>_backpressure" event and waits for room
+    (or for stop_event), recording the wait as the "<lane>_blocked" span.
+    """
+    try:
+        target_queue.put_nowait(item)
+    except queue.Full:
+        count_event(f"{lane}_backpressure")
+        blocked = time.perf_counter()
+        while stop_event is None or not stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=0.5)
+                break
+            except queue.Full:
+                pass
+        observe_span(f"{lane}_blocked", time.perf_counter() - blocked)
+    if metrics_enabled:
+        latency_metrics.queue_depth(lane, target_queue.qsize())
+
+
+class BookkeepingLane:
+    """
+    The thread engine's background lane: runs job(*args) one at a time, in the order submitted,
+    on a worker thread behind a queue of BOOKKEEPING_QUEUE_SIZE.
+    """
+
+    def __init__(self, size=BOOKKEEPING_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=size)
+        self.thread = threading.Thread(target=self._run, name="bookkeeping", daemon=True)
+        self.thread.start()
+
+    def submit(self, job, *args):
+        put_with_backpressure(self.queue, (time.perf_counter(), job, args), "bookkeeping")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            queued_at, job, args = item
+            observe_span("bookkeeping_queue", time.perf_counter() - queued_at)
+            try:
+                job(*args)
+            except Exception as e:
+                WriteLog(f"Error in {job.__name__}: {e}", level="error")
+
+    def close(self, timeout=5):
+        """
+        Finishes the jobs already queued, then stops the worker.
+        """
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+
+# ==================================================
+#               Event Sessions
+# ==================================================
+
+# Settings that belong to one event; an EVENTS_FILE entry can set any of them, the rest come from
+# the globals above.
+SESSION_SETTINGS = ("FTCSERVER_NAME", "FTCSERVER_EVENTCODE", "OBS_SERVERNAME", "OBS_WEBSOCKET_PORT",
+                    "OBS_WEBSOCKET_PASSWORD", "OBS_SCENENAME_FIELD1", "OBS_SCENENAME_FIELD2",
+                    "OBS_SCENENAME_FIELD3", "OBS_SCENENAME_FIELD4", "ROUTING_CONFIG_FILE")
+
+
+class EventSession:
+    """
+    One event (division) of a run: its settings, scorekeeper queues and match schedule. The main
+    loop, FTC stream, OBS targets and bookkeeping lane of a session only ever see its own frames.
+
+    Sessions share the log writer, the latency metrics, the connection health table, the match-detail
+    fetch pool with its keep-alive HTTP connections, and the match logs (one per event code).
+    """
+
+    def __init__(self, name="", settings=None):
+        self.name = name  # "" for the single session of a run without EVENTS_FILE
+        self.settings = {key: (settings or {}).get(key, globals()[key]) for key in SESSION_SETTINGS}
+        self.server = self.settings["FTCSERVER_NAME"]
+        self.event_code = self.settings["FTCSERVER_EVENTCODE"]
+        self.suffix = f" [{name}]" if name else ""  # appended to log lines and connection names
+        self.recv_queue = queue.Queue(maxsize=RECV_QUEUE_SIZE)
+        self.send_queue = queue.Queue()
+        self.schedule = None  # MatchSchedule, while the session runs
+        self.state = None  # SessionState, while the session runs
+        self.targets = {}  # OBS targets by name, while the session runs
+        self.bookkeeping = None  # its bookkeeping lane, while the session runs
+
+    def label(self, name):
+        return name + self.suffix
+
+    def stream_url(self):
+        return f"ws://{self.server}/api/v2/stream/?code={self.event_code}"
+
+
+event_sessions = []  # the sessions of the current (or last) run
+
+
+def load_event_sessions():
+    """
+    The sessions to run: one per event in EVENTS_FILE, or a single one from the globals. The file is JSON:
+
+        {"events": [{"name": "Edison", "FTCSERVER_EVENTCODE": "usmiedison", "OBS_SERVERNAME": "10.0.1.5"},
+                    {"name": "Franklin", "FTCSERVER_EVENTCODE": "usmifranklin",
+                     "ROUTING_CONFIG_FILE": "franklin_routing.json"}]}
+
+    Names and event codes must be unique. Raises OSError or ValueError for a file that cannot be used.
+    """
+    if not EVENTS_FILE:
+        return [EventSession()]
+    with open(EVENTS_FILE, 'r') as f:
+        events = json.load(f).get("events", [])
+    sessions = []
+    for i, entry in enumerate(events, 1):
+        unknown = sorted(set(entry) - set(SESSION_SETTINGS) - {"name"})
+        if unknown:
+            WriteLog(f"Events file: ignoring unknown settings {unknown} of event {i}", level="warning")
+        name = str(entry.get("name") or entry.get("FTCSERVER_EVENTCODE") or f"event{i}")
+        if any(session.name == name for session in sessions):
+            raise ValueError(f"{EVENTS_FILE}: more than one event is named '{name}'")
+        session = EventSession(name, entry)
+        # The match log and state file are per event code; one event on several OBS machines is
+        # a routing file (ROUTING_CONFIG_FILE), not a second session.
+        if any(other.event_code == session.event_code for other in sessions):
+            raise ValueError(f"{EVENTS_FILE}: more than one event has the event code '{session.event_code}'")
+        sessions.append(session)
+    if not sessions:
+        raise ValueError(f"{EVENTS_FILE} lists no events")
+    return sessions
+
+
+# ==================================================
+#               Field Routing
+# ==================================================
+
+# Each field maps to the OBS instance(s) that show it, the scene to put on program and the
+# scene to stage in preview next. Built once at startup so dispatching is a single dict lookup.
+# fixed_preview marks a preview set in the routing file, which PreviewLookahead leaves alone.
+FieldRoute = collections.namedtuple("FieldRoute", ["obs", "program_scene", "preview_scene", "fixed_preview"],
+                                    defaults=(False,))
+
+
+def load_field_routing(settings):
+    """
+    Returns (obs_servers, field_routes) for one event session's settings.
+
+    obs_servers: {name: {"host": ..., "port": ..., "password": ...}} in config order
+    field_routes: {field: [FieldRoute, ...]}
+
+    Without ROUTING_CONFIG_FILE this is one OBS named "main" with OBS_SCENENAME_FIELD1..4.
+    A routing file is JSON:
+
+        {
+          "obs": {"pc1": {"host": "10.0.0.5", "port": 4455, "password": ""},
+                  "pc2": {"host": "10.0.0.6"}},
+          "fields": {"1": {"obs": "pc1", "scene": "Field 1"},
+                     "5": [{"obs": "pc2", "scene": "Field 5", "preview": "Field 6"}]}
+        }
+
+    "preview" defaults to the scene of the next field (wrapping around) on the same OBS; while
+    running, PreviewLookahead replaces that default with the field the next match is on.
+    """
+    if settings["ROUTING_CONFIG_FILE"]:
+        with open(settings["ROUTING_CONFIG_FILE"], 'r') as f:
+            routing = json.load(f)
+        obs_servers = {name: {"host": server.get("host", ""),
+                              "port": server.get("port", 4455),
+                              "password": server.get("password", "")}
+                       for name, server in routing.get("obs", {}).items()}
+        field_entries = []
+        for field, entries in routing.get("fields", {}).items():
+            for entry in (entries if isinstance(entries, list) else [entries]):
+                field_entries.append((str(field), entry.get("obs", next(iter(obs_servers), "")),
+                                      entry.get("scene", ""), entry.get("preview")))
+    else:
+        obs_servers = {"main": {"host": settings["OBS_SERVERNAME"], "port": settings["OBS_WEBSOCKET_PORT"],
+                                "password": settings["OBS_WEBSOCKET_PASSWORD"]}}
+        scenes = [settings[f"OBS_SCENENAME_FIELD{i}"] for i in range(1, 5)]
+        field_entries = [(str(i + 1), "main", scene, None) for i, scene in enumerate(scenes) if scene]
+
+    def field_order(entry):
+        return (0, int(entry[0]), "") if entry[0].isdigit() else (1, 0, entry[0])
+
+    field_routes = {}
+    for obs_name in obs_servers:
+        on_obs = sorted((e for e in field_entries if e[1] == obs_name and e[2]), key=field_order)
+        for i, (field, _, scene, preview) in enumerate(on_obs):
+            next_scene = on_obs[(i + 1) % len(on_obs)][2]
+            field_routes.setdefault(field, []).append(FieldRoute(obs_name, scene, preview or next_scene,
+                                                                     bool(preview)))
+    for field, obs_name, _, _ in field_entries:
+        if obs_name not in obs_servers:
+            WriteLog(f"[ERROR] Field {field} is routed to unknown OBS '{obs_name}', ignoring it.", level="error")
+    return obs_servers, field_routes
+
+
+class PreviewLookahead:
+    """
+    Picks the preview staged with each switch: the scene of the field the next match will run on,
+    so the scorekeeper's next SHOW_MATCH is a cut to a scene already in preview. The next field
+    comes from the match schedule when it lists the current match (qualifications); otherwise
+    (playoffs, no schedule yet) it is the field on the same OBS that has gone longest without a
+    match, which is the fixed rotation for a round-robin event. Used by the dispatcher thread only.
+    """
+
+    def __init__(self, session, field_routes):
+        self.session = session
+        self.field_routes = field_routes
+        self.scene_of = {}  # (obs, field) -> program scene
+        self.fields_on = {}  # obs -> [field, ...]
+        for field, routes in field_routes.items():
+            for route in routes:
+                self.scene_of[(route.obs, field)] = route.program_scene
+                self.fields_on.setdefault(route.obs, []).append(field)
+        self.last_shown = {}  # field -> order in which it last went on program
+        self.shown_order = itertools.count()
+
+    def predict(self, field, shortName, obs):
+        """
+        The field expected after `shortName` (on `field`), or None when there is nothing to go on.
+        """
+        schedule = self.session.schedule
+        if schedule is not None:
+            next_field = schedule.next_field.get(shortName)
+            if next_field is not None:
+                return next_field
+        others = [f for f in self.fields_on.get(obs, ()) if f != field]
+        if others and all(f in self.last_shown for f in others):
+            return min(others, key=self.last_shown.get)
+        return None
+
+    def restore(self, fields):
+        """
+        Seeds the rotation from a restored SessionState.fields, oldest switch first.
+        """
+        for field, shown in sorted(fields.items(), key=lambda item: item[1]["at"]):
+            self.last_shown[field] = next(self.shown_order)
+
+    def routes(self, field, shortName):
+        """
+        The routes for a switch to `field`, each with its predicted preview. Records the switch.
+        """
+        self.last_shown[field] = next(self.shown_order)
+        staged = []
+        for route in self.field_routes.get(field, ()):
+            scene = None
+            if not route.fixed_preview:
+                scene = self.scene_of.get((route.obs, self.predict(field, shortName, route.obs)))
+            if scene and scene != route.program_scene and scene != route.preview_scene:
+                route = route._replace(preview_scene=scene)
+            staged.append(route)
+        return staged
+
+
+class OBSTarget:
+    """
+    One OBS instance for the thread engine: its connection, scene cache and a switch worker.
+    Every OBS has its own worker thread, so a slow OBS only delays its own switches.
+
+    A supervisor thread sends a GetVersion heartbeat whenever HEARTBEAT_INTERVAL passes and
+    reconnects with jittered backoff when the connection drops or stops answering. A switch that
+    could not be made while OBS was away is made once it is back.
+    """
+
+    def __init__(self, name, host, port, password):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.password = password
+        self.connection = None
+        self.connected = False
+        self.scene_state = OBSSceneState()
+        self.stream_clock = StreamClock()
+        self.next_switch = None  # newest switch the worker has not started; a newer one replaces it
+        self.switch_lock = threading.Lock()
+        self.switch_ready = threading.Event()
+        self.pending = None  # last switch submitted and not yet on program
+        self.lost_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.worker = None
+        self.supervisor = None
+
+    def connect(self):
+        self.connection = self._open()
+        self.connected = True
+        self.worker = threading.Thread(target=self._switch_worker, daemon=True)
+        self.worker.start()
+        self.supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self.supervisor.start()
+
+    def _open(self):
+        connection = Connect_OBS(self.host, self.port, self.password, self.scene_state, self.stream_clock)
+        connection.on_disconnect = self._on_disconnect
+        return connection
+
+    def _on_disconnect(self, connection):
+        self.scene_state.invalidate()
+        self.lost_event.set()
+
+    def submit(self, field, route, received_at=None):
+        """
+        Hands a switch to the worker. received_at is when the scorekeeper frame arrived (perf_counter).
+        OBS has one program scene, so a switch the worker has not started yet is replaced, not queued behind.
+        """
+        now = time.perf_counter()
+        item = (field, route, received_at or now, now)
+        with self.switch_lock:
+            if self.next_switch is not None:
+                count_event("switch_coalesced")
+            self.next_switch = item
+            self.pending = item
+            self.switch_ready.set()
+
+    def _switch_worker(self):
+        while True:
+            self.switch_ready.wait()
+            if self.stop_event.is_set():
+                break
+            with self.switch_lock:
+                self.switch_ready.clear()
+                item, self.next_switch = self.next_switch, None
+            if item is None:
+                continue
+            field, route, received_at, submitted_at = item
+            observe_span("obs_queue", time.perf_counter() - submitted_at)
+            if not self.connected:
+                WriteLog(f"OBS {self.name} is reconnecting; FIELD {field} will be switched once it is back", level="warning")
+                continue
+            # The preview is left out when OBS already has it staged.
+            preview_scene = route.preview_scene if self.scene_state.preview_scene != route.preview_scene else None
+            if self.scene_state.program_scene != route.program_scene:
+                Write_Host(f"Switching to FIELD {field} ({self.name})", stamped=True)
+                began = time.perf_counter()
+                program_ok, preview_ok = Set_OBSProgramAndPreview(self.connection, route.program_scene,
+                                                                  preview_scene)
+                answered = time.perf_counter()
+                observe_span("obs_request", answered - began)
+                if program_ok:
+                    observe_span("switch_total", answered - received_at)
+                    self.scene_state.program_scene = route.program_scene
+                if preview_ok:
+                    self.scene_state.preview_scene = route.preview_scene
+            else:
+                program_ok = True
+                Write_Host(f"Already on FIELD {field} ({self.name})", stamped=True)
+                # Only restage a preview OBS reported (Studio Mode on); the lookahead may have a better guess now.
+                if preview_scene and self.scene_state.preview_scene is not None:
+                    if Set_OBSCurrentPreviewScene(self.connection, preview_scene):
+                        self.scene_state.preview_scene = preview_scene
+            if program_ok and self.pending is item:
+                self.pending = None
+
+    def _alive(self):
+        recv_thread = self.connection.thread_recv
+        if recv_thread is None or not recv_thread.is_alive():
+            return False
+        try:
+            Call_OBSPipelined(self.connection, [obsrequests.GetVersion()], HEARTBEAT_TIMEOUT)
+            return True
+        except Exception as e:
+            WriteLog(f"OBS heartbeat failed ({self.name}): {e}", level="warning")
+            return False
+
+    def _supervise(self):
+        while True:
+            lost = self.lost_event.wait(HEARTBEAT_INTERVAL)
+            if self.stop_event.is_set():
+                return
+            if lost or not self._alive():
+                self._reconnect()
+
+    def _reconnect(self):
+        health_name = f"OBS {self.name}"
+        self.connected = False
+        self.scene_state.invalidate()
+        connection_health.lost(health_name)
+        WriteLog(f"OBS connection lost ({self.name}), reconnecting", level="warning")
+        try:
+            self.connection.disconnect()
+        except Exception:
+            pass
+        self.lost_event.clear()
+        for attempt, delay in enumerate(reconnect_delays(), 1):
+            if self.stop_event.wait(delay):
+                return
+            try:
+                self.connection = self._open()
+                break
+            except Exception as e:
+                WriteLog(f"{e} ({self.name}, attempt {attempt})")
+        self.connected = True
+        connection_health.recovered(health_name, attempt)
+        with self.switch_lock:
+            if self.pending is not None and self.next_switch is None:
+                WriteLog(f"Resuming FIELD {self.pending[0]} on OBS {self.name} after reconnect")
+                self.next_switch = self.pending
+                self.switch_ready.set()
+
+    def disconnect(self):
+        self.stop_event.set()
+        self.lost_event.set()
+        self.switch_ready.set()
+        if self.connection is not None:
+            self.connection.disconnect()
+
+
+# ==================================================
+#       FTC Websocket Client (Scorekeeper)
+# ==================================================
+
+client_id = str(uuid.uuid4())
+
+
+class FTCStream:
+    """
+    The scorekeeper stream of one event session for the thread engine. A reader thread puts every
+    frame on the session's recv_queue as (perf_counter when received, frame), sends "ping" whenever
+    the stream has been quiet for HEARTBEAT_INTERVAL and treats it as dead after HEARTBEAT_TIMEOUT
+    without even a "pong".
+    A dropped or dead stream is reconnected with jittered backoff and on_reconnect() is called
+    once it is back.
+    """
 
-OBS_SERVERNAME = ""
-OBS_WEBSOCKET_PASSWORD = ""
-OBS_WEBSOCKET_PORT = 4455  # Use an integer port
+    def __init__(self, session, ws, on_reconnect=None):
+        self.session = session
+        self.url = session.stream_url()
+        self.ws = ws
+        self.on_reconnect = on_reconnect
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def send(self, text):
+        self.ws.send(text)
+
+    def _read(self):
+        """
+        Reads until the connection drops or goes silent.
+        """
+        import websocket
+        self.ws.settimeout(HEARTBEAT_INTERVAL)
+        last_heard = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                jsonResult = self.ws.recv()
+            except websocket.WebSocketTimeoutException:
+                if time.monotonic() - last_heard > HEARTBEAT_TIMEOUT:
+                    WriteLog(f"FTC websocket silent for {HEARTBEAT_TIMEOUT}s{self.session.suffix}", level="warning")
+                    return
+                try:
+                    self.send("ping")
+                except Exception:
+                    return
+                continue
+            except Exception as e:
+                if not self.stop_event.is_set():
+                    WriteLog(f"FTC websocket connection lost{self.session.suffix}: {e}", level="warning")
+                return
+            if not jsonResult and not self.ws.connected:
+                return
+            last_heard = time.monotonic()
+            if jsonResult:
+                put_with_backpressure(self.session.recv_queue, (time.perf_counter(), jsonResult), "recv",
+                                      self.stop_event)
+                if stream_recorder is not None:
+                    stream_recorder.record_frame(jsonResult, self.session.name)
+
+    def _reconnect(self):
+        import websocket
+        health_name = self.session.label("FTC")
+        connection_health.lost(health_name)
+        WriteLog(f"Reconnecting to FTC websocket{self.session.suffix}...")
+        try:
+            self.ws.close(timeout=0.5)
+        except Exception:
+            pass
+        for attempt, delay in enumerate(reconnect_delays(), 1):
+            if self.stop_event.wait(delay):
+                return False
+            try:
+                self.ws = websocket.create_connection(self.url, timeout=HEARTBEAT_TIMEOUT)
+                break
+            except Exception as e:
+                WriteLog(f"Failed to connect to FTC WebSocket{self.session.suffix}: {e} (attempt {attempt})",
+                         level="error")
+        connection_health.recovered(health_name, attempt)
+        return True
 
-OBS_SCENENAME_FIELD2 = ""
-OBS_SCENENAME_FIELD1 = ""
-# If these are not set, the script proceeds as a 2-field event.
-OBS_SCENENAME_FIELD3 = ""
-OBS_SCENENAME_FIELD4 = ""
+    def _run(self):
+        while True:
+            self._read()
+            if self.stop_event.is_set() or not self._reconnect():
+                return
+            if self.on_reconnect is not None:
+                try:
+                    self.on_reconnect()
+                except Exception as e:
+                    WriteLog(f"Error resyncing after FTC reconnect: {e}", level="error")
+
+    def close(self):
+        self.stop_event.set()
+        try:
+            self.ws.close()
+        except Exception:
+            pass
 
-FTCSERVER_NAME = ""
-FTCSERVER_EVENTCODE = ""
+
+def ftc_send_job(stream):
+    """
+    This function runs in a thread and sends messages queued in the session's send_queue.
+    """
+    while True:
+        workitem = stream.session.send_queue.get()
+        if workitem is None:
+            break
+        try:
+            stream.send(workitem)
+        except Exception as e:
+            WriteLog(f"Error sending to FTC websocket: {e}", level="error")
 
 
 # ==================================================
-#               Helper Functions
+#       Asyncio Engine (optional)
 # ==================================================
 
-def WriteLog(LogString=""):
-    print(f"{time.strftime('%Y%m%d %H:%M:%S')} {LogString}")
+asyncio = None  # imported by import_asyncio() when ENGINE is "asyncio"; the thread engine never loads it
 
 
-def Write_Host(message):
-    print(message)
+def import_asyncio():
+    global asyncio
+    if asyncio is None:
+        import asyncio
 
 
-def test_connection(host, count=5):
+def build_obs_auth_string(password, salt, challenge):
     """
-    Simulates Test-Connection by pinging the host.
+    obs-websocket v5 authentication string (same scheme obs-websocket-py uses).
     """
-    try:
-        param = '-n' if os.name == 'nt' else '-c'
-        command = ['ping', param, str(count), host]
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return result.returncode == 0
-    except Exception:
-        return False
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode('utf-8')).digest())
+    return base64.b64encode(hashlib.sha256(secret + challenge.encode('utf-8')).digest()).decode('utf-8')
 
 
-# --------------------------------------------------
-# OBS functions using obs-websocket-py (synchronous)
-# --------------------------------------------------
-
-def Connect_OBS():
+class AsyncOBS:
     """
-    Connect to OBS using obs-websocket-py.
+    Minimal obs-websocket v5 client for the asyncio engine.
+    Responses are matched to requests by requestId, so several requests can be in flight at once
+    and nothing ever sleeps waiting for an answer.
     """
-    try:
-        port = OBS_WEBSOCKET_PORT if OBS_WEBSOCKET_PORT else 4455
-        connection = obsws(host=OBS_SERVERNAME, port=int(port), password=OBS_WEBSOCKET_PASSWORD)
-        connection.connect()
+
+    def __init__(self, host, port, password=""):
+        self.host = host
+        self.port = int(port) if port else 4455
+        self.password = password
+        self.ws = None
+        self.pending = {}
+        self.next_id = 1
+        self.recv_task = None
+        self.event_handlers = []
+
+    def add_event_handler(self, handler):
+        """
+        handler(eventType, eventData) is called on the event loop for every OBS event.
+        """
+        self.event_handlers.append(handler)
+
+    async def connect(self):
+        import websockets
+        try:
+            self.ws = await websockets.connect(f"ws://{self.host}:{self.port}", max_size=None,
+                                               ping_interval=None, close_timeout=1)
+            hello = json.loads(await self.ws.recv())
+            identify = {"rpcVersion": 1, "eventSubscriptions": 1023}
+            auth = hello.get("d", {}).get("authentication")
+            if auth:
+                identify["authentication"] = build_obs_auth_string(self.password, auth["salt"], auth["challenge"])
+            await self.ws.send(json.dumps({"op": 1, "d": identify}))
+            identified = json.loads(await self.ws.recv())
+            if identified.get("op") != 2:
+                raise Exception("Identify was rejected, the password may be incorrect.")
+        except Exception as e:
+            raise Exception(f"Failed to connect to OBS: {e}")
+        self.recv_task = asyncio.create_task(self._recv_loop())
         WriteLog("Connected to OBS!")
-        return connection
-    except Exception as e:
-        raise Exception(f"Failed to connect to OBS: {e}")
 
+    async def _recv_loop(self):
+        try:
+            async for message in self.ws:
+                data = json.loads(message)
+                if data.get("op") == 5:  # Event
+                    for handler in self.event_handlers:
+                        handler(data["d"].get("eventType"), data["d"].get("eventData", {}))
+                elif data.get("op") in (7, 9):  # RequestResponse / RequestBatchResponse
+                    future = self.pending.pop(data["d"].get("requestId"), None)
+                    if future and not future.done():
+                        future.set_result(data["d"])
+        except Exception as e:
+            WriteLog(f"OBS connection lost: {e}", level="warning")
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("OBS connection closed"))
+            self.pending.clear()
+
+    async def call(self, request_type, **request_data):
+        """
+        Sends one request and returns its responseData. Raises if OBS reports a failure.
+        """
+        request_id = str(self.next_id)
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await self.ws.send(json.dumps({
+            "op": 6,
+            "d": {"requestType": request_type, "requestId": request_id, "requestData": request_data}
+        }))
+        try:
+            response = await asyncio.wait_for(future, OBS_REQUEST_TIMEOUT)
+        finally:
+            self.pending.pop(request_id, None)
+        status = response.get("requestStatus", {})
+        if not status.get("result"):
+            raise Exception(f"{request_type} failed: {status.get('comment', status.get('code'))}")
+        return response.get("responseData", {})
+
+    async def call_batch(self, requests_list, execution_type=0, halt_on_failure=False):
+        """
+        Sends a RequestBatch. requests_list holds (requestType, requestData) pairs; execution_type is
+        0 (SerialRealtime), 1 (SerialFrame) or 2 (Parallel). Returns the per-request results in order.
+        """
+        request_id = str(self.next_id)
+        self.next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await self.ws.send(json.dumps({
+            "op": 8,
+            "d": {
+                "requestId": request_id,
+                "haltOnFailure": halt_on_failure,
+                "executionType": execution_type,
+                "requests": [{"requestType": name, "requestData": data} for name, data in requests_list]
+            }
+        }))
+        try:
+            response = await asyncio.wait_for(future, OBS_REQUEST_TIMEOUT)
+        finally:
+            self.pending.pop(request_id, None)
+        return response.get("results", [])
 
-def Get_OBSCurrentProgramScene(connection):
+    async def disconnect(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.recv_task is not None:
+            await self.recv_task
+
+
+class AsyncOBSTarget:
     """
-    Gets the current scene using GetCurrentScene().
+    One OBS instance for the asyncio engine, with its own switch queue and worker task
+    so a slow OBS only delays its own switches. A supervisor task heartbeats and reconnects
+    it the same way OBSTarget does for the thread engine.
     """
-    try:
-        response = connection.call(obsrequests.GetCurrentScene())
-        scene = response.getSceneName()  # Correct method to get the scene name
-        WriteLog(f"OBS Current Scene: '{scene}'")
-        return scene
-    except Exception as e:
-        WriteLog(f"Error getting current scene: {e}")
-        return ""
 
+    def __init__(self, name, host, port, password):
+        self.name = name
+        self.obs = AsyncOBS(host, port, password)
+        self.connected = False
+        self.scene_state = OBSSceneState()
+        self.obs.add_event_handler(self.scene_state.on_event)
+        self.stream_clock = StreamClock()
+        self.obs.add_event_handler(self.stream_clock.on_event)
+        self.next_switch = None  # newest switch the worker has not started; a newer one replaces it
+        self.switch_ready = asyncio.Event()
+        self.pending = None  # last switch submitted and not yet on program
+        self.worker = None
+        self.supervisor = None
+
+    async def connect(self):
+        await self.obs.connect()
+        await self.scene_state.resync_async(self.obs)
+        await self.stream_clock.resync_async(self.obs)
+        self.connected = True
+        self.worker = asyncio.create_task(self._switch_worker())
+        self.supervisor = asyncio.create_task(self._supervise())
+
+    def submit(self, field, route, received_at=None):
+        now = time.perf_counter()
+        item = (field, route, received_at or now, now)
+        if self.next_switch is not None:
+            count_event("switch_coalesced")
+        self.next_switch = item
+        self.pending = item
+        self.switch_ready.set()
+
+    async def _switch_worker(self):
+        while True:
+            await self.switch_ready.wait()
+            self.switch_ready.clear()
+            item, self.next_switch = self.next_switch, None
+            if item is None:
+                continue
+            field, route, received_at, submitted_at = item
+            observe_span("obs_queue", time.perf_counter() - submitted_at)
+            if not self.connected:
+                WriteLog(f"OBS {self.name} is reconnecting; FIELD {field} will be switched once it is back", level="warning")
+                continue
+            # The preview is left out when OBS already has it staged.
+            preview_scene = route.preview_scene if self.scene_state.preview_scene != route.preview_scene else None
+            if self.scene_state.program_scene == route.program_scene:
+                Write_Host(f"Already on FIELD {field} ({self.name})", stamped=True)
+                if self.pending is item:
+                    self.pending = None
+                if preview_scene and self.scene_state.preview_scene is not None:
+                    try:
+                        WriteLog(f"Setting OBS preview scene to: '{preview_scene}'")
+                        await self.obs.call("SetCurrentPreviewScene", sceneName=preview_scene)
+                        self.scene_state.preview_scene = preview_scene
+                    except Exception as e:
+                        WriteLog(f"Error setting preview scene to {preview_scene}: {e}", level="error")
+                continue
+            Write_Host(f"Switching to FIELD {field} ({self.name})", stamped=True)
+            try:
+                WriteLog(f"Setting OBS current scene to: '{route.program_scene}', "
+                         f"preview scene to: '{preview_scene}'")
+                requests_list = [("SetCurrentProgramScene", {"sceneName": route.program_scene})]
+                if preview_scene is not None:
+                    requests_list.append(("SetCurrentPreviewScene", {"sceneName": preview_scene}))
+                began = time.perf_counter()
+                program, *preview = await self.obs.call_batch(
+                    requests_list, execution_type=1 if OBS_BATCH_EXECUTION == "frame" else 0)
+                answered = time.perf_counter()
+                observe_span("obs_request", answered - began)
+                if program.get("requestStatus", {}).get("result"):
+                    observe_span("switch_total", answered - received_at)
+                    self.scene_state.program_scene = route.program_scene
+                    if self.pending is item:
+                        self.pending = None
+                else:
+                    WriteLog(f"Error setting current scene to {route.program_scene}: {program.get('requestStatus')}",
+                             level="error")
+                if preview and preview[0].get("requestStatus", {}).get("result"):
+                    self.scene_state.preview_scene = route.preview_scene
+                elif preview:
+                    WriteLog(f"Error setting preview scene to {preview_scene}: {preview[0].get('requestStatus')}",
+                             level="error")
+            except Exception as e:
+                WriteLog(f"Error switching to FIELD {field}: {e}", level="error")
+
+    async def _alive(self):
+        if self.obs.recv_task.done():
+            return False
+        try:
+            await asyncio.wait_for(self.obs.call("GetVersion"), HEARTBEAT_TIMEOUT)
+            return True
+        except Exception as e:
+            WriteLog(f"OBS heartbeat failed ({self.name}): {e!r}", level="warning")
+            return False
+
+    async def _supervise(self):
+        while True:
+            done, _ = await asyncio.wait({self.obs.recv_task}, timeout=HEARTBEAT_INTERVAL)
+            if done or not await self._alive():
+                await self._reconnect()
+
+    async def _reconnect(self):
+        health_name = f"OBS {self.name}"
+        self.connected = False
+        self.scene_state.invalidate()
+        connection_health.lost(health_name)
+        WriteLog(f"OBS connection lost ({self.name}), reconnecting", level="warning")
+        try:
+            await self.obs.disconnect()
+        except Exception:
+            pass
+        for attempt, delay in enumerate(reconnect_delays(), 1):
+            await asyncio.sleep(delay)
+            try:
+                await self.obs.connect()
+                break
+            except Exception as e:
+                WriteLog(f"{e} ({self.name}, attempt {attempt})")
+        await self.scene_state.resync_async(self.obs)
+        await self.stream_clock.resync_async(self.obs)
+        self.connected = True
+        connection_health.recovered(health_name, attempt)
+        if self.pending is not None and self.next_switch is None:
+            WriteLog(f"Resuming FIELD {self.pending[0]} on OBS {self.name} after reconnect")
+            self.next_switch = self.pending
+            self.switch_ready.set()
+
+    async def disconnect(self):
+        for task in (self.supervisor, self.worker):
+            if task is not None:
+                task.cancel()
+        await self.obs.disconnect()
+
+
+class AsyncFTCStream:
+    """
+    The scorekeeper stream for the asyncio engine, with the same heartbeat and reconnect rules
+    as FTCStream. messages() keeps yielding (perf_counter when received, frame) across reconnects
+    until close().
+    """
+
+    def __init__(self, session, on_reconnect=None):
+        self.session = session
+        self.url = session.stream_url()
+        self.ws = None
+        self.on_reconnect = on_reconnect
+        self.closed = asyncio.Event()
+
+    async def connect(self):
+        import websockets
+        self.ws = await websockets.connect(self.url, max_size=None, ping_interval=None, close_timeout=1)
+
+    async def _read(self):
+        loop = asyncio.get_running_loop()
+        last_heard = loop.time()
+        while not self.closed.is_set():
+            try:
+                message = await asyncio.wait_for(self.ws.recv(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                if loop.time() - last_heard > HEARTBEAT_TIMEOUT:
+                    WriteLog(f"FTC websocket silent for {HEARTBEAT_TIMEOUT}s{self.session.suffix}", level="warning")
+                    return
+                try:
+                    await self.ws.send("ping")
+                except Exception:
+                    return
+                continue
+            except Exception as e:
+                if not self.closed.is_set():
+                    WriteLog(f"FTC websocket connection lost{self.session.suffix}: {e}", level="warning")
+                return
+            last_heard = loop.time()
+            received_at = time.perf_counter()
+            if stream_recorder is not None:
+                stream_recorder.record_frame(message, self.session.name)
+            yield received_at, message
+
+    async def messages(self):
+        while True:
+            async for received in self._read():
+                yield received
+            if self.closed.is_set() or not await self._reconnect():
+                return
+            if self.on_reconnect is not None:
+                try:
+                    self.on_reconnect()
+                except Exception as e:
+                    WriteLog(f"Error resyncing after FTC reconnect: {e}", level="error")
+
+    async def _reconnect(self):
+        health_name = self.session.label("FTC")
+        connection_health.lost(health_name)
+        WriteLog(f"Reconnecting to FTC websocket{self.session.suffix}...")
+        try:
+            await self.ws.close()
+        except Exception:
+            pass
+        for attempt, delay in enumerate(reconnect_delays(), 1):
+            try:
+                await asyncio.wait_for(self.closed.wait(), delay)
+                return False
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.connect()
+                break
+            except Exception as e:
+                WriteLog(f"Failed to connect to FTC WebSocket{self.session.suffix}: {e} (attempt {attempt})",
+                         level="error")
+        connection_health.recovered(health_name, attempt)
+        return True
+
+    async def close(self):
+        self.closed.set()
+        if self.ws is not None:
+            await self.ws.close()
 
-def Set_OBSCurrentProgramScene(connection, SceneName):
+
+async def wait_for_exit_request(ftc_stream):
     """
-    Sets the current scene using SetCurrentScene.
+    Closes the FTC stream once shutdown is requested, which ends the receive loop.
     """
-    try:
-        WriteLog(f"Setting OBS current scene to: '{SceneName}'")
-        connection.call(obsrequests.SetCurrentProgramScene(sceneName=SceneName))
-    except Exception as e:
-        WriteLog(f"Error setting current scene to {SceneName}: {e}")
+    while not shutdown_event.is_set():
+        await asyncio.sleep(0.25)
+    WriteLog("Exit requested; breaking main loop.")
+    await ftc_stream.close()
 
 
-def Set_OBSCurrentPreviewScene(connection, SceneName):
+class AsyncBookkeepingLane:
     """
-    Sets the preview scene using SetCurrentPreviewScene.
-    (Note: This only works if OBS is in Studio Mode.)
+    The asyncio engine's background lane (see Dispatch Scheduler): runs job(*args), awaiting it if
+    it is a coroutine, one at a time in the order submitted, behind a queue of BOOKKEEPING_QUEUE_SIZE.
     """
-    try:
-        WriteLog(f"Setting OBS preview scene to: '{SceneName}'")
-        connection.call(obsrequests.SetCurrentPreviewScene(sceneName=SceneName))
-    except Exception as e:
-        WriteLog(f"Error setting preview scene to {SceneName}: {e}")
 
+    def __init__(self, size=BOOKKEEPING_QUEUE_SIZE):
+        self.queue = asyncio.Queue(maxsize=size)
+        self.task = asyncio.create_task(self._run())
 
-def Get_OBSStreamStatus(connection):
+    async def submit(self, job, *args):
+        item = (time.perf_counter(), job, args)
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            count_event("bookkeeping_backpressure")
+            blocked = time.perf_counter()
+            await self.queue.put(item)
+            observe_span("bookkeeping_blocked", time.perf_counter() - blocked)
+        if metrics_enabled:
+            latency_metrics.queue_depth("bookkeeping", self.queue.qsize())
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            queued_at, job, args = item
+            observe_span("bookkeeping_queue", time.perf_counter() - queued_at)
+            try:
+                result = job(*args)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                WriteLog(f"Error in {job.__name__}: {e}", level="error")
+
+    async def close(self, timeout=5):
+        """
+        Finishes the jobs already queued, then stops the task.
+        """
+        try:
+            await asyncio.wait_for(self.queue.put(None), timeout)
+            await asyncio.wait_for(self.task, timeout)
+        except asyncio.TimeoutError:
+            self.task.cancel()
+
+
+async def connect_async_targets(session, obs_servers):
     """
-    Gets the OBS stream status.
-    Returns a dictionary with 'outputDuration' in milliseconds.
+    Connects to every configured OBS at once. OBS instances that fail are logged and left out.
+    """
+    targets = {name: AsyncOBSTarget(session.label(name), **server) for name, server in obs_servers.items()}
+    results = await asyncio.gather(*(target.connect() for target in targets.values()), return_exceptions=True)
+    for (name, target), result in zip(list(targets.items()), results):
+        if isinstance(result, Exception):
+            WriteLog(f"{result} ({target.name})")
+            del targets[name]
+    return targets
 
-    Updated: Uses the getter method getOutputDuration() (if available) to retrieve the stream duration.
+
+async def run_session_async(session, match_fetcher):
+    """
+    One event session on the event loop: connects its FTC stream and OBS, then handles its frames
+    as soon as they arrive until shutdown. There are no fixed sleeps on the hot path.
     """
+    check_field_config(session.settings)
+    obs_servers, field_routes = load_field_routing(session.settings)
+    preflight = Preflight(session, obs_servers)
+    state = open_session_state(session)
+
+    # OBS and the FTC stream are connected at the same time, alongside the preflight probes.
+    Write_Host(f"Connecting to FTC websocket{session.suffix}...")
+    ftc_stream = AsyncFTCStream(session, on_reconnect=lambda: resync_after_ftc_reconnect(session, match_fetcher))
+    targets, ftc_connected = await asyncio.gather(connect_async_targets(session, obs_servers), ftc_stream.connect(),
+                                                  return_exceptions=True)
+    await asyncio.to_thread(preflight.report)
+    if isinstance(ftc_connected, Exception):
+        WriteLog(f"Failed to connect to FTC WebSocket{session.suffix}: {ftc_connected}", level="error")
+    else:
+        Write_Host(f"Connected to FTC websocket{session.suffix}!")
+    if not targets or isinstance(ftc_connected, Exception):
+        await ftc_stream.close()
+        for target in targets.values():
+            await target.disconnect()
+        state.close()
+        return
+
+    start_match_schedule(session, match_fetcher.http)
+    bookkeeping = AsyncBookkeepingLane()
+    lookahead = PreviewLookahead(session, field_routes)
+    session.targets, session.bookkeeping = targets, bookkeeping
+    stream_clock = next(iter(targets.values())).stream_clock  # the first OBS's stream times the match log
+    if state.restored:
+        lookahead.restore(state.fields)
+        for job in warm_restart_jobs(session, match_fetcher, stream_clock):
+            await bookkeeping.submit(*job)
+        await bookkeeping.submit(resync_after_ftc_reconnect, session, match_fetcher)
+    exit_watcher = asyncio.create_task(wait_for_exit_request(ftc_stream))
+    WriteLog(f"Code is Running{session.suffix}")
+
     try:
-        response = connection.call(obsrequests.GetStreamStatus())
-        duration = response.getOutputDuration() if hasattr(response, 'getOutputDuration') else 0
-        return {"outputDuration": duration}
+        async for received_at, msg in ftc_stream.messages():
+            try:
+                pending = handle_ftc_message(session, msg, received_at, targets, lookahead, stream_clock,
+                                             match_fetcher, bookkeeping.submit)
+                if pending is not None:
+                    await pending
+            except Exception as e:
+                WriteLog(f"Error in main loop{session.suffix}: {e}", level="error")
     except Exception as e:
-        WriteLog(f"Error getting OBS stream status: {e}")
-        return {"outputDuration": 0}
+        WriteLog(f"FTC websocket closed{session.suffix}: {e}")
+    finally:
+        exit_watcher.cancel()
+        Write_Host(f"Closing FTC WS connection{session.suffix}")
+        try:
+            await ftc_stream.close()
+        except Exception:
+            pass
+        await bookkeeping.close()
+        Write_Host(f"Disconnecting from OBS{session.suffix}")
+        for target in targets.values():
+            try:
+                await target.disconnect()
+            except Exception:
+                pass
+        stop_match_schedule(session)
+        session.targets, session.bookkeeping = {}, None
+        state.close()
 
 
-def generate_youtube_description():
+async def main_async(sessions):
     """
-    Reads the CSV file and generates a YouTube description in a TXT file.
+    Same handling as main(), but every session's FTC stream, OBS connections and bookkeeping lane
+    run on one event loop. Scoring API requests still use requests on threads (MatchFetcher's pool
+    and each MatchSchedule), as do the state, export and log writers.
     """
-    csv_file = f"{FTCSERVER_EVENTCODE}_YouTube_Description.csv"
-    txt_file = f"{FTCSERVER_EVENTCODE}_YouTube_Description.txt"
-    if not os.path.isfile(csv_file):
+    if importlib.util.find_spec("websockets") is None:  # AsyncOBS and AsyncFTCStream import it when they connect
+        WriteLog("[ERROR] The asyncio engine needs the 'websockets' package (pip install websockets).", level="error")
         return
-    with open(csv_file, 'r', newline='') as csvfile:
-        reader = csv.DictReader(csvfile)
-        rows = list(reader)
-    with open(txt_file, 'w') as txtfile:
-        for row in rows:
-            txtfile.write(f"Match: {row.get('MatchName', '')}\n")
-            txtfile.write(f"Time: {row.get('TimeStamp', '')}\n")
-            txtfile.write(
-                f"Red Alliance: {row.get('Red1', '')} & {row.get('Red2', '')} - Score: {row.get('RedFinal', '')}\n")
-            txtfile.write(
-                f"Blue Alliance: {row.get('Blue1', '')} & {row.get('Blue2', '')} - Score: {row.get('BlueFinal', '')}\n")
-            txtfile.write("-----------------------------\n")
+
+    match_fetcher = start_shared_services(sessions)
+    try:
+        results = await asyncio.gather(*(run_session_async(session, match_fetcher) for session in sessions),
+                                       return_exceptions=True)
+        for session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                WriteLog(f"Session stopped{session.suffix}: {result!r}", level="error")
+    finally:
+        stop_shared_services(match_fetcher)
 
 
 # ==================================================
-#       FTC Websocket Client (Scorekeeper)
+#               Scorekeeper Messages
 # ==================================================
 
-from obswebsocket import obsws, requests as obsrequests
+# The updateTypes the main loops act on. Everything else (MATCH_LOAD, MATCH_POST, MATCH_ABORT,
+# SHOW_RANDOM, ...) is dropped by parse_ftc_message as soon as it is decoded.
+FTC_UPDATE_TYPES = frozenset({"SHOW_PREVIEW", "SHOW_MATCH", "MATCH_START", "MATCH_COMMIT"})
 
-recv_queue = queue.Queue()
-send_queue = queue.Queue()
-client_id = str(uuid.uuid4())
+json_loads = None  # orjson.loads if orjson is installed, else json.loads; set by import_json_decoder()
+
+
+def import_json_decoder():
+    global json_loads
+    if json_loads is None:
+        try:
+            from orjson import loads as json_loads
+        except ImportError:
+            json_loads = json.loads
+    return json_loads
 
 
-def ftc_recv_job(ws):
+class FTCMessage:
     """
-    This function runs in a thread and continually receives messages from the FTC websocket.
+    A scorekeeper frame the main loops act on, holding only the fields they read.
     """
-    while True:
-        try:
-            jsonResult = ws.recv()
-            if jsonResult:
-                recv_queue.put(jsonResult)
-        except Exception:
-            break
-        time.sleep(0.01)
+    __slots__ = ("updateType", "shortName", "field", "number")
 
+    def __init__(self, updateType, shortName, field, number):
+        self.updateType = updateType
+        self.shortName = shortName
+        self.field = field
+        self.number = number
 
-def ftc_send_job(ws):
+
+def parse_ftc_message(msg):
     """
-    This function runs in a thread and sends messages queued in send_queue.
+    Decodes a scorekeeper websocket frame into an FTCMessage, with shortName and field as strings.
+    Returns None for keepalives, bad frames and updateTypes outside FTC_UPDATE_TYPES.
     """
-    while True:
-        try:
-            workitem = send_queue.get(timeout=1)
-            ws.send(workitem)
-        except queue.Empty:
-            continue
-        except Exception:
-            break
+    if msg == "pong":
+        return None
+
+    try:
+        message_obj = json_loads(msg)
+    except Exception:
+        WriteLog(f"Error converting message to JSON: {msg}", level="error")
+        return None
+
+    WriteLog("Received message: %s", msg, level="debug")
+    updateType = message_obj.get("updateType") if isinstance(message_obj, dict) else None
+    if not isinstance(updateType, str) or updateType not in FTC_UPDATE_TYPES:
+        return None
+    payload = message_obj.get("payload") or {}
+    if not isinstance(payload, dict):
+        WriteLog(f"Ignoring {updateType} without a payload object: {msg}", level="warning")
+        return None
+    shortName = payload.get("shortName")
+    shortName = "" if shortName is None else str(shortName)
+    field = payload.get("field")
+    field = "" if field is None else str(field)
+
+    WriteLog("updateType: %s, shortName: %s, field: %s", updateType, shortName, field)
+    return FTCMessage(updateType, shortName, field, payload.get("number"))
+
+
+def handle_ftc_message(session, msg, received_at, targets, lookahead, stream_clock, match_fetcher,
+                       submit_bookkeeping):
+    """
+    Decodes and acts on one scorekeeper frame for either engine. Switches go to the session's OBS
+    targets (each engine's target.submit queues them); MATCH_START and MATCH_COMMIT are handed to
+    submit_bookkeeping(job, *args), the engine's bookkeeping lane. Returns what submit_bookkeeping
+    returned, or None: the asyncio lane returns a coroutine, which its loop awaits.
+    """
+    dequeued = time.perf_counter()
+    observe_span("ftc_queue", dequeued - received_at)
+    message = parse_ftc_message(msg)
+    parsed_at = time.perf_counter()
+    observe_span("parse", parsed_at - dequeued)
+    if message is None:
+        return None
+    count_session_event(session, "frames")
+    session.state.frame_received()
+    updateType, shortName, field = message.updateType, message.shortName, message.field
+
+    if updateType in ["SHOW_PREVIEW", "SHOW_MATCH"]:
+        if not shortName.startswith("F-"):
+            for route in lookahead.routes(field, shortName):
+                target = targets.get(route.obs)
+                if target is not None:
+                    target.submit(field, route, received_at)
+            observe_span("dispatch", time.perf_counter() - parsed_at)
+            count_session_event(session, "switches")
+            if updateType == "SHOW_MATCH":
+                session.state.match_shown(field, shortName)
+    elif updateType == "MATCH_START":
+        if not shortName.startswith("T-"):
+            session.state.match_started(shortName, message.number, field,
+                                        get_match_log(session.event_code).count(shortName))
+            return submit_bookkeeping(record_stream_match_start, session, stream_clock, shortName, received_at)
+    elif updateType == "MATCH_COMMIT":
+        if shortName.startswith("Q"):
+            session.state.commit_received(shortName, message.number)
+            return submit_bookkeeping(match_fetcher.submit, session, message.number, shortName)
+    return None
 
 
 # ==================================================
-#               Main Script
+#               Status Board
 # ==================================================
 
-def main():
-    global exit_requested
+STATUS_REFRESH = 0.5  # seconds between status snapshots, and between status window updates
+
+
+def queue_length(pending):
+    """
+    Items waiting on a queue.Queue or asyncio.Queue, read without the queue's lock
+    (queue.Queue.qsize takes the mutex its consumer's get() needs).
+    """
+    return len(pending.queue) if isinstance(pending, queue.Queue) else pending.qsize()
+
+
+class StatusBoard:
+    """
+    What the status window shows. A publisher thread samples the running sessions every
+    STATUS_REFRESH and replaces `latest` with a new snapshot, which is never changed afterwards;
+    readers take `latest` and need no lock.
+
+    Sampling only reads attributes and copies dicts and deque lengths. It takes none of the locks
+    the engines take (not even the session state or metrics locks), so the window can never hold
+    up a switch. The copies are not all from one instant: a snapshot can be a frame or a sample
+    out, which nobody reading a display refreshed twice a second will notice.
+    """
+
+    def __init__(self):
+        self.latest = None  # newest snapshot (see sample), replaced whole
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        self.stop_event.clear()
+        self.publish()
+        self.thread = threading.Thread(target=self._run, daemon=True, name="status-board")
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(STATUS_REFRESH):
+            try:
+                self.publish()
+            except Exception as e:
+                WriteLog(f"Error sampling the status board: {e}", level="error")
+
+    def publish(self):
+        self.latest = self.sample()
+
+    def sample(self):
+        """
+        {"at", "sessions": [see sample_session], "down": {connection: seconds down so far},
+        "outages": {connection: outages recovered from}, "latency": switch_total in ms as
+        {"n", "p50", "p95", "p99", "max"}, or None before the first switch}
+        """
+        now = time.monotonic()
+        latency = None
+        histogram = latency_metrics.histograms.get("switch_total") if metrics_enabled else None
+        if histogram is not None and histogram.count:
+            snapshot = histogram.snapshot()
+            latency = {"n": snapshot[1], "max": snapshot[2] * 1000.0}
+            for pct in (50, 95, 99):
+                latency[f"p{pct}"] = histogram.percentile(pct, snapshot) * 1000.0
+        health = connection_health
+        return {"at": time.time(),
+                "sessions": [self.sample_session(session) for session in list(event_sessions)],
+                "down": {name: now - began for name, began in dict(health.down_since).items()},
+                "outages": {name: len(times) for name, times in dict(health.recoveries).items()},
+                "latency": latency}
+
+    @staticmethod
+    def sample_session(session):
+        """
+        One session: the match it last started, the match each field last showed, its OBS scenes,
+        frames seen, queue depths and unfinished bookkeeping.
+        """
+        sampled = {"name": session.name or session.event_code, "running": bool(session.targets),
+                   "current": None, "fields": {}, "frames": 0, "last_frame_at": None,
+                   "unwritten_starts": 0, "pending_commits": 0,
+                   "recv_queue": queue_length(session.recv_queue),
+                   "bookkeeping_queue": 0, "targets": []}
+        bookkeeping = session.bookkeeping
+        if bookkeeping is not None:
+            sampled["bookkeeping_queue"] = queue_length(bookkeeping.queue)
+        for target in list(session.targets.values()):
+            sampled["targets"].append({"name": target.name, "connected": target.connected,
+                                       "program": target.scene_state.program_scene,
+                                       "preview": target.scene_state.preview_scene,
+                                       "waiting": target.next_switch is not None})
+        state = session.state
+        if state is not None:
+            offset = state.offset  # replaced whole on every frame, like current
+            sampled.update(current=state.current, frames=offset["frames"], last_frame_at=offset["at"] or None,
+                           fields={field: shown["name"] for field, shown in dict(state.fields).items()},
+                           unwritten_starts=len(state.starts), pending_commits=len(state.commits))
+        return sampled
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+
+status_board = StatusBoard()
+
+
+def format_status(snapshot):
+    """
+    The status window's text for a StatusBoard snapshot.
+    """
+    if snapshot is None:
+        return "Starting..."
+    now = snapshot["at"]
+    lines = []
+    for session in snapshot["sessions"]:
+        header = f"{session['name'] or 'Event'}: " + ("running" if session["running"] else "not connected")
+        current = session["current"]
+        if current:
+            header += (f", {current['name']} started on field {current['field']} "
+                       f"{now - current['at']:.0f}s ago")
+        lines.append(header)
+        for target in session["targets"]:
+            if target["connected"]:
+                scenes = f"program {target['program'] or '?'}, preview {target['preview'] or '?'}"
+            else:
+                scenes = "reconnecting"
+            lines.append(f"  OBS {target['name']}: {scenes}" + (", switch waiting" if target["waiting"] else ""))
+        if session["fields"]:
+            lines.append("  Last shown: " + "  ".join(f"field {field} {name}"
+                                                      for field, name in sorted(session["fields"].items())))
+        heard = f", last {now - session['last_frame_at']:.0f}s ago" if session["last_frame_at"] else ""
+        lines.append(f"  {session['frames']} frames{heard}; queued {session['recv_queue']} frame(s), "
+                     f"{session['bookkeeping_queue']} bookkeeping job(s); {session['unwritten_starts']} "
+                     f"unwritten start(s), {session['pending_commits']} pending commit(s)")
+    down = ", ".join(f"{name} down {seconds:.0f}s" for name, seconds in sorted(snapshot["down"].items()))
+    outages = sum(snapshot["outages"].values())
+    lines.append(f"Connections: {down or 'all up'}" + (f" ({outages} outage(s) recovered)" if outages else ""))
+    latency = snapshot["latency"]
+    if latency:
+        lines.append(f"Switch latency: p50 {latency['p50']:.0f} / p95 {latency['p95']:.0f} / "
+                     f"p99 {latency['p99']:.0f} ms, max {latency['max']:.0f} ms ({latency['n']} switches)")
+    else:
+        lines.append("Switch latency: no switches yet")
+    return "\n".join(lines)
+
+
+# ==================================================
+#               Main Script
+# ==================================================
 
-    if OBS_SCENENAME_FIELD3 is None:
+def check_field_config(settings):
+    if settings["OBS_SCENENAME_FIELD3"] is None:
         errorMessage = "[ERROR] OBS_SCENENAME_FIELD3 is NOT set! Proceeding as 2 field event."
-        WriteLog(errorMessage)
+        WriteLog(errorMessage, level="error")
         Write_Host(errorMessage)
-    if (OBS_SCENENAME_FIELD3 is not None) and (OBS_SCENENAME_FIELD4 is None):
+    if (settings["OBS_SCENENAME_FIELD3"] is not None) and (settings["OBS_SCENENAME_FIELD4"] is None):
         errorMessage = "[ERROR] OBS_SCENENAME_FIELD4 is NOT set! Proceeding as 3 field event."
-        WriteLog(errorMessage)
+        WriteLog(errorMessage, level="error")
         Write_Host(errorMessage)
 
-    if not test_connection(OBS_SERVERNAME):
+
+def report_connection_tests(obs_ok, ftc_ok):
+    if not obs_ok:
         errorMessage = "[ERROR] Unable to connect to OBS, please check the IP or your network connection."
-        WriteLog(errorMessage)
+        WriteLog(errorMessage, level="error")
         Write_Host(errorMessage)
-    if not test_connection(FTCSERVER_NAME):
+    if not ftc_ok:
         errorMessage = "[ERROR] Unable to connect to the FTC Scoring system. Please check the IP or your network connection."
-        WriteLog(errorMessage)
+        WriteLog(errorMessage, level="error")
         Write_Host(errorMessage)
 
+
+def connect_obs_targets(session, obs_servers):
+    """
+    Connects to every configured OBS in parallel. OBS instances that fail are logged and left out.
+    """
+    targets = {name: OBSTarget(session.label(name), **server) for name, server in obs_servers.items()}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        futures = {name: pool.submit(target.connect) for name, target in targets.items()}
+    for name, future in futures.items():
+        if future.exception() is not None:
+            WriteLog(f"{future.exception()} ({targets[name].name})")
+            del targets[name]
+    return targets
+
+
+def record_stream_match_start(session, stream_clock, shortName, received_at):
+    """
+    MATCH_START bookkeeping: the match log row, stamped with the stream time at which the frame was
+    received (perf_counter), from the stream OBS's StreamClock. No OBS request is made.
+    """
+    record_match_start(session, shortName, stream_clock.stream_time_ms(received_at))
+
+
+def request_shutdown(signum=None, frame=None):
+    """
+    Stops both engines' main loops. Used by the Exit button and as the SIGINT/SIGTERM handler.
+    """
+    shutdown_event.set()
+
+
+def start_shared_services(sessions):
+    """
+    What every event session of a run shares: stream recording, latency metrics and the match-detail
+    fetch pool, whose keep-alive HTTP connections the sessions' schedules use as well.
+    Returns the MatchFetcher.
+    """
     WriteLog("Code is Starting")
+    import_json_decoder()
+    start_stream_recording()
+    start_metrics()
+    workers = min(FETCH_WORKERS * len(sessions), 16)
+    return MatchFetcher(apply_match_details, workers, connections=workers + len(sessions))
 
-    try:
-        obs_connection = Connect_OBS()
-    except Exception as e:
-        WriteLog(str(e))
-        return
 
-    ftc_ws_url = f"ws://{FTCSERVER_NAME}/api/v2/stream/?code={FTCSERVER_EVENTCODE}"
-    Write_Host("Connecting to FTC websocket...")
+def stop_shared_services(match_fetcher):
+    match_fetcher.close()
+    close_match_logs()
+    connection_health.log_summary()
+    stop_metrics()
+    stop_stream_recording()
+    flush_logs()
+
+
+def run_session(session, match_fetcher):
+    """
+    One event session on the thread engine: connects its FTC stream and OBS, then dispatches its
+    frames until shutdown is requested.
+    """
+    check_field_config(session.settings)
+    obs_servers, field_routes = load_field_routing(session.settings)
+    preflight = Preflight(session, obs_servers)
+    state = open_session_state(session)
+
+    # OBS and the FTC stream are connected at the same time, alongside the preflight probes.
+    Write_Host(f"Connecting to FTC websocket{session.suffix}...")
+    import websocket
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        ftc_connecting = pool.submit(websocket.create_connection, session.stream_url())
+        obs_targets = connect_obs_targets(session, obs_servers)
+    preflight.report()
     try:
-        ftc_ws = websocket.create_connection(ftc_ws_url)
-        Write_Host("Connected to FTC websocket!")
+        ftc_ws = ftc_connecting.result()
+        Write_Host(f"Connected to FTC websocket{session.suffix}!")
     except Exception as e:
-        WriteLog(f"Failed to connect to FTC WebSocket: {e}")
+        WriteLog(f"Failed to connect to FTC WebSocket{session.suffix}: {e}", level="error")
+        ftc_ws = None
+    if not obs_targets or ftc_ws is None:
+        if ftc_ws is not None:
+            ftc_ws.close()
+        for target in obs_targets.values():
+            target.disconnect()
+        state.close()
         return
+    stream_clock = next(iter(obs_targets.values())).stream_clock  # the first OBS's stream times the match log
 
-    recv_thread_obj = threading.Thread(target=ftc_recv_job, args=(ftc_ws,), daemon=True)
-    send_thread_obj = threading.Thread(target=ftc_send_job, args=(ftc_ws,), daemon=True)
-    recv_thread_obj.start()
+    ftc_stream = FTCStream(session, ftc_ws, on_reconnect=lambda: resync_after_ftc_reconnect(session, match_fetcher))
+    send_thread_obj = threading.Thread(target=ftc_send_job, args=(ftc_stream,), daemon=True)
+    ftc_stream.start()
     send_thread_obj.start()
-
-    WriteLog("Code is Running")
+    start_match_schedule(session, match_fetcher.http)
+    bookkeeping = BookkeepingLane()
+    lookahead = PreviewLookahead(session, field_routes)
+    session.targets, session.bookkeeping = obs_targets, bookkeeping
+    if state.restored:
+        lookahead.restore(state.fields)
+        for job in warm_restart_jobs(session, match_fetcher, stream_clock):
+            bookkeeping.submit(*job)
+        bookkeeping.submit(resync_after_ftc_reconnect, session, match_fetcher)
+
+    WriteLog(f"Code is Running{session.suffix}")
 
     try:
         while True:
-            if exit_requested:
-                WriteLog("Exit requested; breaking main loop.")
+            if shutdown_event.is_set():
+                WriteLog(f"Exit requested; breaking main loop{session.suffix}.")
                 break
 
             try:
-                msg = recv_queue.get(timeout=1)
+                received_at, msg = session.recv_queue.get(timeout=0.25)
             except queue.Empty:
-                time.sleep(0.1)
                 continue
 
-            if msg == "pong":
-                continue
+            try:
+                handle_ftc_message(session, msg, received_at, obs_targets, lookahead, stream_clock, match_fetcher,
+                                   bookkeeping.submit)
+            except Exception as e:
+                WriteLog(f"Error in main loop{session.suffix}: {e}", level="error")
 
+    except KeyboardInterrupt:
+        WriteLog("Code is stopping (KeyboardInterrupt)")
+    except Exception as e:
+        WriteLog(f"Error in main loop{session.suffix}: {e}", level="error")
+    finally:
+        Write_Host(f"Closing FTC WS connection{session.suffix}")
+        ftc_stream.close()
+        session.send_queue.put(None)
+        bookkeeping.close()
+        Write_Host(f"Disconnecting from OBS{session.suffix}")
+        for target in obs_targets.values():
             try:
-                message_obj = json.loads(msg)
+                target.disconnect()
             except Exception:
-                WriteLog(f"Error converting message to JSON: {msg}")
-                continue
+                pass
+        stop_match_schedule(session)
+        session.targets, session.bookkeeping = {}, None
+        state.close()
 
-            WriteLog(f"Received message: {message_obj}")
-
-            updateType = message_obj.get("updateType")
-            payload = message_obj.get("payload", {})
-            shortName = payload.get("shortName", "")
-            field = str(payload.get("field", ""))
-
-            WriteLog(f"updateType: {updateType}, shortName: {shortName}, field: {field}")
-
-            if updateType in ["SHOW_PREVIEW", "SHOW_MATCH"]:
-                if not shortName.startswith("F-"):
-                    if field == "1":
-                        current_scene = Get_OBSCurrentProgramScene(obs_connection)
-                        if current_scene != OBS_SCENENAME_FIELD1:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Switching to FIELD {field}")
-                            Set_OBSCurrentProgramScene(obs_connection, OBS_SCENENAME_FIELD1)
-                            time.sleep(0.2)
-                            Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD2)
-                        else:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Already on FIELD {field}")
-                    elif field == "2":
-                        current_scene = Get_OBSCurrentProgramScene(obs_connection)
-                        if current_scene != OBS_SCENENAME_FIELD2:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Switching to FIELD {field}")
-                            Set_OBSCurrentProgramScene(obs_connection, OBS_SCENENAME_FIELD2)
-                            time.sleep(0.2)
-                            if OBS_SCENENAME_FIELD3:
-                                Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD3)
-                            else:
-                                Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD1)
-                        else:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Already on FIELD {field}")
-                    elif field == "3":
-                        current_scene = Get_OBSCurrentProgramScene(obs_connection)
-                        if current_scene != OBS_SCENENAME_FIELD3:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Switching to FIELD {field}")
-                            Set_OBSCurrentProgramScene(obs_connection, OBS_SCENENAME_FIELD3)
-                            time.sleep(0.2)
-                            if OBS_SCENENAME_FIELD4:
-                                Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD4)
-                            else:
-                                Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD1)
-                        else:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Already on FIELD {field}")
-                    elif field == "4":
-                        current_scene = Get_OBSCurrentProgramScene(obs_connection)
-                        if current_scene != OBS_SCENENAME_FIELD4:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Switching to FIELD {field}")
-                            Set_OBSCurrentProgramScene(obs_connection, OBS_SCENENAME_FIELD4)
-                            time.sleep(0.2)
-                            Set_OBSCurrentPreviewScene(obs_connection, OBS_SCENENAME_FIELD1)
-                        else:
-                            Write_Host(f"[{time.strftime('%Y%m%d %H:%M:%S')}] Already on FIELD {field}")
-            elif updateType == "MATCH_START":
-                if not shortName.startswith("T-"):
-                    stream_status = Get_OBSStreamStatus(obs_connection)
-                    try:
-                        ms = stream_status.get("outputDuration", 0)
-                        seconds = ms / 1000.0
-                        TimeStamp = time.strftime("%H:%M:%S", time.gmtime(seconds))
-                    except Exception:
-                        TimeStamp = "00:00:00"
-                    new_row = {
-                        "TimeStamp": TimeStamp,
-                        "MatchName": shortName,
-                        "Red1": "",
-                        "Red2": "",
-                        "Blue1": "",
-                        "Blue2": "",
-                        "RedFinal": "",
-                        "BlueFinal": ""
-                    }
-                    csv_file = f"{FTCSERVER_EVENTCODE}_YouTube_Description.csv"
-                    file_exists = os.path.isfile(csv_file)
-                    with open(csv_file, 'a', newline='') as csvfile:
-                        fieldnames = ["TimeStamp", "MatchName", "Red1", "Red2", "Blue1", "Blue2", "RedFinal",
-                                      "BlueFinal"]
-                        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                        if not file_exists:
-                            writer.writeheader()
-                        writer.writerow(new_row)
-                    generate_youtube_description()
-            elif updateType == "MATCH_COMMIT":
-                if shortName.startswith("Q"):
-                    url = f"http://{FTCSERVER_NAME}/api/v1/events/{FTCSERVER_EVENTCODE}/matches/{payload.get('number')}/"
-                    res = requests.get(url).json()
-                    csv_file = f"{FTCSERVER_EVENTCODE}_YouTube_Description.csv"
-                    rows = []
-                    if os.path.isfile(csv_file):
-                        with open(csv_file, 'r', newline='') as csvfile:
-                            reader = csv.DictReader(csvfile)
-                            for row in reader:
-                                if row.get("MatchName") == shortName:
-                                    row["Red1"] = res.get("matchBrief", {}).get("red", {}).get("team1", "")
-                                    row["Red2"] = res.get("matchBrief", {}).get("red", {}).get("team2", "")
-                                    row["Blue1"] = res.get("matchBrief", {}).get("blue", {}).get("team1", "")
-                                    row["Blue2"] = res.get("matchBrief", {}).get("blue", {}).get("team2", "")
-                                    row["RedFinal"] = res.get("redScore", "")
-                                    row["BlueFinal"] = res.get("blueScore", "")
-                                rows.append(row)
-                        with open(csv_file, 'w', newline='') as csvfile:
-                            fieldnames = ["TimeStamp", "MatchName", "Red1", "Red2", "Blue1", "Blue2", "RedFinal",
-                                          "BlueFinal"]
-                            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                            writer.writeheader()
-                            writer.writerows(rows)
-                    generate_youtube_description()
-
-            time.sleep(0.01)
 
+def run_sessions(sessions, match_fetcher):
+    """
+    The multi-event supervisor: every session runs on its own thread until shutdown is requested
+    (or it could not connect). Returns once all of them have stopped.
+    """
+    threads = [threading.Thread(target=run_session, args=(session, match_fetcher), daemon=True,
+                                name=f"session-{session.name}") for session in sessions]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.25)
     except KeyboardInterrupt:
         WriteLog("Code is stopping (KeyboardInterrupt)")
-    except Exception as e:
-        WriteLog(f"Error in main loop: {e}")
+        shutdown_event.set()
+        for thread in threads:
+            thread.join()
+
+
+def main():
+    global event_sessions
+    try:
+        event_sessions = load_event_sessions()
+    except (OSError, ValueError) as e:
+        WriteLog(f"[ERROR] Could not load the events file: {e}", level="error")
+        return
+    if len(event_sessions) > 1:
+        WriteLog(f"Running {len(event_sessions)} event sessions: {', '.join(s.name for s in event_sessions)}")
+
+    if ENGINE == "asyncio":
+        import_asyncio()
+        asyncio.run(main_async(event_sessions))
+        return
+
+    match_fetcher = start_shared_services(event_sessions)
+    try:
+        if len(event_sessions) == 1:
+            run_session(event_sessions[0], match_fetcher)
+        else:
+            run_sessions(event_sessions, match_fetcher)
     finally:
-        Write_Host("Closing FTC WS connection")
-        try:
-            ftc_ws.close()
-        except Exception:
-            pass
-        Write_Host("Disconnecting from OBS")
+        stop_shared_services(match_fetcher)
+
+
+logo_image = None  # intodeep.png scaled to fit 128x128, shared by both windows
+
+
+def load_logo_image():
+    """
+    Opens and scales the logo once; each window makes its own PhotoImage from it.
+    """
+    global logo_image
+    if logo_image is None:
+        from PIL import Image
+        image = Image.open("intodeep.png")
         try:
-            obs_connection.disconnect()
-        except Exception:
-            pass
+            resample_method = Image.Resampling.LANCZOS
+        except AttributeError:
+            resample_method = Image.LANCZOS
+        # Use thumbnail to scale down preserving aspect ratio
+        image.thumbnail((128, 128), resample_method)
+        logo_image = image
+    return logo_image
 
 
 def launch_config_gui():
@@ -396,6 +3448,9 @@ def launch_config_gui():
     Opens a Tkinter GUI to configure the global variables.
     Displays the 'intodeep.png' logo (scaled down with preserved aspect ratio) at the top.
     """
+    import tkinter as tk
+    from tkinter import ttk
+
     config = {}
     root = tk.Tk()
     root.title("Configuration Settings")
@@ -404,15 +3459,8 @@ def launch_config_gui():
     logo_frame = tk.Frame(root)
     logo_frame.pack(side=tk.TOP, pady=10)
     try:
-        from PIL import Image, ImageTk
-        logo_image = Image.open("intodeep.png")
-        try:
-            resample_method = Image.Resampling.LANCZOS
-        except AttributeError:
-            resample_method = Image.LANCZOS
-        # Use thumbnail to scale down preserving aspect ratio
-        logo_image.thumbnail((128, 128), resample_method)
-        logo_photo = ImageTk.PhotoImage(logo_image)
+        from PIL import ImageTk
+        logo_photo = ImageTk.PhotoImage(load_logo_image())
         logo_label = tk.Label(logo_frame, image=logo_photo)
         logo_label.image = logo_photo
         logo_label.pack()
@@ -432,7 +3480,17 @@ def launch_config_gui():
         ("OBS Scene Name Field 3:", "OBS_SCENENAME_FIELD3"),
         ("OBS Scene Name Field 4:", "OBS_SCENENAME_FIELD4"),
         ("FTC Server Name:", "FTCSERVER_NAME"),
-        ("FTC Event Code:", "FTCSERVER_EVENTCODE")
+        ("FTC Event Code:", "FTCSERVER_EVENTCODE"),
+        ("Engine (thread/asyncio):", "ENGINE"),
+        ("OBS Batch Execution (realtime/frame):", "OBS_BATCH_EXECUTION"),
+        ("Routing Config File (optional):", "ROUTING_CONFIG_FILE"),
+        ("Events File (optional, several events):", "EVENTS_FILE"),
+        ("Metrics Port (0 = off):", "METRICS_PORT"),
+        ("Metrics Summary Interval s (0 = off):", "METRICS_SUMMARY_INTERVAL"),
+        ("Record Stream To (optional file):", "RECORD_FILE"),
+        ("Log Level (debug/info/warning/error):", "LOG_LEVEL"),
+        ("Log File (optional, JSON lines):", "LOG_FILE"),
+        ("Export Formats (txt,csv,json,md):", "EXPORT_FORMATS")
     ]
 
     default_values = {
@@ -444,7 +3502,17 @@ def launch_config_gui():
         "OBS_SCENENAME_FIELD3": OBS_SCENENAME_FIELD3,
         "OBS_SCENENAME_FIELD4": OBS_SCENENAME_FIELD4,
         "FTCSERVER_NAME": FTCSERVER_NAME,
-        "FTCSERVER_EVENTCODE": FTCSERVER_EVENTCODE
+        "FTCSERVER_EVENTCODE": FTCSERVER_EVENTCODE,
+        "ENGINE": ENGINE,
+        "OBS_BATCH_EXECUTION": OBS_BATCH_EXECUTION,
+        "ROUTING_CONFIG_FILE": ROUTING_CONFIG_FILE,
+        "EVENTS_FILE": EVENTS_FILE,
+        "METRICS_PORT": str(METRICS_PORT),
+        "METRICS_SUMMARY_INTERVAL": str(METRICS_SUMMARY_INTERVAL),
+        "RECORD_FILE": RECORD_FILE,
+        "LOG_LEVEL": LOG_LEVEL,
+        "LOG_FILE": LOG_FILE,
+        "EXPORT_FORMATS": EXPORT_FORMATS
     }
 
     entries = {}
@@ -469,6 +3537,23 @@ def launch_config_gui():
         config["OBS_SCENENAME_FIELD4"] = entries["OBS_SCENENAME_FIELD4"].get()
         config["FTCSERVER_NAME"] = entries["FTCSERVER_NAME"].get()
         config["FTCSERVER_EVENTCODE"] = entries["FTCSERVER_EVENTCODE"].get()
+        config["ENGINE"] = entries["ENGINE"].get().strip().lower() or "thread"
+        config["OBS_BATCH_EXECUTION"] = entries["OBS_BATCH_EXECUTION"].get().strip().lower() or "realtime"
+        config["ROUTING_CONFIG_FILE"] = entries["ROUTING_CONFIG_FILE"].get().strip()
+        config["EVENTS_FILE"] = entries["EVENTS_FILE"].get().strip()
+        try:
+            config["METRICS_PORT"] = int(entries["METRICS_PORT"].get() or 0)
+        except ValueError:
+            config["METRICS_PORT"] = 0
+        try:
+            config["METRICS_SUMMARY_INTERVAL"] = float(entries["METRICS_SUMMARY_INTERVAL"].get() or 0)
+        except ValueError:
+            config["METRICS_SUMMARY_INTERVAL"] = 0
+        config["RECORD_FILE"] = entries["RECORD_FILE"].get().strip()
+        level = entries["LOG_LEVEL"].get().strip().lower() or "info"
+        config["LOG_LEVEL"] = level if level in LOG_LEVELS else "info"
+        config["LOG_FILE"] = entries["LOG_FILE"].get().strip()
+        config["EXPORT_FORMATS"] = entries["EXPORT_FORMATS"].get().strip().lower() or "txt,csv"
         root.destroy()
 
     start_button = ttk.Button(root, text="Save Configurations", command=on_start)
@@ -481,10 +3566,12 @@ def launch_config_gui():
 def launch_exit_window():
     """
     Opens a Tkinter window with the logo (scaled down with preserved aspect ratio),
-    a label that says "FTC Scene switching is running", and a single button labeled "Exit".
-    Clicking the button sets the exit flag.
+    a label that says "FTC Scene switching is running", the live status from status_board
+    and a single button labeled "Exit". Clicking the button requests shutdown.
     """
-    global exit_requested
+    import tkinter as tk
+    from tkinter import ttk
+
     exit_root = tk.Tk()
     exit_root.title("Exit Application")
 
@@ -492,14 +3579,8 @@ def launch_exit_window():
     logo_frame = tk.Frame(exit_root)
     logo_frame.pack(side=tk.TOP, pady=10)
     try:
-        from PIL import Image, ImageTk
-        logo_image = Image.open("intodeep.png")
-        try:
-            resample_method = Image.Resampling.LANCZOS
-        except AttributeError:
-            resample_method = Image.LANCZOS
-        logo_image.thumbnail((128, 128), resample_method)
-        logo_photo = ImageTk.PhotoImage(logo_image)
+        from PIL import ImageTk
+        logo_photo = ImageTk.PhotoImage(load_logo_image())
         logo_label = tk.Label(logo_frame, image=logo_photo)
         logo_label.image = logo_photo
         logo_label.pack()
@@ -510,6 +3591,18 @@ def launch_exit_window():
     status_label = ttk.Label(exit_root, text="FTC Scene switching is running")
     status_label.pack(pady=5)
 
+    # Live status, redrawn from the newest snapshot; the engines never wait for this window
+    status_text = tk.StringVar(value=format_status(status_board.latest))
+    ttk.Label(exit_root, textvariable=status_text, font="TkFixedFont", justify=tk.LEFT).pack(padx=10, pady=5)
+
+    def refresh(shown):
+        snapshot = status_board.latest
+        if snapshot is not shown:
+            status_text.set(format_status(snapshot))
+        exit_root.after(int(STATUS_REFRESH * 1000), refresh, snapshot)
+
+    refresh(status_board.latest)
+
     # Exit button
     exit_button = ttk.Button(exit_root, text="Exit", command=lambda: on_exit(exit_root))
     exit_button.pack(padx=20, pady=20)
@@ -518,31 +3611,110 @@ def launch_exit_window():
 
 
 def on_exit(window):
-    global exit_requested
-    exit_requested = True
+    request_shutdown()
     window.destroy()
 
 
+# ==================================================
+#          Headless Mode (no windows, for services)
+# ==================================================
+
+# Settings that can come from a config file, the environment or the command line, with their types
+CONFIG_TYPES = {
+    "OBS_SERVERNAME": str, "OBS_WEBSOCKET_PASSWORD": str, "OBS_WEBSOCKET_PORT": int,
+    "OBS_SCENENAME_FIELD1": str, "OBS_SCENENAME_FIELD2": str,
+    "OBS_SCENENAME_FIELD3": str, "OBS_SCENENAME_FIELD4": str,
+    "FTCSERVER_NAME": str, "FTCSERVER_EVENTCODE": str,
+    "ENGINE": str, "OBS_BATCH_EXECUTION": str, "ROUTING_CONFIG_FILE": str, "EVENTS_FILE": str,
+    "METRICS_PORT": int, "METRICS_SUMMARY_INTERVAL": float, "RECORD_FILE": str,
+    "LOG_LEVEL": str, "LOG_FILE": str, "LOG_MAX_BYTES": int, "LOG_BACKUP_COUNT": int,
+    "EXPORT_FORMATS": str,
+}
+
+
+def parse_command_line(argv=None):
+    parser = argparse.ArgumentParser(description="Switches OBS scenes to follow the FTC scoring system.")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without windows until SIGINT/SIGTERM (Ctrl+C)")
+    parser.add_argument("--config", help='JSON file of settings, e.g. {"OBS_SERVERNAME": "10.0.0.5"}')
+    parser.add_argument("--print-config", action="store_true", help="print the resolved settings as JSON and exit")
+    for name, kind in CONFIG_TYPES.items():
+        parser.add_argument("--" + name.lower().replace("_", "-"), dest=name, metavar=kind.__name__.upper())
+    return parser.parse_args(argv)
+
+
+def read_config_sources(args):
+    """
+    Settings from, in increasing priority: the --config JSON file, FTC_SWITCHER_<NAME> environment
+    variables, and --<name> options (e.g. --obs-servername). Raises ValueError for unknown names in
+    the file or values of the wrong type.
+    """
+    config = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            config.update(json.load(f))
+        unknown = sorted(set(config) - set(CONFIG_TYPES))
+        if unknown:
+            raise ValueError(f"Unknown setting(s) in {args.config}: {', '.join(unknown)}")
+    for name in CONFIG_TYPES:
+        if f"FTC_SWITCHER_{name}" in os.environ:
+            config[name] = os.environ[f"FTC_SWITCHER_{name}"]
+        if getattr(args, name) is not None:
+            config[name] = getattr(args, name)
+    typed = {}
+    for name, value in config.items():
+        try:
+            typed[name] = CONFIG_TYPES[name](value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be {CONFIG_TYPES[name].__name__}, got {value!r}") from None
+    return typed
+
+
+def apply_config(config):
+    globals().update((name, value) for name, value in config.items() if name in CONFIG_TYPES)
+
+
+def run_headless():
+    """
+    Runs main() on this thread until SIGINT/SIGTERM (SIGBREAK on Windows). Returns the exit code:
+    0 after a requested shutdown, 1 if main() stopped on its own (e.g. it could not connect), so a
+    service manager can restart it.
+    """
+    for name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), request_shutdown)
+    main()
+    flush_logs()
+    return 0 if shutdown_event.is_set() else 1
+
+
 # ==================================================
 #                    Entry Point
 # ==================================================
 
 if __name__ == '__main__':
-    config = launch_config_gui()
-    OBS_SERVERNAME = config.get("OBS_SERVERNAME", OBS_SERVERNAME)
-    OBS_WEBSOCKET_PASSWORD = config.get("OBS_WEBSOCKET_PASSWORD", OBS_WEBSOCKET_PASSWORD)
-    OBS_WEBSOCKET_PORT = config.get("OBS_WEBSOCKET_PORT", OBS_WEBSOCKET_PORT)
-    OBS_SCENENAME_FIELD2 = config.get("OBS_SCENENAME_FIELD2", OBS_SCENENAME_FIELD2)
-    OBS_SCENENAME_FIELD1 = config.get("OBS_SCENENAME_FIELD1", OBS_SCENENAME_FIELD1)
-    OBS_SCENENAME_FIELD3 = config.get("OBS_SCENENAME_FIELD3", OBS_SCENENAME_FIELD3)
-    OBS_SCENENAME_FIELD4 = config.get("OBS_SCENENAME_FIELD4", OBS_SCENENAME_FIELD4)
-    FTCSERVER_NAME = config.get("FTCSERVER_NAME", FTCSERVER_NAME)
-    FTCSERVER_EVENTCODE = config.get("FTCSERVER_EVENTCODE", FTCSERVER_EVENTCODE)
-
+    arguments = parse_command_line()
+    try:
+        apply_config(read_config_sources(arguments))
+    except (OSError, ValueError) as e:
+        Write_Host(f"[ERROR] {e}")
+        flush_logs()
+        sys.exit(2)
+    if arguments.print_config:
+        print(json.dumps({name: globals()[name] for name in CONFIG_TYPES}, indent=2))
+        sys.exit(0)
+    if arguments.headless:
+        sys.exit(run_headless())
+
+    # Settings from a config file, the environment or the command line prefill the window.
+    apply_config(launch_config_gui())
+
+    status_board.start()
     main_thread = threading.Thread(target=main, daemon=True)
     main_thread.start()
 
     launch_exit_window()
 
     main_thread.join()
+    status_board.stop()
     sys.exit(0)